@@ -1,17 +1,13 @@
 import streamlit as st
+import json
 from modules.module1_learning_objective_setter import generate_learning_objectives
+from modules.ui import local_css, input_key
 
-def local_css(file_name):
-    try:
-        with open(file_name) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-    except FileNotFoundError:
-        st.error(f"CSS file not found: {file_name}. Make sure the 'styles' directory and 'style.css' file exist.")
+st.set_page_config(layout="wide")
 
-# --- Apply the custom CSS ---
-local_css("HtmlCSS\streamlit.css")
+# --- Apply the custom CSS (file read is cached) ---
+local_css()
 
-st.set_page_config(layout="wide")
 st.title("EduPilot — Module 1: Learning Objectives")
 
 # --- Input Section moved to Sidebar ---
@@ -22,20 +18,36 @@ with st.sidebar:
     credit_hours = st.number_input("⏱️ Credit Hours", min_value=1, max_value=6, value=3)
     submitted = st.button("Generate Learning Objectives")
 
-# --- Output Section in Main Area ---
+# --- Generation: results are kept in session_state so later reruns don't regenerate ---
+inputs = input_key(topic, level, credit_hours)
 if submitted:
     with st.spinner("🔍 Analyzing trends and generating learning objectives..."):
-        objectives, filepath = generate_learning_objectives(topic, level, credit_hours)
+        objectives, artifact_id = generate_learning_objectives(topic, level, credit_hours)
+    st.session_state["objectives_result"] = {
+        "inputs": inputs, "topic": topic, "objectives": objectives, "artifact_id": artifact_id
+    }
 
-        if objectives:
-            st.success("✅ Learning Objectives Generated Successfully!")
-            st.subheader("🎯 Suggested Learning Objectives")
-            # Using st.container to group the output
-            with st.container(border=True):
-                 for obj in objectives:
-                    st.write(f"- {obj}")
-            st.info(f"Results saved to: {filepath}")
-        else:
-            st.error("⚠️ Failed to generate learning objectives.")
+# --- Output Section in Main Area ---
+result = st.session_state.get("objectives_result")
+if result:
+    if result["objectives"]:
+        st.success("✅ Learning Objectives Generated Successfully!")
+        if result["inputs"] != inputs:
+            st.caption("Showing the last generated objectives; the parameters have changed since.")
+        st.subheader("🎯 Suggested Learning Objectives")
+        # Using st.container to group the output
+        with st.container(border=True):
+             for obj in result["objectives"]:
+                st.write(f"- {obj}")
+        st.info(f"Results saved as: {result['artifact_id']}")
+        # The JSON file is the input for Module 2
+        st.download_button(
+            label="📥 Download as JSON",
+            data=json.dumps({"topic": result["topic"], "objectives": result["objectives"]}, indent=4, ensure_ascii=False),
+            file_name=f"{result['topic'].replace(' ', '_')}_learning_objectives.json",
+            mime="application/json"
+        )
+    else:
+        st.error("⚠️ Failed to generate learning objectives.")
 else:
-    st.info("Enter your course details in the sidebar and click 'Generate Learning Objectives'.")
\ No newline at end of file
+    st.info("Enter your course details in the sidebar and click 'Generate Learning Objectives'.")
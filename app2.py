@@ -1,21 +1,13 @@
 import streamlit as st
 from modules.module2_curriculum_structurer import generate_curriculum
+from modules.ui import local_css, input_key, upload_digest, curriculum_sections, curriculum_docx, artifact_json, lazy_download, DOCX_MIME
 import os
-import re
-import io
-from docx import Document
 
-def local_css(file_name):
-    try:
-        with open(file_name) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-    except FileNotFoundError:
-        st.error(f"CSS file not found: {file_name}. Make sure the 'styles' directory and 'style.css' file exist.")
+st.set_page_config(layout="wide")
 
-# --- Apply the custom CSS ---
-local_css("HtmlCSS\streamlit.css")
+# --- Apply the custom CSS (file read is cached) ---
+local_css()
 
-st.set_page_config(layout="wide")
 st.title("EduPilot — Module 2: Curriculum Structurer")
 
 # --- Input Section in Sidebar ---
@@ -28,7 +20,8 @@ with st.sidebar:
     assessments = st.multiselect("Assessment Preferences", ["Quizzes", "Projects", "Exams", "Presentations", "Labs"], default=["Quizzes", "Projects", "Exams"])
     submitted = st.button("Generate Curriculum")
 
-# --- Output Section in Main Area ---
+# --- Generation: results are kept in session_state so later reruns don't regenerate ---
+inputs = input_key(upload_digest(uploaded_file), learning_outcomes_input, time_weeks, approach, assessments)
 if submitted:
     if not uploaded_file and not learning_outcomes_input:
         st.error("Please upload a file or paste learning outcomes to proceed.")
@@ -44,57 +37,56 @@ if submitted:
             learning_input = learning_outcomes_input
 
         with st.spinner("Generating curriculum..."):
-            curriculum_text, _ = generate_curriculum(learning_input, time_weeks, approach, assessments)
-            
-            if curriculum_text:
-                st.success("✅ Curriculum Generated Successfully!")
-                st.subheader("📄 Generated Curriculum Plan")
+            curriculum_text, artifact_id = generate_curriculum(learning_input, time_weeks, approach, assessments)
+        st.session_state["curriculum_result"] = {
+            "inputs": inputs, "curriculum_text": curriculum_text, "artifact_id": artifact_id
+        }
+        # A new curriculum needs its downloads prepared again
+        st.session_state.pop("_download_ready_curriculum_docx", None)
+
+# --- Output Section in Main Area ---
+result = st.session_state.get("curriculum_result")
+if result:
+    curriculum_text = result["curriculum_text"]
+    if curriculum_text:
+        st.success("✅ Curriculum Generated Successfully!")
+        if result["inputs"] != inputs:
+            st.caption("Showing the last generated curriculum; the parameters have changed since.")
+        st.subheader("📄 Generated Curriculum Plan")
+
+        # Parsed once per curriculum (cached) and reused for both the expanders and the DOCX
+        for header, body in curriculum_sections(curriculum_text):
+            with st.expander(header):
+                st.markdown(body, unsafe_allow_html=True)
 
-                modules = re.split(r"(?=\*\*Module \d+)", curriculum_text)
-                for mod in modules:
-                    if mod.strip():
-                        header_match = re.match(r"\*\*(Module \d+.*?)\*\*", mod)
-                        header = header_match.group(1) if header_match else "Module"
-                        body = mod.replace(f"**{header}**", "").strip()
-                        with st.expander(header):
-                            st.markdown(body, unsafe_allow_html=True)
+        # --- Download Buttons ---
+        st.subheader("⬇️ Download Options")
+        col1, col2, col3 = st.columns(3)
 
-                # --- Download Buttons ---
-                st.subheader("⬇️ Download Options")
-                col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 Download as TXT",
+                data=curriculum_text,
+                file_name="Curriculum_Plan.txt",
+                mime="text/plain",
+                use_container_width=True
+            )
 
-                with col1:
-                    st.download_button(
-                        label="📥 Download as TXT",
-                        data=curriculum_text,
-                        file_name="Curriculum_Plan.txt",
-                        mime="text/plain",
-                        use_container_width=True
-                    )
-                
-                with col2:
-                    doc = Document()
-                    doc.add_heading("Curriculum Plan", level=1)
-                    for mod in modules:
-                        if mod.strip():
-                            header_match = re.match(r"\*\*(Module \d+.*?)\*\*", mod)
-                            header = header_match.group(1) if header_match else "Module"
-                            body = mod.replace(f"**{header}**", "").strip()
-                            doc.add_paragraph(header, style='Heading2')
-                            doc.add_paragraph(body)
-                    
-                    bio = io.BytesIO()
-                    doc.save(bio)
-                    bio.seek(0)
-                    
-                    st.download_button(
-                        label="📥 Download as DOCX",
-                        data=bio.getvalue(),
-                        file_name="Curriculum_Plan.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                        use_container_width=True
-                    )
-            else:
-                st.error("⚠️ Failed to generate curriculum.")
+        # DOCX is only rendered when asked for
+        with col2:
+            lazy_download("as DOCX", "curriculum_docx", lambda: curriculum_docx(curriculum_text),
+                          "Curriculum_Plan.docx", DOCX_MIME)
+
+        # The JSON file is the input for Module 3
+        with col3:
+            st.download_button(
+                label="📥 Download as JSON",
+                data=artifact_json(result["artifact_id"]),
+                file_name="Curriculum_Plan.json",
+                mime="application/json",
+                use_container_width=True
+            )
+    else:
+        st.error("⚠️ Failed to generate curriculum.")
 else:
     st.info("Provide the learning outcomes and course parameters in the sidebar, then click 'Generate Curriculum'.")
@@ -1,21 +1,23 @@
 import streamlit as st
 import asyncio
+import json
 import os
-import io
-from docx import Document
-from modules.module3_content_generator import generate_course_content
+from modules.module3_content_generator import stream_course_content
+from modules.llm_errors import LLMError
+from modules.ui import local_css, input_key, upload_digest, week_docx, lazy_download, DOCX_MIME
 
-def local_css(file_name):
-    try:
-        with open(file_name) as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-    except FileNotFoundError:
-        st.error(f"CSS file not found: {file_name}. Make sure the 'styles' directory and 'style.css' file exist.")
-
-# --- Apply the custom CSS ---
-local_css("HtmlCSS\streamlit.css")
+SECTION_LABELS = {
+    "lecture_notes": "📝 Lecture Notes",
+    "reading_materials": "📚 Reading Materials & References",
+    "exercises_projects": "💻 Exercises & Projects",
+    "assessment_questions": "❓ Assessment Questions",
+}
 
 st.set_page_config(layout="wide")
+
+# --- Apply the custom CSS (file read is cached) ---
+local_css()
+
 st.title("EduPilot — Module 3: Weekly Content Generator")
 
 # --- Input Section in Sidebar ---
@@ -46,6 +48,10 @@ with st.sidebar:
     submitted = st.button("Generate Weekly Content")
 
 
+# --- Generated weeks are kept in session_state, keyed on the inputs that produced them ---
+week_results = st.session_state.setdefault("week_results", {})
+inputs = input_key(upload_digest(uploaded_file), week_number, complexity, multimedia_prefs)
+
 # --- Output Section in Main Area ---
 if submitted:
     if uploaded_file:
@@ -55,72 +61,66 @@ if submitted:
         with open(temp_path, "wb") as f:
             f.write(uploaded_file.getbuffer())
 
+        st.subheader(f"Generated Content for Week {week_number}")
+
+        # Each expander is filled progressively as its section streams in
+        placeholders = {}
+        for section, label in SECTION_LABELS.items():
+            with st.expander(label, expanded=True):
+                placeholders[section] = st.empty()
+        buffers = {section: "" for section in SECTION_LABELS}
+
+        def on_chunk(section, chunk):
+            buffers[section] += chunk
+            placeholders[section].markdown(buffers[section])
+
         with st.spinner(f"🚀 Generating content for Week {week_number}..."):
-            content, filepath = asyncio.run(generate_course_content(
-                temp_path, week_number, complexity, multimedia_prefs
-            ))
-            
-            if content:
-                st.success(f"✅ Content generation for Week {week_number} complete!")
-                st.subheader(f"Generated Content for Week {week_number}")
-
-                # Display content in expanders
-                with st.expander("📝 Lecture Notes"):
-                    st.markdown(content.get("lecture_notes", "Not available."))
-
-                with st.expander("📚 Reading Materials & References"):
-                    st.markdown(content.get("reading_materials", "Not available."))
-
-                with st.expander("💻 Exercises & Projects"):
-                    st.markdown(content.get("exercises_projects", "Not available."))
-
-                with st.expander("❓ Assessment Questions"):
-                    st.markdown(content.get("assessment_questions", "Not available."))
-
-                # --- Download Buttons ---
-                st.subheader("⬇️ Download Options")
-                col1, col2 = st.columns(2)
-
-                # JSON download
-                with col1:
-                    with open(filepath, "r", encoding="utf-8") as f:
-                        st.download_button(
-                            label=f"📥 Download as JSON",
-                            data=f.read(),
-                            file_name=os.path.basename(filepath),
-                            mime="application/json",
-                            use_container_width=True
-                        )
-
-                # DOCX download
-                with col2:
-                    doc = Document()
-                    doc.add_heading(f'Course Content: Week {week_number}', level=1)
-                    doc.add_heading('Lecture Notes', level=2)
-                    doc.add_paragraph(content.get("lecture_notes", "Not available."))
-                    doc.add_heading('Reading Materials & References', level=2)
-                    doc.add_paragraph(content.get("reading_materials", "Not available."))
-                    doc.add_heading('Exercises & Projects', level=2)
-                    doc.add_paragraph(content.get("exercises_projects", "Not available."))
-                    doc.add_heading('Assessment Questions', level=2)
-                    doc.add_paragraph(content.get("assessment_questions", "Not available."))
-
-                    bio = io.BytesIO()
-                    doc.save(bio)
-                    bio.seek(0)
-                    
-                    st.download_button(
-                        label="📥 Download as DOCX",
-                        data=bio.getvalue(),
-                        file_name=f"Week_{week_number}_Content.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                        use_container_width=True
-                    )
-            else:
-                st.error(f"⚠️  Failed to generate content for Week {week_number}.")
+            try:
+                content, artifact_id = asyncio.run(stream_course_content(
+                    temp_path, week_number, complexity, multimedia_prefs, on_chunk=on_chunk
+                ))
+            except LLMError as e:
+                st.error(f"⚠️ {e}")
+                content, artifact_id = None, None
+
+        if content:
+            week_results[inputs] = {"week": week_number, "content": content, "artifact_id": artifact_id}
+            st.session_state.pop(f"_download_ready_week_docx_{inputs}", None)
+            # Rerun once so the stored result is rendered (with downloads) by the branch below
+            st.rerun()
+        else:
+            st.error(f"⚠️  Failed to generate content for Week {week_number}.")
 
     else:
         st.error("Please upload the JSON file from Module 2.")
+elif inputs in week_results:
+    result = week_results[inputs]
+    content = result["content"]
+    st.subheader(f"Generated Content for Week {result['week']}")
+    for section, label in SECTION_LABELS.items():
+        with st.expander(label, expanded=True):
+            st.markdown(content.get(section, "Not available."))
+
+    st.success(f"✅ Content generation for Week {result['week']} complete!")
+    st.caption(f"Saved as {result['artifact_id']}")
+
+    # --- Download Buttons ---
+    st.subheader("⬇️ Download Options")
+    col1, col2 = st.columns(2)
+
+    # JSON download
+    with col1:
+        st.download_button(
+            label=f"📥 Download as JSON",
+            data=json.dumps(content, indent=4, ensure_ascii=False),
+            file_name=f"Week_{result['week']}_content.json",
+            mime="application/json",
+            use_container_width=True
+        )
+
+    # DOCX download, rendered only when asked for
+    with col2:
+        lazy_download("as DOCX", f"week_docx_{inputs}", lambda: week_docx(result["week"], content),
+                      f"Week_{result['week']}_Content.docx", DOCX_MIME)
 else:
     st.info("Upload the curriculum file and set the parameters in the sidebar, then click 'Generate Weekly Content'.")
-
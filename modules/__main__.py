@@ -0,0 +1,35 @@
+"""
+Command-line entry point: python -m modules <command> [args]
+
+    batch       generate every course in a CSV/JSONL manifest (modules/batch.py)
+    pipeline    generate one course end to end, or "pipeline regenerate ..." (modules/pipeline.py)
+    export      export a generated course to Markdown/HTML/DOCX (modules/exporter.py)
+    jobs        job queue server/worker/client (modules/job_queue.py)
+    store       inspect stored artifacts (modules/artifact_store.py)
+    questions   course question bank and exam assembly (modules/question_bank.py)
+    benchmark   offline benchmarks against the mock backend (modules/benchmark.py)
+"""
+import sys
+import importlib
+
+COMMANDS = {
+    "batch": "modules.batch",
+    "pipeline": "modules.pipeline",
+    "export": "modules.exporter",
+    "jobs": "modules.job_queue",
+    "store": "modules.artifact_store",
+    "questions": "modules.question_bank",
+    "benchmark": "modules.benchmark",
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(__doc__.strip())
+        return 0 if argv and argv[0] in ("-h", "--help") else 2
+    return importlib.import_module(COMMANDS[argv[0]]).main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+Storage for everything the modules generate (objectives, curricula, weekly content).
+
+Artifacts are JSON documents saved under a versioned, content-hashed id:
+
+    objectives/web-development/v1-3f9a2c1b7d0e
+    week_content/web-development/w03/v2-8c41d2a9e6b5
+
+Saving the same content again returns the existing id; saving different
+content for the same course/week adds a new version, so runs never overwrite
+each other. Every artifact is recorded in a SQLite index (course, kind, week,
+version), which serves latest() and list() without scanning directories.
+
+Two backends share that index:
+    LocalFSStore   payloads as gzip-compressed compact JSON files, written atomically
+    SQLiteStore    payloads as BLOBs in the index database itself
+
+Selected with EDUPILOT_STORE=fs|sqlite (default fs) under EDUPILOT_STORE_DIR
+(default ~/.edupilot/artifacts). Set EDUPILOT_STORE_COMPRESS=0 to store plain
+compact JSON.
+
+    python -m modules.artifact_store list --course "Web Development"
+    python -m modules.artifact_store export week_content/web-development/w03/v2-8c41d2a9e6b5 week3.json
+"""
+import os
+import re
+import json
+import gzip
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+
+from modules.settings import get_settings
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".edupilot", "artifacts")
+
+ARTIFACT_ID_RE = re.compile(r"^[a-z_]+/[a-z0-9-]+/(?:w\d+/)?v\d+-[0-9a-f]{12}$")
+
+
+def course_key(course):
+    """
+    Normalized course name used in ids and the index ("Web Development" -> "web-development").
+    Names with characters the slug drops get a short hash of the name, so "C++ Programming"
+    and "C# Programming" stay apart ("c-programming-5d9380").
+    """
+    name = " ".join(str(course or "unknown").lower().split())
+    key = re.sub(r"[^a-z0-9]+", "-", name).strip("-") or "unknown"
+    if re.fullmatch(r"[a-z0-9 _-]*", name):
+        return key
+    return f"{key}-{hashlib.sha256(name.encode('utf-8')).hexdigest()[:6]}"
+
+
+def fingerprint(*parts):
+    """Short stable hash of JSON-serializable parts (prompts, params, upstream results)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def is_artifact_id(value):
+    return isinstance(value, str) and bool(ARTIFACT_ID_RE.match(value))
+
+
+def _encode(data):
+    """Compact JSON bytes: no indentation, sorted keys (stable content hashes)."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def _blob_key(content_hash, encoding):
+    return f"{content_hash}.json.gz" if encoding == "gzip" else f"{content_hash}.json"
+
+
+def deserialize(blob, encoding):
+    if encoding == "gzip":
+        blob = gzip.decompress(blob)
+    return json.loads(blob.decode("utf-8"))
+
+
+class ArtifactStore:
+    """
+    Base store: owns the SQLite index and the versioning rules. Subclasses decide
+    where payload bytes live by implementing _write_blob / _read_blob / _delete_blob.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, compress=True):
+        self.root = root
+        self.compress = compress
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.db_path = os.path.join(root, "artifacts.sqlite3")
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS artifacts (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                course_key TEXT NOT NULL,
+                course TEXT,
+                week INTEGER NOT NULL DEFAULT 0,
+                version INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                encoding TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                meta TEXT,
+                UNIQUE (course_key, kind, week, version)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_created ON artifacts(created)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_kind ON artifacts(kind, created)")
+        self._init_backend()
+
+    # --- Backend hooks ---
+    def _init_backend(self):
+        pass
+
+    def _write_blob(self, key, blob):
+        raise NotImplementedError
+
+    def _read_blob(self, key):
+        raise NotImplementedError
+
+    def _delete_blob(self, key):
+        raise NotImplementedError
+
+    # --- Public API ---
+    def put(self, kind, data, course=None, week=None, meta=None):
+        """Saves data and returns its artifact id; unchanged content keeps the latest version's id (meta is updated)."""
+        raw = _encode(data)
+        content_hash = hashlib.sha256(raw).hexdigest()
+        encoding = "gzip" if self.compress else "identity"
+        blob = gzip.compress(raw, compresslevel=6, mtime=0) if self.compress else raw
+        key, week = course_key(course), int(week or 0)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                latest = self._conn.execute(
+                    "SELECT id, version, content_hash FROM artifacts WHERE course_key = ? AND kind = ? AND week = ? "
+                    "ORDER BY version DESC LIMIT 1",
+                    (key, kind, week),
+                ).fetchone()
+                if latest and latest[2] == content_hash:
+                    if meta:
+                        # Same output from new inputs: record the new input hashes on the existing version
+                        self._conn.execute("UPDATE artifacts SET meta = ? WHERE id = ?", (json.dumps(meta), latest[0]))
+                    self._conn.execute("COMMIT")
+                    return latest[0]
+                version = latest[1] + 1 if latest else 1
+                artifact_id = f"{kind}/{key}/" + (f"w{week:02d}/" if week else "") + f"v{version}-{content_hash[:12]}"
+                self._write_blob(_blob_key(content_hash, encoding), blob)
+                self._conn.execute(
+                    "INSERT INTO artifacts (id, kind, course_key, course, week, version, content_hash, encoding, size, created, meta) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (artifact_id, kind, key, course, week, version, content_hash, encoding, len(blob), time.time(),
+                     json.dumps(meta) if meta else None),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return artifact_id
+
+    def get(self, artifact_id):
+        """Returns the stored data; raises KeyError for an unknown id."""
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash, encoding FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+            if row is None:
+                raise KeyError(artifact_id)
+            blob = self._read_blob(_blob_key(row[0], row[1]))
+        return deserialize(blob, row[1])
+
+    def info(self, artifact_id):
+        rows = self._select("WHERE id = ?", (artifact_id,))
+        return rows[0] if rows else None
+
+    def latest(self, kind, course, week=None):
+        """Id of the newest version of kind for course (and week), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM artifacts WHERE course_key = ? AND kind = ? AND week = ? ORDER BY version DESC LIMIT 1",
+                (course_key(course), kind, int(week or 0)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def list(self, kind=None, course=None, week=None, limit=100):
+        """Index rows (newest first) filtered by kind/course/week."""
+        clauses, args = [], []
+        if course is not None:
+            clauses.append("course_key = ?")
+            args.append(course_key(course))
+        if kind is not None:
+            clauses.append("kind = ?")
+            args.append(kind)
+        if week is not None:
+            clauses.append("week = ?")
+            args.append(int(week))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._select(f"{where} ORDER BY created DESC LIMIT ?", (*args, limit))
+
+    def courses(self):
+        """[(course_key, course name, artifact count)]"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT course_key, MAX(course), COUNT(*) FROM artifacts GROUP BY course_key ORDER BY course_key"
+            ).fetchall()
+
+    def delete(self, artifact_id):
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash, encoding FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM artifacts WHERE id = ?", (artifact_id,))
+            shared = self._conn.execute(
+                "SELECT 1 FROM artifacts WHERE content_hash = ? AND encoding = ? LIMIT 1", row
+            ).fetchone()
+            if not shared:
+                self._delete_blob(_blob_key(*row))
+
+    def _select(self, tail, args):
+        columns = ["id", "kind", "course_key", "course", "week", "version", "content_hash", "encoding", "size", "created", "meta"]
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(columns)} FROM artifacts {tail}", args).fetchall()
+        items = [dict(zip(columns, row)) for row in rows]
+        for item in items:
+            item["meta"] = json.loads(item["meta"]) if item["meta"] else None
+        return items
+
+
+class LocalFSStore(ArtifactStore):
+    """Payloads as files under <root>/objects/<hash[:2]>/<hash>.json[.gz], written via temp file + rename."""
+
+    def _blob_path(self, key):
+        return os.path.join(self.root, "objects", key[:2], key)
+
+    def _write_blob(self, key, blob):
+        path = self._blob_path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _read_blob(self, key):
+        with open(self._blob_path(key), "rb") as f:
+            return f.read()
+
+    def _delete_blob(self, key):
+        try:
+            os.remove(self._blob_path(key))
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteStore(ArtifactStore):
+    """Payloads in a blobs table of the index database; one transaction covers payload and index row."""
+
+    def _init_backend(self):
+        self._conn.execute("CREATE TABLE IF NOT EXISTS blobs (key TEXT PRIMARY KEY, data BLOB NOT NULL)")
+
+    def _write_blob(self, key, blob):
+        self._conn.execute("INSERT OR IGNORE INTO blobs (key, data) VALUES (?, ?)", (key, blob))
+
+    def _read_blob(self, key):
+        return self._conn.execute("SELECT data FROM blobs WHERE key = ?", (key,)).fetchone()[0]
+
+    def _delete_blob(self, key):
+        self._conn.execute("DELETE FROM blobs WHERE key = ?", (key,))
+
+
+BACKENDS = {
+    "fs": LocalFSStore,
+    "sqlite": SQLiteStore,
+}
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store():
+    """Returns the process-wide store, created on first use from EDUPILOT_STORE* settings."""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                settings = get_settings()
+                backend = settings.store_backend
+                if backend not in BACKENDS:
+                    raise ValueError(f"Unknown EDUPILOT_STORE backend: {backend} (expected one of {sorted(BACKENDS)})")
+                _default_store = BACKENDS[backend](
+                    root=settings.store_dir,
+                    compress=settings.store_compress,
+                )
+    return _default_store
+
+
+def load_json(ref):
+    """Loads an artifact id from the store, or a JSON file path (e.g. an uploaded or exported file)."""
+    if is_artifact_id(ref):
+        return get_store().get(ref)
+    opener = gzip.open if ref.endswith(".gz") else open
+    with opener(ref, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and export EduPilot artifacts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    list_cmd = sub.add_parser("list", help="list artifacts (newest first)")
+    list_cmd.add_argument("--course")
+    list_cmd.add_argument("--kind")
+    list_cmd.add_argument("--week", type=int)
+    list_cmd.add_argument("--limit", type=int, default=50)
+    sub.add_parser("courses", help="list courses with stored artifacts")
+    show_cmd = sub.add_parser("show", help="print an artifact as JSON")
+    show_cmd.add_argument("artifact_id")
+    export_cmd = sub.add_parser("export", help="write an artifact to a JSON file")
+    export_cmd.add_argument("artifact_id")
+    export_cmd.add_argument("path")
+    args = parser.parse_args(argv)
+
+    store = get_store()
+    if args.command == "list":
+        for row in store.list(args.kind, args.course, args.week, args.limit):
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["created"]))
+            print(f"{row['id']:<60}{created:>18}{row['size']:>10} B")
+    elif args.command == "courses":
+        for key, name, count in store.courses():
+            print(f"{key:<40}{name or '':<40}{count:>6}")
+    elif args.command == "show":
+        print(json.dumps(store.get(args.artifact_id), indent=4, ensure_ascii=False))
+    elif args.command == "export":
+        with open(args.path, "w", encoding="utf-8") as f:
+            json.dump(store.get(args.artifact_id), f, indent=4, ensure_ascii=False)
+        print(f"✅ Exported {args.artifact_id} to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,268 @@
+"""
+Bulk course generation from a manifest (CSV or JSONL, one course per row).
+
+    python -m modules batch catalogue.csv --concurrency 4 --export docx
+    python -m modules.batch catalogue.jsonl --output-dir out/
+
+Columns / keys (only topic is required):
+    id, topic, level, credit_hours, weeks, approach, assessments, complexity, multimedia
+assessments and multimedia are lists in JSONL, or ";"-separated in CSV.
+
+Each row runs the full pipeline (modules/pipeline.py) in its own checkpointed
+run directory under OUTPUT_DIR/runs. At most --concurrency courses run at once
+and they share one set of per-provider limits (<PROVIDER>_MAX_CONCURRENCY), on
+top of the RPM/TPM guards. Every finished row is appended to
+OUTPUT_DIR/results.jsonl straight away; rerunning the same command skips rows
+already marked ok there and resumes the rest from their checkpoints.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import asyncio
+import argparse
+
+from modules.llm_errors import IncompleteGenerationError
+from modules.module3_content_generator import make_provider_limits
+from modules.pipeline import course_params, run_id_for, run_course
+
+DEFAULT_CONCURRENCY = 4
+LIST_FIELDS = ("assessments", "multimedia")
+INT_FIELDS = ("credit_hours", "weeks")
+
+
+# --- Manifest ---
+def _manifest_format(path):
+    return "csv" if path.lower().endswith((".csv", ".tsv")) else "jsonl"
+
+
+def _parse_jsonl_row(line):
+    """(row dict, None), or (None, error message) for a line that is not a JSON object."""
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return None, f"invalid JSON: {e}"
+    if not isinstance(row, dict):
+        return None, f"expected a JSON object, got {type(row).__name__}"
+    return row, None
+
+
+def read_manifest(path):
+    """
+    Yields (row_number, row dict, error) lazily; blank lines and '#' comments in JSONL
+    are skipped. A malformed JSONL line comes back as (row_number, None, error message)
+    so it can be recorded as failed without stopping the batch.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if _manifest_format(path) == "csv":
+            reader = csv.DictReader(f, delimiter="\t" if path.lower().endswith(".tsv") else ",")
+            for number, row in enumerate(reader, 1):
+                yield number, {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}, None
+        else:
+            number = 0
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                number += 1
+                yield (number, *_parse_jsonl_row(line))
+
+
+def count_rows(path):
+    return sum(1 for _ in read_manifest(path))
+
+
+def row_params(row):
+    """Manifest row -> pipeline params; raises ValueError for an unusable row."""
+    topic = str(row.get("topic") or "").strip()
+    if not topic:
+        raise ValueError("missing topic")
+    values = {}
+    for field in LIST_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = [item.strip() for item in value.split(";") if item.strip()]
+        if value:
+            values[field] = value
+    for field in INT_FIELDS:
+        if row.get(field) not in (None, ""):
+            values[field] = int(row[field])
+    for field in ("level", "approach", "complexity"):
+        if row.get(field):
+            values[field] = str(row[field]).strip()
+    return course_params(
+        topic,
+        level=values.get("level", "Undergraduate_Basic"),
+        credit_hours=values.get("credit_hours", 3),
+        weeks=values.get("weeks", 15),
+        approach=values.get("approach", "Project-based"),
+        assessments=values.get("assessments", ["Quizzes", "Projects", "Exams"]),
+        complexity=values.get("complexity", "Intermediate"),
+        multimedia_prefs=values.get("multimedia"),
+    )
+
+
+def row_key(row, params):
+    """Stable key used for resume: the row's id if given, else the pipeline run id."""
+    return str(row.get("id") or run_id_for(params))
+
+
+# --- Results log ---
+def load_finished(results_path):
+    """Keys of rows already completed successfully."""
+    finished = set()
+    if not os.path.exists(results_path):
+        return finished
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            if record.get("status") == "ok":
+                finished.add(record["key"])
+    return finished
+
+
+class ResultsLog:
+    def __init__(self, path):
+        self._f = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self):
+        self._f.close()
+
+
+class Progress:
+    def __init__(self, total, already_done):
+        self.total = total
+        self.done = already_done
+        self.session_done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def eta(self):
+        remaining = self.total - self.done
+        if not self.session_done or remaining <= 0:
+            return None
+        return (time.perf_counter() - self.started) / self.session_done * remaining
+
+    def update(self, ok):
+        self.done += 1
+        self.session_done += 1
+        self.failed += 0 if ok else 1
+
+    def line(self):
+        eta = self.eta()
+        eta_text = "-" if eta is None else time.strftime("%H:%M:%S", time.gmtime(eta))
+        return f"[{self.done}/{self.total}] {self.done / max(1, self.total) * 100:.0f}% done, {self.failed} failed, ETA {eta_text}"
+
+
+# --- Runner ---
+async def run_batch(manifest_path, output_dir, concurrency=DEFAULT_CONCURRENCY, use_cache=True, export_format=None):
+    """Runs every manifest row not yet finished; returns a summary dict."""
+    os.makedirs(os.path.join(output_dir, "runs"), exist_ok=True)
+    results_path = os.path.join(output_dir, "results.jsonl")
+    finished = load_finished(results_path)
+    total = count_rows(manifest_path)
+    progress = Progress(total, 0)
+    log = ResultsLog(results_path)
+    limits = make_provider_limits()
+    rows = read_manifest(manifest_path)
+    skipped = 0
+    claimed = set()
+
+    print(f"Batch: {total} course(s) in {manifest_path}, {len(finished)} already done, concurrency {concurrency}")
+
+    async def run_row(number, row, error=None):
+        started = time.perf_counter()
+        record = {"row": number, "key": None, "topic": row.get("topic") if row else None, "status": "failed"}
+        try:
+            if error:
+                raise ValueError(error)
+            params = row_params(row)
+            record["key"] = key = row_key(row, params)
+            run_dir = os.path.join(output_dir, "runs", key)
+            record["run_dir"] = run_dir
+            course = await run_course(params, run_dir, use_cache=use_cache, limits=limits, verbose=False)
+            record.update(objectives_id=course["objectives_id"], curriculum_id=course["curriculum_id"],
+                          week_ids=course["week_ids"])
+            if export_format:
+                from modules.exporter import export_course
+
+                os.makedirs(os.path.join(output_dir, "exports"), exist_ok=True)
+                record["export"] = await asyncio.to_thread(
+                    export_course, os.path.join(output_dir, "exports", f"{key}.{export_format}"), export_format,
+                    objectives_id=course["objectives_id"], curriculum_id=course["curriculum_id"], week_ids=course["week_ids"]
+                )
+            record["status"] = "ok"
+        except IncompleteGenerationError as e:
+            record["error"] = str(e)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["elapsed_s"] = round(time.perf_counter() - started, 2)
+        log.write(record)
+        progress.update(record["status"] == "ok")
+        mark = "✅" if record["status"] == "ok" else "❌"
+        detail = f"({record['elapsed_s']:.1f}s)" if record["status"] == "ok" else record.get("error", "")
+        print(f"{progress.line()} {mark} {record['topic']} {detail}")
+
+    async def worker():
+        nonlocal skipped
+        for number, row, error in rows:  # shared generator: each row goes to exactly one worker
+            try:
+                key = None if error else row_key(row, row_params(row))
+            except (ValueError, TypeError):
+                key = None  # recorded as failed by run_row
+            if key in finished or key in claimed:
+                if key in claimed:
+                    print(f"⚠️ Row {number}: duplicate of an earlier row ({key}); skipped.")
+                skipped += 1
+                progress.done += 1
+                continue
+            if key:
+                claimed.add(key)
+            await run_row(number, row, error)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    finally:
+        log.close()
+
+    summary = {"total": total, "skipped": skipped, "completed": progress.session_done - progress.failed,
+               "failed": progress.failed, "results": results_path,
+               "wall_s": round(time.perf_counter() - progress.started, 1)}
+    print(f"Batch finished: {summary['completed']} ok, {summary['failed']} failed, {skipped} skipped "
+          f"in {summary['wall_s']:.0f}s. Results: {results_path}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m modules batch",
+                                     description="Generate every course in a CSV/JSONL manifest (resumable).")
+    parser.add_argument("manifest")
+    parser.add_argument("--output-dir", default=None, help="default: <manifest name>_batch next to the manifest")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="courses generated at once")
+    parser.add_argument("--export", choices=["md", "html", "docx"], default=None, help="also export each finished course")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or os.path.splitext(args.manifest)[0] + "_batch"
+    try:
+        summary = asyncio.run(run_batch(args.manifest, output_dir, args.concurrency, not args.no_cache, args.export))
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 2
+    if summary["failed"]:
+        print("Rerun the same command to retry the failed rows.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
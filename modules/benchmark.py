@@ -0,0 +1,406 @@
+"""
+Offline benchmarks for the generation paths, run against the mock LLM backend
+(modules/mock_llm.py): no network, no API keys, deterministic latencies.
+
+    python -m modules.benchmark                          # all scenarios, 15 weeks
+    python -m modules.benchmark --output bench.json      # save results
+    python -m modules.benchmark --baseline bench.json    # exit 1 if >25% slower
+
+Scenarios:
+    week         sequential generate_course_content per week -> p50/p95 week latency
+    semester     generate_semester_content for every week -> wall time, calls/s
+    scaling      the semester run at several <PROVIDER>_MAX_CONCURRENCY values
+    pipeline     run_pipeline end to end, with tracemalloc peak memory
+    hedging      per-week p50/p95/p99 with a degraded primary provider, hedging off vs on
+    imports      cold import time of each entry module in a fresh interpreter; fails if one
+                 exceeds IMPORT_BUDGET_S or loads a provider SDK, NumPy, python-docx, httpx or Streamlit
+
+Everything is written to a temporary directory; the response cache is bypassed
+so every call reaches the mock.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+# Mock settings for benchmarks: fast enough that the suite runs in seconds, with
+# enough spread that scheduling problems show up in the wall times.
+BENCH_MOCK_CONFIG = {
+    "latency": {"distribution": "lognormal", "median_s": 0.05, "sigma": 0.3},
+    "tokens_per_second": 20000,
+    "output_tokens": 600,
+}
+
+# Heavy-tailed primary provider for the hedging scenario (p99 ~ 16x the median)
+DEGRADED_PROVIDER = {"gemini": {"latency": {"distribution": "lognormal", "median_s": 0.05, "sigma": 1.2}}}
+BENCH_HEDGE_POLICY = {"enabled": True, "delay_s": 0.15}
+BENCH_HEDGE_BUDGET = 0.25
+BENCH_LINK_LATENCY_S = 0.05  # per link check, uncached
+
+# Entry modules that must import quickly: heavy dependencies load on first use only
+IMPORT_TARGETS = [
+    "modules.llm_client",
+    "modules.module1_learning_objective_setter",
+    "modules.module2_curriculum_structurer",
+    "modules.module3_content_generator",
+    "modules.pipeline",
+    "modules.exporter",
+    "modules.job_queue",
+    "modules.batch",
+    "modules.question_bank",
+    "modules.ui",  # app.py / app2.py / app3.py startup, after streamlit itself
+]
+HEAVY_IMPORTS = ["google.generativeai", "groq", "numpy", "docx", "streamlit", "sentence_transformers", "httpx"]
+# Heavy imports a target is expected to load (the Streamlit helpers need streamlit)
+IMPORT_ALLOWED = {"modules.ui": ["streamlit"]}
+# Top-level packages from requirements.txt; only these may be missing here without failing the check
+THIRD_PARTY_PACKAGES = ["streamlit", "requests", "openai", "dotenv", "google", "groq", "docx", "numpy",
+                        "sentence_transformers", "httpx"]
+IMPORT_BUDGET_S = 0.5
+IMPORT_RUNS = 3
+_IMPORT_PROBE = """
+import sys, json, time, importlib
+target, heavy, third_party = sys.argv[1], json.loads(sys.argv[2]), json.loads(sys.argv[3])
+started = time.perf_counter()
+try:
+    importlib.import_module(target)
+except ModuleNotFoundError as e:
+    key = "skipped" if (e.name or "").split(".")[0] in third_party else "error"
+    print(json.dumps({key: f"{type(e).__name__}: {e}"}))
+    sys.exit(0)
+except Exception as e:
+    print(json.dumps({"error": f"{type(e).__name__}: {e}"}))
+    sys.exit(0)
+elapsed = time.perf_counter() - started
+print(json.dumps({"import_s": elapsed, "heavy": [name for name in heavy if name in sys.modules]}))
+"""
+
+SCENARIOS = ["week", "semester", "scaling", "pipeline", "hedging", "imports"]
+DEFAULT_CONCURRENCY_LEVELS = [1, 2, 4, 8, 16]
+
+
+def _sandbox(root, provider_limits=False):
+    """Points the cache, telemetry and artifact store at root; must run before any LLM call."""
+    os.environ["EDUPILOT_CACHE_DIR"] = os.path.join(root, "cache")
+    os.environ["EDUPILOT_TELEMETRY_FILE"] = os.path.join(root, "telemetry", "spans.jsonl")
+    if not provider_limits:
+        for provider in ("GEMINI", "GROQ"):
+            os.environ[f"{provider}_RPM"] = "1000000"
+            os.environ[f"{provider}_TPM"] = "1000000000"
+
+    os.environ["EDUPILOT_STORE_DIR"] = os.path.join(root, "artifacts")
+    # Link checks are opt-in; benchmarks measure them against the stub installed by _install_mocks
+    os.environ.setdefault("EDUPILOT_LINK_CHECK", "flag")
+    from modules.settings import reload_settings
+    reload_settings()
+
+
+def _install_mocks(config, per_provider=None):
+    """Fresh mocks per scenario, so every scenario sees the same latency draws; links are checked against a stub."""
+    from modules import mock_llm, link_checker
+    link_checker.install(link_checker.LinkChecker(transport=link_checker.stub_transport(latency_s=BENCH_LINK_LATENCY_S)))
+    return mock_llm.install(config, per_provider=per_provider)
+
+
+def _calls(mocks):
+    return sum(mock.calls for mock in mocks.values())
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+async def _make_curriculum(weeks, topic="Benchmark Course"):
+    from modules.module1_learning_objective_setter import generate_learning_objectives_async
+    from modules.module2_curriculum_structurer import generate_curriculum_async
+
+    objectives, _ = await generate_learning_objectives_async(topic, "Graduate", 3, use_cache=False)
+    _, path = await generate_curriculum_async(objectives, weeks, use_cache=False, course_name=topic)
+    if not path:
+        raise RuntimeError("Curriculum generation failed against the mock backend.")
+    return path
+
+
+# --- Scenarios ---
+async def bench_week(curriculum_path, weeks, config):
+    from modules.module3_content_generator import generate_course_content
+
+    mocks = _install_mocks(config)
+    latencies = []
+    for week in range(1, weeks + 1):
+        started = time.perf_counter()
+        await generate_course_content(curriculum_path, week, use_cache=False)
+        latencies.append(time.perf_counter() - started)
+    return {
+        "weeks": weeks,
+        "calls": _calls(mocks),
+        "p50_week_s": round(_percentile(latencies, 50), 4),
+        "p95_week_s": round(_percentile(latencies, 95), 4),
+        "max_week_s": round(max(latencies), 4),
+    }
+
+
+async def _semester_run(curriculum_path, weeks, config):
+    from modules.module3_content_generator import generate_semester_content
+
+    mocks = _install_mocks(config)
+    started = time.perf_counter()
+    await generate_semester_content(curriculum_path, range(1, weeks + 1), resume=False, use_cache=False)
+    wall = time.perf_counter() - started
+    return {"weeks": weeks, "calls": _calls(mocks), "wall_s": round(wall, 4), "calls_per_s": round(_calls(mocks) / wall, 2)}
+
+
+async def bench_semester(curriculum_path, weeks, config):
+    return await _semester_run(curriculum_path, weeks, config)
+
+
+async def bench_scaling(curriculum_path, weeks, config, levels=DEFAULT_CONCURRENCY_LEVELS):
+    saved = {name: os.environ.get(name) for name in ("GEMINI_MAX_CONCURRENCY", "GROQ_MAX_CONCURRENCY")}
+    rows = []
+    try:
+        for level in levels:
+            for name in saved:
+                os.environ[name] = str(level)
+            rows.append(dict(await _semester_run(curriculum_path, weeks, config), concurrency=level))
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    base = rows[0]["wall_s"]
+    for row in rows:
+        row["speedup"] = round(base / row["wall_s"], 2)
+    return {"levels": rows}
+
+
+async def bench_pipeline(root, weeks, config):
+    from modules.pipeline import run_pipeline
+
+    mocks = _install_mocks(config)
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        await run_pipeline("Benchmark Pipeline", weeks=weeks, run_dir=os.path.join(root, "runs", f"bench-{time.time_ns()}"),
+                           use_cache=False)
+        wall = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"weeks": weeks, "calls": _calls(mocks), "wall_s": round(wall, 4), "peak_memory_mb": round(peak / 2**20, 2)}
+
+
+async def bench_hedging(curriculum_path, weeks, config, rounds=4):
+    from modules import hedging
+    from modules.module3_content_generator import SECTIONS, generate_course_content
+
+    rows = {}
+    for mode in ("off", "on"):
+        mocks = _install_mocks(config, DEGRADED_PROVIDER)
+        hedger = None
+        if mode == "on":
+            policies = {task: {**hedging.POLICY_DEFAULTS, **BENCH_HEDGE_POLICY} for task in SECTIONS}
+            hedger = hedging.Hedger(policies=policies, budget=hedging.HedgeBudget(ratio=BENCH_HEDGE_BUDGET))
+        hedging.install(hedger)
+        latencies = []
+        try:
+            for _ in range(rounds):
+                for week in range(1, weeks + 1):
+                    started = time.perf_counter()
+                    await generate_course_content(curriculum_path, week, use_cache=False)
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            hedging.install(None)
+        rows[mode] = {
+            "weeks": len(latencies),
+            "calls": _calls(mocks),
+            "p50_week_s": round(_percentile(latencies, 50), 4),
+            "p95_week_s": round(_percentile(latencies, 95), 4),
+            "p99_week_s": round(_percentile(latencies, 99), 4),
+            "hedges": hedger.stats["hedges"] if hedger else 0,
+            "hedge_wins": hedger.stats["hedge_wins"] if hedger else 0,
+        }
+    return rows
+
+
+def bench_imports(targets=IMPORT_TARGETS, runs=IMPORT_RUNS):
+    """Best-of-runs import time per module, each in a fresh interpreter (no warm sys.modules)."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    rows = []
+    for target in targets:
+        row = {"module": target}
+        for _ in range(runs):
+            heavy = [name for name in HEAVY_IMPORTS if name not in IMPORT_ALLOWED.get(target, [])]
+            out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE, target, json.dumps(heavy),
+                                  json.dumps(THIRD_PARTY_PACKAGES)],
+                                 capture_output=True, text=True, cwd=root, env=env, check=True)
+            probe = json.loads(out.stdout.strip().splitlines()[-1])
+            if "skipped" in probe or "error" in probe:
+                # skipped: a third-party package is not installed here; error: the module itself is broken
+                row.update(probe)
+                break
+            row["import_s"] = round(min(row.get("import_s", probe["import_s"]), probe["import_s"]), 4)
+            row["heavy"] = probe["heavy"]
+        rows.append(row)
+    timed = [row["import_s"] for row in rows if "import_s" in row]
+    return {"budget_s": IMPORT_BUDGET_S, "max_import_s": max(timed) if timed else None, "modules": rows}
+
+
+def import_problems(results):
+    """Modules over the import budget or loading heavy dependencies at import time."""
+    problems = []
+    for row in results.get("imports", {}).get("modules", []):
+        if "error" in row:
+            problems.append(f"{row['module']}: import failed ({row['error']})")
+        if row.get("import_s", 0) > IMPORT_BUDGET_S:
+            problems.append(f"{row['module']}: import took {row['import_s']:.3f}s (budget {IMPORT_BUDGET_S}s)")
+        if row.get("heavy"):
+            problems.append(f"{row['module']}: imports {', '.join(row['heavy'])} at import time")
+    return problems
+
+
+async def run_benchmarks(root, weeks=15, scenarios=SCENARIOS, config=None, levels=DEFAULT_CONCURRENCY_LEVELS):
+    config = config if config is not None else BENCH_MOCK_CONFIG
+    results = {}
+    if "imports" in scenarios:
+        # First, before this process has imported anything else worth measuring
+        results["imports"] = await asyncio.to_thread(bench_imports)
+    if not set(scenarios) - {"imports"}:
+        return results
+    _install_mocks(config)
+    curriculum_path = await _make_curriculum(weeks)
+    if "week" in scenarios:
+        results["week"] = await bench_week(curriculum_path, weeks, config)
+    if "semester" in scenarios:
+        results["semester"] = await bench_semester(curriculum_path, weeks, config)
+    if "scaling" in scenarios:
+        results["scaling"] = await bench_scaling(curriculum_path, weeks, config, levels)
+    if "pipeline" in scenarios:
+        results["pipeline"] = await bench_pipeline(root, weeks, config)
+    if "hedging" in scenarios:
+        results["hedging"] = await bench_hedging(curriculum_path, weeks, config)
+    return results
+
+
+# --- Reporting and regression check ---
+# (scenario, metric) pairs compared against a baseline; higher is worse for all of them
+TRACKED_METRICS = [
+    ("week", "p50_week_s"),
+    ("week", "p95_week_s"),
+    ("semester", "wall_s"),
+    ("pipeline", "wall_s"),
+    ("pipeline", "peak_memory_mb"),
+    ("imports", "max_import_s"),
+]
+TRACKED_HEDGING_METRICS = ["p95_week_s", "p99_week_s"]
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Returns a list of regression messages (empty when within tolerance)."""
+    regressions = []
+    for scenario, metric in TRACKED_METRICS:
+        old = baseline.get(scenario, {}).get(metric)
+        new = results.get(scenario, {}).get(metric)
+        if old and new is not None and new > old * (1 + tolerance):
+            regressions.append(f"{scenario}.{metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    for metric in TRACKED_HEDGING_METRICS:
+        old = baseline.get("hedging", {}).get("on", {}).get(metric)
+        new = results.get("hedging", {}).get("on", {}).get(metric)
+        if old and new is not None and new > old * (1 + tolerance):
+            regressions.append(f"hedging.on.{metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    old_levels = {row["concurrency"]: row for row in baseline.get("scaling", {}).get("levels", [])}
+    for row in results.get("scaling", {}).get("levels", []):
+        old = old_levels.get(row["concurrency"])
+        if old and row["wall_s"] > old["wall_s"] * (1 + tolerance):
+            regressions.append(f"scaling[{row['concurrency']}].wall_s: {old['wall_s']} -> {row['wall_s']}")
+    return regressions
+
+
+def format_results(results):
+    lines = []
+    if "week" in results:
+        r = results["week"]
+        lines.append(f"week      {r['weeks']} weeks sequential: p50 {r['p50_week_s']:.3f}s  p95 {r['p95_week_s']:.3f}s  max {r['max_week_s']:.3f}s")
+    if "semester" in results:
+        r = results["semester"]
+        lines.append(f"semester  {r['weeks']} weeks: {r['wall_s']:.3f}s wall, {r['calls']} calls, {r['calls_per_s']:.1f} calls/s")
+    if "scaling" in results:
+        lines.append("scaling   concurrency  wall s  calls/s  speedup")
+        for row in results["scaling"]["levels"]:
+            lines.append(f"          {row['concurrency']:>11}  {row['wall_s']:>6.3f}  {row['calls_per_s']:>7.1f}  {row['speedup']:>6.2f}x")
+    if "pipeline" in results:
+        r = results["pipeline"]
+        lines.append(f"pipeline  {r['weeks']} weeks: {r['wall_s']:.3f}s wall, {r['calls']} calls, peak memory {r['peak_memory_mb']:.1f} MB")
+    if "hedging" in results:
+        lines.append("hedging   mode  p50 s   p95 s   p99 s  calls  hedges  wins")
+        for mode, r in results["hedging"].items():
+            lines.append(f"          {mode:>4}  {r['p50_week_s']:.3f}  {r['p95_week_s']:.3f}  {r['p99_week_s']:.3f}"
+                         f"  {r['calls']:>5}  {r['hedges']:>6}  {r['hedge_wins']:>4}")
+    if "imports" in results:
+        lines.append(f"imports   module                                   import s  (budget {results['imports']['budget_s']}s)")
+        for row in results["imports"]["modules"]:
+            if "skipped" in row:
+                lines.append(f"          {row['module']:<40} skipped ({row['skipped']})")
+            elif "error" in row:
+                lines.append(f"          {row['module']:<40} FAILED ({row['error']})")
+            else:
+                heavy = f"  loads {', '.join(row['heavy'])}" if row["heavy"] else ""
+                lines.append(f"          {row['module']:<40} {row['import_s']:>8.3f}{heavy}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline EduPilot benchmarks against the mock LLM backend.")
+    parser.add_argument("--weeks", type=int, default=15)
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY_LEVELS,
+                        help="MAX_CONCURRENCY levels for the scaling scenario")
+    parser.add_argument("--mock-config", default=None, help="mock settings as inline JSON or a JSON file (merged over the benchmark defaults)")
+    parser.add_argument("--provider-limits", action="store_true", help="keep the real RPM/TPM limits instead of lifting them")
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--baseline", default=None, help="compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs. baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    from modules import mock_llm
+    config = mock_llm.merge_config(BENCH_MOCK_CONFIG, mock_llm.load_config(args.mock_config))
+
+    with tempfile.TemporaryDirectory(prefix="edupilot-bench-") as root:
+        _sandbox(root, provider_limits=args.provider_limits)
+        results = asyncio.run(run_benchmarks(root, args.weeks, args.scenarios, config, args.concurrency))
+    results["config"] = {"weeks": args.weeks, "mock": config}
+
+    print()
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    problems = import_problems(results)
+    if problems:
+        print("❌ Slow imports:")
+        for line in problems:
+            print(f"   {line}")
+        return 1
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Performance regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ Within tolerance of baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Turns module2's free-text curriculum into a structured week index.
+
+    {"parser_version": 1,
+     "modules": [{"number": 1, "title": "...", "header": "Module 1: ...", "weeks_range": [1, 4],
+                  "body": "...", "weeks": [{"number": 1, "title": "...", "topics": "...",
+                                            "activities": "...", "assessment": "...", "text": "..."}]}]}
+
+module2 stores this next to curriculum_text so it is parsed once; module3 sends
+only the target week's slice plus a compact outline instead of the whole text.
+"""
+import re
+from functools import lru_cache
+
+PARSER_VERSION = 1
+
+MODULE_RE = re.compile(r"^\s*\*\*\s*(Module\s+(\d+)\s*[:.\-–]?\s*(.*?))\s*\*\*\s*:?\s*$", re.IGNORECASE | re.MULTILINE)
+WEEK_RE = re.compile(r"^\s*(?:\d+\.\s*)?\*\*\s*Week\s+(\d+)\s*[:.\-–]?\s*(.*?)\s*\*\*\s*:?\s*$", re.IGNORECASE | re.MULTILINE)
+WEEKS_RANGE_RE = re.compile(r"Weeks?\s*:?\s*(\d+)\s*(?:[-–]|to)\s*(\d+)", re.IGNORECASE)
+FIELD_RE = re.compile(r"^\s*[*\-•]+\s*(?:\*\*)?\s*(Topics?|Activities|Activity|Assessments?)\s*(?:\*\*)?\s*:\s*(?:\*\*)?\s*(.*)$", re.IGNORECASE)
+
+FIELD_NAMES = {"topic": "topics", "topics": "topics", "activity": "activities", "activities": "activities",
+               "assessment": "assessment", "assessments": "assessment"}
+
+
+def _parse_week(number, title, text):
+    week = {"number": number, "title": title.strip(), "topics": "", "activities": "", "assessment": "", "text": text.strip()}
+    current = None
+    for line in text.splitlines()[1:]:
+        match = FIELD_RE.match(line)
+        if match:
+            current = FIELD_NAMES[match.group(1).lower()]
+            week[current] = match.group(2).strip()
+        elif current and line.strip():
+            week[current] = f"{week[current]} {line.strip()}".strip()
+    return week
+
+
+def _parse_module(number, title, header, body):
+    weeks_range = None
+    week_matches = list(WEEK_RE.finditer(body))
+    intro = body[:week_matches[0].start()] if week_matches else body
+    range_match = WEEKS_RANGE_RE.search(intro)
+    if range_match:
+        weeks_range = [int(range_match.group(1)), int(range_match.group(2))]
+
+    weeks = []
+    for i, match in enumerate(week_matches):
+        end = week_matches[i + 1].start() if i + 1 < len(week_matches) else len(body)
+        weeks.append(_parse_week(int(match.group(1)), match.group(2), body[match.start():end]))
+    if weeks and not weeks_range:
+        weeks_range = [weeks[0]["number"], weeks[-1]["number"]]
+
+    return {"number": number, "title": title.strip(), "header": header.strip(), "weeks_range": weeks_range,
+            "body": body.strip(), "weeks": weeks}
+
+
+@lru_cache(maxsize=64)
+def parse_curriculum(curriculum_text):
+    """Parses curriculum_text into modules -> weeks -> topics/activities/assessment (memoized; do not mutate)."""
+    module_matches = list(MODULE_RE.finditer(curriculum_text))
+    modules = []
+    for i, match in enumerate(module_matches):
+        end = module_matches[i + 1].start() if i + 1 < len(module_matches) else len(curriculum_text)
+        modules.append(_parse_module(int(match.group(2)), match.group(3), match.group(1), curriculum_text[match.end():end]))
+
+    preamble = curriculum_text[:module_matches[0].start()] if module_matches else curriculum_text
+    if not module_matches and WEEK_RE.search(curriculum_text):
+        # No module headers: keep the weeks under a single unnamed module
+        modules.append(_parse_module(1, "", "Curriculum", curriculum_text))
+        preamble = ""
+
+    return {"parser_version": PARSER_VERSION, "preamble": preamble.strip(), "modules": modules}
+
+
+def get_structure(curriculum_data):
+    """Stored structure from a module2 JSON dict, re-parsed if missing or from an older parser."""
+    structure = curriculum_data.get("curriculum_structure")
+    if not structure or structure.get("parser_version") != PARSER_VERSION:
+        structure = parse_curriculum(curriculum_data.get("curriculum_text", ""))
+    return structure
+
+
+def find_week(structure, week_number):
+    """Returns (module, week) for week_number, or (None, None) if the week was not found."""
+    for module in structure.get("modules", []):
+        for week in module["weeks"]:
+            if week["number"] == week_number:
+                return module, week
+    return None, None
+
+
+def course_outline(structure):
+    """Compact outline: one line per module and per week title."""
+    lines = []
+    for module in structure.get("modules", []):
+        span = f" (Weeks {module['weeks_range'][0]}-{module['weeks_range'][1]})" if module["weeks_range"] else ""
+        lines.append(f"{module['header']}{span}")
+        lines.extend(f"  Week {week['number']}: {week['title']}" for week in module["weeks"])
+    return "\n".join(lines)
+
+
+def split_modules(curriculum_text):
+    """[(header, body)] per module for display/export; falls back to one block if nothing parses."""
+    structure = parse_curriculum(curriculum_text)
+    sections = []
+    if structure["preamble"]:
+        sections.append(("Overview", structure["preamble"]))
+    sections.extend((module["header"], module["body"]) for module in structure["modules"])
+    return sections or [("Curriculum", curriculum_text.strip())]
@@ -0,0 +1,470 @@
+"""
+Whole-course export to Markdown, HTML and DOCX.
+
+The model output is Markdown-ish text; it is parsed into blocks (headings,
+bullet/numbered lists, paragraphs, code, tables) so every format gets real
+heading and list structure instead of one raw paragraph per section.
+
+    python -m modules.exporter --course "Web Development" --format docx --output web_dev.docx
+    python -m modules.exporter --run-dir ~/.edupilot/runs/<run_id> --format html --output course.html
+
+- Weeks are rendered in parallel (thread pool) and written in week order as
+  they become ready; Markdown and HTML are streamed straight to the output file.
+- Each week's fragment is cached on disk (EDUPILOT_EXPORT_CACHE) under its
+  content-hashed artifact id, so re-exporting after one week changed only
+  re-renders that week.
+- DOCX is a zip container, so python-docx builds the document in memory; it is
+  saved directly to the output path and only parsed blocks are cached per week.
+"""
+import os
+import re
+import json
+import html
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.artifact_store import get_store, load_json
+from modules.curriculum_parser import get_structure, find_week
+from modules.settings import get_settings
+
+EXPORT_VERSION = 1  # bump when the parser or renderers change, to invalidate cached fragments
+DEFAULT_EXPORT_CACHE = os.path.join(os.path.expanduser("~"), ".edupilot", "export_cache")
+DEFAULT_WORKERS = 4
+FORMATS = ("md", "html", "docx")
+
+SECTION_TITLES = [
+    ("lecture_notes", "Lecture Notes"),
+    ("reading_materials", "Reading Materials & References"),
+    ("exercises_projects", "Exercises & Projects"),
+    ("assessment_questions", "Assessment Questions"),
+]
+
+# --- Markdown -> blocks ---
+HEADING_RE = re.compile(r"^\s*(#{1,6})\s+(.*?)\s*#*\s*$")
+BOLD_LINE_RE = re.compile(r"^\s*\*\*([^*].*?)\*\*\s*:?\s*$")
+BULLET_RE = re.compile(r"^(\s*)[-*+•]\s+(.*)$")
+NUMBER_RE = re.compile(r"^(\s*)\d+[.)]\s+(.*)$")
+FENCE_RE = re.compile(r"^\s*```")
+TABLE_RE = re.compile(r"^\s*\|.*\|\s*$")
+INLINE_RE = re.compile(r"(\*\*[^*]+?\*\*|__[^_]+?__|\*[^*\s][^*]*?\*|`[^`]+`|\[[^\]]+\]\([^)\s]+\))")
+LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+
+
+def parse_markdown(text):
+    """
+    Splits text into blocks:
+    {"type": "heading", "level", "text"} | {"type": "list", "ordered", "level", "text"} |
+    {"type": "para", "text"} | {"type": "code", "text"} | {"type": "table", "rows"}
+    """
+    blocks, para, code, table = [], [], None, []
+
+    def flush_para():
+        if para:
+            blocks.append({"type": "para", "text": " ".join(para)})
+            para.clear()
+
+    def flush_table():
+        if table:
+            rows = [[cell.strip() for cell in row.strip().strip("|").split("|")] for row in table
+                    if not re.match(r"^\s*\|?[\s:|-]+\|?\s*$", row)]
+            blocks.append({"type": "table", "rows": rows})
+            table.clear()
+
+    for line in (text or "").splitlines():
+        if code is not None:
+            if FENCE_RE.match(line):
+                blocks.append({"type": "code", "text": "\n".join(code)})
+                code = None
+            else:
+                code.append(line)
+            continue
+        if FENCE_RE.match(line):
+            flush_para()
+            flush_table()
+            code = []
+            continue
+        if TABLE_RE.match(line):
+            flush_para()
+            table.append(line)
+            continue
+        flush_table()
+        if not line.strip():
+            flush_para()
+            continue
+        match = HEADING_RE.match(line)
+        if match:
+            flush_para()
+            blocks.append({"type": "heading", "level": len(match.group(1)), "text": match.group(2)})
+            continue
+        match = BOLD_LINE_RE.match(line)
+        if match and len(match.group(1)) < 120:
+            flush_para()
+            blocks.append({"type": "heading", "level": 4, "text": match.group(1)})
+            continue
+        for ordered, regex in ((False, BULLET_RE), (True, NUMBER_RE)):
+            match = regex.match(line)
+            if match:
+                flush_para()
+                level = min(2, (len(match.group(1).expandtabs(4)) + 1) // 3)
+                blocks.append({"type": "list", "ordered": ordered, "level": level, "text": match.group(2).strip()})
+                break
+        else:
+            if blocks and blocks[-1]["type"] == "list" and not para and line.startswith((" ", "\t")):
+                blocks[-1]["text"] += " " + line.strip()  # wrapped list item
+            else:
+                para.append(line.strip())
+    if code is not None:
+        blocks.append({"type": "code", "text": "\n".join(code)})
+    flush_para()
+    flush_table()
+    return blocks
+
+
+def inline_runs(text):
+    """[(text, style)] with style in {None, "bold", "italic", "code", "link:<url>"}."""
+    runs = []
+    for part in INLINE_RE.split(text):
+        if not part:
+            continue
+        if part.startswith(("**", "__")) and len(part) > 4:
+            runs.append((part[2:-2], "bold"))
+        elif part.startswith("`"):
+            runs.append((part[1:-1], "code"))
+        elif part.startswith("[") and LINK_RE.fullmatch(part):
+            label, url = LINK_RE.fullmatch(part).groups()
+            runs.append((label, f"link:{url}"))
+        elif part.startswith("*") and part.endswith("*") and len(part) > 2:
+            runs.append((part[1:-1], "italic"))
+        else:
+            runs.append((part, None))
+    return runs
+
+
+def shift_headings(blocks, offset, max_level=6):
+    """Pushes headings down by offset levels (section content sits below the course/week/section headings)."""
+    return [dict(b, level=min(max_level, b["level"] + offset)) if b["type"] == "heading" else b for b in blocks]
+
+
+# --- Renderers ---
+def render_markdown(blocks):
+    lines, previous = [], None
+    for block in blocks:
+        kind = block["type"]
+        if previous and (kind != "list" or previous != "list"):
+            lines.append("")
+        if kind == "heading":
+            lines.append(f"{'#' * block['level']} {block['text']}")
+        elif kind == "list":
+            marker = "1." if block["ordered"] else "-"
+            lines.append(f"{'   ' * block['level']}{marker} {block['text']}")
+        elif kind == "code":
+            lines += ["```", block["text"], "```"]
+        elif kind == "table":
+            rows = block["rows"]
+            if rows:
+                lines.append("| " + " | ".join(rows[0]) + " |")
+                lines.append("|" + "---|" * len(rows[0]))
+                lines += ["| " + " | ".join(row) + " |" for row in rows[1:]]
+        else:
+            lines.append(block["text"])
+        previous = kind
+    return "\n".join(lines) + "\n"
+
+
+def _html_inline(text):
+    out = []
+    for part, style in inline_runs(text):
+        part = html.escape(part)
+        if style == "bold":
+            out.append(f"<strong>{part}</strong>")
+        elif style == "italic":
+            out.append(f"<em>{part}</em>")
+        elif style == "code":
+            out.append(f"<code>{part}</code>")
+        elif style and style.startswith("link:"):
+            out.append(f'<a href="{html.escape(style[5:], quote=True)}">{part}</a>')
+        else:
+            out.append(part)
+    return "".join(out)
+
+
+def render_html(blocks):
+    out, open_lists = [], []  # stack of (tag, level)
+
+    def close_lists(level=-1):
+        while open_lists and open_lists[-1][1] > level:
+            out.append(f"</{open_lists.pop()[0]}>")
+
+    for block in blocks:
+        kind = block["type"]
+        if kind == "list":
+            tag = "ol" if block["ordered"] else "ul"
+            close_lists(block["level"])
+            if open_lists and open_lists[-1][1] == block["level"] and open_lists[-1][0] != tag:
+                close_lists(block["level"] - 1)
+            if not open_lists or open_lists[-1][1] < block["level"]:
+                out.append(f"<{tag}>")
+                open_lists.append((tag, block["level"]))
+            out.append(f"<li>{_html_inline(block['text'])}</li>")
+            continue
+        close_lists()
+        if kind == "heading":
+            out.append(f"<h{block['level']}>{_html_inline(block['text'])}</h{block['level']}>")
+        elif kind == "code":
+            out.append(f"<pre><code>{html.escape(block['text'])}</code></pre>")
+        elif kind == "table":
+            rows = block["rows"]
+            if rows:
+                out.append("<table>")
+                out.append("<tr>" + "".join(f"<th>{_html_inline(c)}</th>" for c in rows[0]) + "</tr>")
+                out += ["<tr>" + "".join(f"<td>{_html_inline(c)}</td>" for c in row) + "</tr>" for row in rows[1:]]
+                out.append("</table>")
+        else:
+            out.append(f"<p>{_html_inline(block['text'])}</p>")
+    close_lists()
+    return "\n".join(out) + "\n"
+
+
+def _docx_runs(paragraph, text):
+    for part, style in inline_runs(text):
+        run = paragraph.add_run(part)
+        if style == "bold":
+            run.bold = True
+        elif style == "italic":
+            run.italic = True
+        elif style == "code":
+            run.font.name = "Courier New"
+        elif style and style.startswith("link:"):
+            run.underline = True
+            paragraph.add_run(f" ({style[5:]})")
+
+
+def render_docx(doc, blocks):
+    """Appends blocks to a python-docx Document using its built-in heading and list styles."""
+    for block in blocks:
+        kind = block["type"]
+        if kind == "heading":
+            doc.add_heading(block["text"].replace("**", ""), level=min(block["level"], 9))
+        elif kind == "list":
+            style = "List Number" if block["ordered"] else "List Bullet"
+            if block["level"]:
+                style = f"{style} {block['level'] + 1}"
+            _docx_runs(doc.add_paragraph(style=style), block["text"])
+        elif kind == "code":
+            run = doc.add_paragraph().add_run(block["text"])
+            run.font.name = "Courier New"
+        elif kind == "table":
+            rows = block["rows"]
+            if rows:
+                columns = max(len(row) for row in rows)
+                table = doc.add_table(rows=len(rows), cols=columns)
+                table.style = "Table Grid"
+                for r, row in enumerate(rows):
+                    for c, cell in enumerate(row):
+                        table.cell(r, c).text = cell
+        else:
+            _docx_runs(doc.add_paragraph(), block["text"])
+
+
+# --- Course sections as blocks ---
+def objectives_blocks(objectives):
+    items = objectives.get("objectives", []) if isinstance(objectives, dict) else objectives
+    blocks = [{"type": "heading", "level": 2, "text": "Learning Objectives"}]
+    for item in items:
+        text = re.sub(r"^\s*(?:\d+[.)]|[-*•])\s*", "", item)
+        blocks.append({"type": "list", "ordered": True, "level": 0, "text": text})
+    return blocks
+
+
+def curriculum_blocks(curriculum):
+    blocks = [{"type": "heading", "level": 2, "text": "Curriculum"}]
+    structure = get_structure(curriculum)
+    if structure["preamble"]:
+        blocks += parse_markdown(structure["preamble"])
+    if not structure["modules"]:
+        return blocks + parse_markdown(curriculum.get("curriculum_text", ""))
+    for module in structure["modules"]:
+        blocks.append({"type": "heading", "level": 3, "text": module["header"]})
+        blocks += shift_headings(parse_markdown(module["body"]), 3)
+    return blocks
+
+
+def week_blocks(week_number, content, title=""):
+    blocks = [{"type": "heading", "level": 2, "text": f"Week {week_number}" + (f": {title}" if title else "")}]
+    for section, section_title in SECTION_TITLES:
+        blocks.append({"type": "heading", "level": 3, "text": section_title})
+        blocks += shift_headings(parse_markdown(content.get(section) or "Not available."), 3)
+    return blocks
+
+
+# --- Per-week fragment cache ---
+class FragmentCache:
+    """Rendered week fragments on disk, keyed by export version, format and week content."""
+
+    def __init__(self, cache_dir=None):
+        self.dir = cache_dir or get_settings().export_cache
+        os.makedirs(self.dir, exist_ok=True)
+
+    @staticmethod
+    def key(fmt, week_number, title, source):
+        """source: content-hashed artifact id, or the content itself."""
+        payload = json.dumps([EXPORT_VERSION, fmt, week_number, title, source], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.dir, key), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key, value):
+        path = os.path.join(self.dir, key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp, path)
+
+
+def render_week_fragment(fmt, week_number, week_ref, title="", cache=None):
+    """
+    Week fragment for fmt: Markdown/HTML text, or JSON-encoded blocks for DOCX.
+    week_ref is a week_content artifact id or the content dict itself.
+    """
+    source = week_ref if isinstance(week_ref, str) else json.dumps(week_ref, sort_keys=True)
+    key = FragmentCache.key(fmt, week_number, title, source) if cache else None
+    if key:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    content = load_json(week_ref) if isinstance(week_ref, str) else week_ref
+    blocks = week_blocks(week_number, content, title)
+    if fmt == "md":
+        fragment = render_markdown(blocks)
+    elif fmt == "html":
+        fragment = render_html(blocks)
+    else:
+        fragment = json.dumps(blocks, ensure_ascii=False)
+    if key:
+        cache.set(key, fragment)
+    return fragment
+
+
+# --- Course export ---
+HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>body{{font-family:sans-serif;max-width:50em;margin:2em auto;line-height:1.5}}
+pre{{background:#f4f4f4;padding:.8em;overflow-x:auto}}table{{border-collapse:collapse}}
+td,th{{border:1px solid #ccc;padding:.3em .6em}}</style></head><body>
+"""
+
+
+def find_course(course):
+    """Latest objectives/curriculum/week artifact ids stored for a course name."""
+    store = get_store()
+    curriculum_id = store.latest("curriculum", course)
+    weeks = {}
+    for row in store.list(kind="week_content", course=course, limit=10_000):
+        if row["week"] not in weeks or row["version"] > weeks[row["week"]][1]:
+            weeks[row["week"]] = (row["id"], row["version"])
+    return {
+        "objectives_id": store.latest("objectives", course),
+        "curriculum_id": curriculum_id,
+        "week_ids": {week: artifact_id for week, (artifact_id, _) in sorted(weeks.items())},
+    }
+
+
+def export_course(output_path, fmt=None, course=None, objectives_id=None, curriculum_id=None, week_ids=None,
+                  workers=DEFAULT_WORKERS, use_cache=True):
+    """
+    Writes the course (objectives, curriculum, every week) to output_path and returns it.
+    fmt defaults to the output file extension (md, html, docx). Either pass the
+    artifact ids (e.g. a pipeline result) or a course name to use its latest artifacts.
+    """
+    fmt = (fmt or os.path.splitext(output_path)[1].lstrip(".")).lower()
+    fmt = "md" if fmt == "markdown" else fmt
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt} (expected one of {FORMATS})")
+    if course and not (curriculum_id or week_ids):
+        found = find_course(course)
+        objectives_id = objectives_id or found["objectives_id"]
+        curriculum_id, week_ids = found["curriculum_id"], found["week_ids"]
+    if not curriculum_id and not week_ids:
+        raise ValueError("Nothing to export: no curriculum or weekly content found.")
+
+    objectives = load_json(objectives_id) if objectives_id else None
+    curriculum = load_json(curriculum_id) if curriculum_id else None
+    title = (curriculum or {}).get("course_name") or (objectives or {}).get("topic") or course or "Course"
+    structure = get_structure(curriculum) if curriculum else {"modules": []}
+    head = [{"type": "heading", "level": 1, "text": title}]
+    if objectives:
+        head += objectives_blocks(objectives)
+    if curriculum:
+        head += curriculum_blocks(curriculum)
+
+    cache = FragmentCache() if use_cache else None
+    weeks = sorted((int(week), ref) for week, ref in (week_ids or {}).items())
+
+    def render(item):
+        week_number, ref = item
+        _, week = find_week(structure, week_number)
+        return render_week_fragment(fmt, week_number, ref, week["title"] if week else "", cache)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp = f"{output_path}.tmp"
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        fragments = pool.map(render, weeks)  # rendered in parallel, consumed in week order
+        if fmt == "docx":
+            from docx import Document
+
+            doc = Document()
+            doc.add_heading(title, level=0)
+            render_docx(doc, head[1:])
+            for fragment in fragments:
+                doc.add_page_break()
+                render_docx(doc, json.loads(fragment))
+            doc.save(tmp)
+        else:
+            with open(tmp, "w", encoding="utf-8") as f:
+                if fmt == "html":
+                    f.write(HTML_HEAD.format(title=html.escape(title)))
+                    f.write(render_html(head))
+                else:
+                    f.write(render_markdown(head))
+                for fragment in fragments:
+                    f.write("\n")
+                    f.write(fragment)
+                if fmt == "html":
+                    f.write("</body></html>\n")
+    os.replace(tmp, output_path)
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a generated course to Markdown, HTML or DOCX.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--course", help="course name; exports its latest stored artifacts")
+    source.add_argument("--run-dir", help="pipeline run directory; exports that run's artifacts")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="defaults to the output extension")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--no-cache", action="store_true", help="re-render every week")
+    args = parser.parse_args(argv)
+
+    if args.run_dir:
+        with open(os.path.join(args.run_dir, "checkpoints", "course.json"), "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        # Checkpoints are {"fingerprint", "result"}; older runs stored the result directly
+        ids = checkpoint["result"] if "fingerprint" in checkpoint else checkpoint
+        path = export_course(args.output, args.format, objectives_id=ids["objectives_id"], curriculum_id=ids["curriculum_id"],
+                             week_ids=ids["week_ids"], workers=args.workers, use_cache=not args.no_cache)
+    else:
+        path = export_course(args.output, args.format, course=args.course, workers=args.workers, use_cache=not args.no_cache)
+    print(f"✅ Exported to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,233 @@
+"""
+Hedged requests: race a second provider when the first one is slow.
+
+With hedging on (EDUPILOT_HEDGE=1), LLMClient.generate() sends a task's prompt
+to its first route and, if no valid answer has arrived after the task's hedge
+delay, sends the same prompt to the next route. The first valid response wins
+and the other request is cancelled. A route that fails outright is replaced by
+the next one immediately (the usual fallback), hedge or not.
+
+Per-task policies (DEFAULT_POLICIES, overridden by EDUPILOT_HEDGE_FILE, default
+llm_hedging.json, with the same shape):
+
+    enabled           hedge this task at all
+    delay_s           fixed hedge delay; null -> use the observed latency percentile
+    percentile        latency percentile of the primary route to hedge at (95 = p95 budget)
+    default_delay_s   delay while fewer than min_samples latencies have been seen
+    min_delay_s / max_delay_s   clamp for the percentile-based delay
+    min_chars         shortest response that counts as valid
+
+Cost budget: every primary call earns EDUPILOT_HEDGE_BUDGET (default 0.1) hedge
+credits and each hedge spends one, so hedges add at most ~10% extra calls
+(plus a small initial burst). When the budget is empty the request simply waits
+for its primary route. Streaming calls are not hedged.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import defaultdict, deque
+
+from modules import telemetry
+from modules.llm_errors import LLMError, LLMResponseError
+from modules.settings import get_settings
+
+DEFAULT_POLICIES = {
+    "lecture_notes": {"enabled": True, "delay_s": None, "percentile": 95, "default_delay_s": 8.0},
+    "exercises_projects": {"enabled": True, "delay_s": None, "percentile": 95, "default_delay_s": 8.0},
+    "reading_materials": {"enabled": True, "delay_s": None, "percentile": 95, "default_delay_s": 4.0},
+    "assessment_questions": {"enabled": True, "delay_s": None, "percentile": 95, "default_delay_s": 6.0},
+    # Pro calls are expensive and not latency-critical
+    "objectives": {"enabled": False},
+    "curriculum": {"enabled": False},
+}
+
+POLICY_DEFAULTS = {
+    "enabled": False,
+    "delay_s": None,
+    "percentile": 95,
+    "default_delay_s": 5.0,
+    "min_delay_s": 0.5,
+    "max_delay_s": 60.0,
+    "min_samples": 20,
+    "min_chars": 1,
+}
+
+DEFAULT_BUDGET_RATIO = 0.1
+DEFAULT_BUDGET_BURST = 3.0
+LATENCY_WINDOW = 200
+
+
+def load_policies(path=None):
+    """Default policies overlaid with the optional policy file, each filled with POLICY_DEFAULTS."""
+    policies = {task: dict(policy) for task, policy in DEFAULT_POLICIES.items()}
+    path = get_settings().hedge_file if path is None else path
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for task, policy in json.load(f).items():
+                policies[task] = {**policies.get(task, {}), **policy}
+    return {task: {**POLICY_DEFAULTS, **policy} for task, policy in policies.items()}
+
+
+class LatencyTracker:
+    """Rolling window of live (non-cached, successful) call latencies per task and route, fed from telemetry."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def __call__(self, fields):
+        if fields.get("cache_hit") or fields.get("status") != "ok" or fields.get("latency_s") is None:
+            return
+        key = (fields.get("task"), fields["provider"], fields["model"])
+        with self._lock:
+            self._samples[key].append(fields["latency_s"])
+
+    def percentile(self, task, provider, model, pct, min_samples=1):
+        with self._lock:
+            samples = sorted(self._samples.get((task, provider, model), ()))
+        if len(samples) < min_samples or not samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+
+class HedgeBudget:
+    """Retry-budget style cap: primary calls earn `ratio` credits, each hedge spends one."""
+
+    def __init__(self, ratio=DEFAULT_BUDGET_RATIO, burst=DEFAULT_BUDGET_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self.credits = burst
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self.credits = min(max(self.burst, 1.0), self.credits + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            if self.credits >= 1.0:
+                self.credits -= 1.0
+                return True
+            return False
+
+
+class Hedger:
+    def __init__(self, policies=None, budget=None, tracker=None):
+        self.policies = policies if policies is not None else load_policies()
+        self.budget = budget or HedgeBudget()
+        self.tracker = tracker or LatencyTracker()
+        self.stats = defaultdict(int)
+        telemetry.add_sink(self.tracker)
+
+    def policy_for(self, task):
+        policy = self.policies.get(task)
+        return policy if policy and policy["enabled"] else None
+
+    def delay_for(self, task, provider, model, policy):
+        if policy["delay_s"] is not None:
+            return policy["delay_s"]
+        observed = self.tracker.percentile(task, provider, model, policy["percentile"], policy["min_samples"])
+        if observed is None:
+            return policy["default_delay_s"]
+        return min(policy["max_delay_s"], max(policy["min_delay_s"], observed))
+
+    @staticmethod
+    def _valid(text, policy):
+        return isinstance(text, str) and len(text.strip()) >= policy["min_chars"]
+
+    async def generate(self, client, task, routes, prompt, policy, use_cache=True, refresh=False, limits=None, **params):
+        """Races routes[0] against the next route once the hedge delay passes; returns the first valid text."""
+        remaining = list(routes)
+        running = {}  # task -> (provider, model, role)
+        last_error = None
+        started = time.perf_counter()
+
+        def launch(role):
+            provider, model = remaining.pop(0)
+
+            async def attempt():
+                with telemetry.labels(task=task, hedge=role):
+                    return await client.call(provider, model, prompt, use_cache=use_cache, refresh=refresh, limits=limits,
+                                             **params)
+            running[asyncio.ensure_future(attempt())] = (provider, model, role)
+
+        self.budget.earn()
+        primary_provider, primary_model = remaining[0]
+        delay = self.delay_for(task, primary_provider, primary_model, policy)
+        launch("primary")
+        hedged = False
+        try:
+            while running:
+                timeout = None
+                if not hedged and remaining:
+                    timeout = max(0.0, delay - (time.perf_counter() - started))
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Hedge delay passed without an answer
+                    hedged = True
+                    if self.budget.try_spend():
+                        self.stats["hedges"] += 1
+                        print(f"⏱️ {task}: no answer from {primary_provider}:{primary_model} after {delay:.1f}s; "
+                              f"hedging to {remaining[0][0]}:{remaining[0][1]}")
+                        launch("hedge")
+                    else:
+                        self.stats["budget_denied"] += 1
+                    continue
+
+                for finished in done:
+                    provider, model, role = running.pop(finished)
+                    try:
+                        text = finished.result()
+                    except LLMError as e:
+                        print(f"⚠️ {task}: {provider}:{model} failed ({e}); trying next route.")
+                        last_error = e
+                        continue
+                    if self._valid(text, policy):
+                        if role != "primary":
+                            self.stats["hedge_wins"] += 1
+                        return text
+                    last_error = LLMResponseError(f"{provider}:{model} returned an invalid response.", provider)
+                if not running and remaining:
+                    # Plain fallback after a failure; not charged to the hedge budget
+                    launch("fallback")
+            raise last_error
+        finally:
+            for pending in running:
+                pending.cancel()
+            if running:
+                self.stats["cancelled"] += len(running)
+                await asyncio.gather(*running, return_exceptions=True)
+
+
+_hedger = None
+_installed = False
+_hedger_lock = threading.Lock()
+
+
+def hedging_enabled():
+    return get_settings().hedge
+
+
+def install(hedger):
+    """Uses hedger for every client call (None switches hedging back to EDUPILOT_HEDGE); used by benchmarks."""
+    global _hedger, _installed
+    _hedger, _installed = hedger, hedger is not None
+    return hedger
+
+
+def get_hedger():
+    """Process-wide Hedger, or None unless EDUPILOT_HEDGE=1 (or one was installed)."""
+    global _hedger
+    if _installed:
+        return _hedger
+    if not hedging_enabled():
+        return None
+    if _hedger is None:
+        with _hedger_lock:
+            if _hedger is None:
+                settings = get_settings()
+                _hedger = Hedger(budget=HedgeBudget(ratio=settings.hedge_budget, burst=settings.hedge_burst))
+    return _hedger
@@ -0,0 +1,530 @@
+"""
+Job queue service in front of the generation modules.
+
+Jobs are stored in a local SQLite queue (EDUPILOT_QUEUE_DB, default
+~/.edupilot/jobs.sqlite3) and executed by a pool of async workers, so many
+instructors can queue course builds without keeping a Streamlit session open.
+
+    python -m modules.job_queue serve --workers 4 --port 8765
+    python -m modules.job_queue submit --tenant alice --kind course --params '{"topic": "Web Development"}'
+    python -m modules.job_queue status <job_id>
+    python -m modules.job_queue cancel <job_id>
+
+HTTP API (served by `serve`):
+    POST /jobs                 {"tenant", "kind", "params", "priority"} -> {"id", ...}
+    GET  /jobs?tenant=&status= list jobs
+    GET  /jobs/<id>            job status and result
+    POST /jobs/<id>/cancel     cancel a queued or running job
+
+Scheduling: among queued jobs, the tenant with the fewest running jobs goes
+first (a tenant at EDUPILOT_TENANT_MAX_RUNNING is skipped), then higher
+priority, then the tenant served least recently, then submission order.
+
+Leases: a claimed job records the worker that took it and a lease
+(EDUPILOT_JOB_LEASE seconds, default 60) that the worker renews while the job
+runs. Only jobs whose lease has expired (their worker stopped or crashed) are
+put back in the queue, so several worker processes can share one queue.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import sqlite3
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modules import telemetry
+from modules.llm_errors import LLMError
+from modules.settings import get_settings
+
+DEFAULT_QUEUE_DB = os.path.join(os.path.expanduser("~"), ".edupilot", "jobs.sqlite3")
+DEFAULT_WORKERS = 4
+DEFAULT_TENANT_MAX_RUNNING = 2
+DEFAULT_LEASE = 60  # seconds a claim stays valid without a heartbeat
+POLL_INTERVAL = 0.5  # seconds between queue polls and cancel checks
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+
+
+# --- Job handlers: kind -> async fn(params) returning a JSON-serializable result ---
+async def _objectives_job(params):
+    from modules.module1_learning_objective_setter import generate_learning_objectives_async
+
+    objectives, artifact_id = await generate_learning_objectives_async(
+        params["topic"], params.get("level", "Undergraduate_Basic"), params.get("credit_hours", 3),
+        use_cache=params.get("use_cache", True)
+    )
+    if not objectives:
+        raise LLMError("Objective generation failed.")
+    return {"objectives": objectives, "artifact_id": artifact_id}
+
+
+async def _curriculum_job(params):
+    from modules.module2_curriculum_structurer import generate_curriculum_async
+
+    curriculum_text, artifact_id = await generate_curriculum_async(
+        params.get("objectives_id") or params["objectives"], params.get("weeks", 15),
+        params.get("approach", "Project-based"), params.get("assessments", "Mixed"),
+        use_cache=params.get("use_cache", True), course_name=params.get("course_name")
+    )
+    if not curriculum_text:
+        raise LLMError("Curriculum generation failed.")
+    return {"artifact_id": artifact_id}
+
+
+async def _week_job(params):
+    from modules.module3_content_generator import generate_course_content
+
+    _, artifact_id = await generate_course_content(
+        params["curriculum_id"], params.get("week", 1), params.get("complexity", "Intermediate"),
+        params.get("multimedia_prefs"), use_cache=params.get("use_cache", True)
+    )
+    return {"artifact_id": artifact_id}
+
+
+async def _semester_job(params):
+    from modules.module3_content_generator import generate_semester_content
+
+    _, artifact_ids = await generate_semester_content(
+        params["curriculum_id"], params.get("weeks"), params.get("complexity", "Intermediate"),
+        params.get("multimedia_prefs"), use_cache=params.get("use_cache", True)
+    )
+    return {"week_ids": {str(week): artifact_id for week, artifact_id in artifact_ids.items()}}
+
+
+async def _course_job(params):
+    from modules.pipeline import run_pipeline
+
+    # params passed check_params, so run_dir and other internals cannot come from a tenant
+    return await run_pipeline(**params)
+
+
+JOB_HANDLERS = {
+    "objectives": _objectives_job,
+    "curriculum": _curriculum_job,
+    "week_content": _week_job,
+    "semester": _semester_job,
+    "course": _course_job,
+}
+
+# kind -> (required, optional) parameter names a tenant may send
+JOB_PARAMS = {
+    "objectives": (("topic",), ("level", "credit_hours", "use_cache")),
+    "curriculum": ((), ("objectives_id", "objectives", "weeks", "approach", "assessments", "use_cache", "course_name")),
+    "week_content": (("curriculum_id",), ("week", "complexity", "multimedia_prefs", "use_cache")),
+    "semester": (("curriculum_id",), ("weeks", "complexity", "multimedia_prefs", "use_cache")),
+    "course": (("topic",), ("level", "credit_hours", "weeks", "approach", "assessments", "complexity",
+                            "multimedia_prefs", "use_cache")),
+}
+
+
+def register_job_handler(kind, handler, required=(), optional=None):
+    """optional=None accepts any extra parameter; otherwise only required + optional names are allowed."""
+    JOB_HANDLERS[kind] = handler
+    JOB_PARAMS[kind] = (tuple(required), None if optional is None else tuple(optional))
+
+
+def check_params(kind, params):
+    """Returns params as a dict, or raises ValueError for a non-object, a missing name or an unknown name."""
+    params = {} if params is None else params
+    if not isinstance(params, dict):
+        raise ValueError(f"params for a {kind} job must be a JSON object")
+    required, optional = JOB_PARAMS.get(kind, ((), None))
+    missing = [name for name in required if name not in params]
+    if missing:
+        raise ValueError(f"Missing parameter(s) for a {kind} job: {', '.join(missing)}")
+    if optional is not None:
+        unknown = sorted(set(params) - set(required) - set(optional))
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) for a {kind} job: {', '.join(unknown)} "
+                             f"(allowed: {', '.join(required + optional)})")
+    return params
+
+
+# --- Persistent queue ---
+class JobQueue:
+    """SQLite-backed queue; safe to share between the HTTP threads and the worker loop."""
+
+    def __init__(self, db_path=DEFAULT_QUEUE_DB, tenant_max_running=DEFAULT_TENANT_MAX_RUNNING, lease=DEFAULT_LEASE):
+        self.tenant_max_running = tenant_max_running
+        self.lease = lease
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                tenant TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                worker TEXT,
+                lease_until REAL
+            )
+            """
+        )
+        # Queues created before leases existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("worker", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_tenant ON jobs(status, tenant)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_tenant_started ON jobs(tenant, started)")
+
+    def submit(self, tenant, kind, params=None, priority=0):
+        """Queues a job and returns its id."""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind} (expected one of {sorted(JOB_HANDLERS)})")
+        params = check_params(kind, params)
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, tenant, kind, params, priority, status, created) VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                (job_id, tenant, kind, json.dumps(params), int(priority), time.time()),
+            )
+        return job_id
+
+    def claim(self, worker=None):
+        """Marks the next job (see module docstring for the order) as running under worker's lease and returns it, or None."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    """
+                    WITH running AS (
+                        SELECT tenant, COUNT(*) AS n FROM jobs WHERE status = 'running' GROUP BY tenant
+                    ), served AS (
+                        SELECT tenant, MAX(started) AS last_started FROM jobs WHERE started IS NOT NULL GROUP BY tenant
+                    )
+                    SELECT j.id FROM jobs j
+                    LEFT JOIN running r ON r.tenant = j.tenant
+                    LEFT JOIN served s ON s.tenant = j.tenant
+                    WHERE j.status = 'queued' AND COALESCE(r.n, 0) < ?
+                    ORDER BY COALESCE(r.n, 0) ASC, j.priority DESC, COALESCE(s.last_started, 0) ASC, j.created ASC
+                    LIMIT 1
+                    """,
+                    (self.tenant_max_running,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                now = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', started = ?, worker = ?, lease_until = ? WHERE id = ?",
+                    (now, worker, now + self.lease, row[0]),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row[0])
+
+    def get(self, job_id):
+        rows = self._select("WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def list(self, tenant=None, status=None, limit=100):
+        clauses, args = [], []
+        if tenant is not None:
+            clauses.append("tenant = ?")
+            args.append(tenant)
+        if status is not None:
+            clauses.append("status = ?")
+            args.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._select(f"{where} ORDER BY created DESC LIMIT ?", (*args, limit))
+
+    def cancel(self, job_id):
+        """Queued jobs are cancelled at once; running jobs are flagged and stopped by their worker."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status = 'queued'", (time.time(), job_id)
+            )
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def cancel_requested(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def heartbeat(self, job_id, worker=None):
+        """Extends worker's lease on a running job; False if the job is no longer held by that worker."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running' AND worker IS ?",
+                (time.time() + self.lease, job_id, worker),
+            ).rowcount > 0
+
+    def finish(self, job_id, status, result=None, error=None, worker=None):
+        """Records the outcome; False (nothing written) if the job was requeued or taken by another worker."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?, lease_until = NULL "
+                "WHERE id = ? AND status = 'running' AND worker IS ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, worker),
+            ).rowcount > 0
+
+    def requeue_expired(self):
+        """Puts running jobs whose lease has expired back in the queue (or cancels them if asked); returns how many."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ?, lease_until = NULL "
+                "WHERE status = 'running' AND cancel_requested = 1 AND COALESCE(lease_until, 0) < ?",
+                (now, now),
+            )
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started = NULL, worker = NULL, lease_until = NULL "
+                "WHERE status = 'running' AND COALESCE(lease_until, 0) < ?",
+                (now,),
+            ).rowcount
+
+    def _select(self, tail, args):
+        columns = ["id", "tenant", "kind", "params", "priority", "status", "result", "error", "cancel_requested",
+                   "created", "started", "finished", "worker", "lease_until"]
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(columns)} FROM jobs {tail}", args).fetchall()
+        jobs = []
+        for row in rows:
+            job = dict(zip(columns, row))
+            job["params"] = json.loads(job["params"])
+            job["result"] = json.loads(job["result"]) if job["result"] else None
+            job["cancel_requested"] = bool(job["cancel_requested"])
+            jobs.append(job)
+        return jobs
+
+
+def get_queue():
+    return JobQueue(
+        get_settings().queue_db,
+        tenant_max_running=get_settings().tenant_max_running,
+        lease=get_settings().job_lease,
+    )
+
+
+# --- Worker pool ---
+class WorkerPool:
+    """workers async loops that claim jobs, run their handler and record the outcome."""
+
+    def __init__(self, queue, workers=DEFAULT_WORKERS, poll_interval=POLL_INTERVAL, worker_id=None):
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        # One id per pool: leases are held by the process, renewed by whichever loop runs the job
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stopping = None
+
+    async def _run_job(self, job):
+        handler = JOB_HANDLERS[job["kind"]]
+        try:
+            # Re-checked here for jobs queued before the whitelist existed
+            params = check_params(job["kind"], job["params"])
+        except ValueError as e:
+            print(f"❌ Job {job['id']} ({job['kind']}) rejected: {e}")
+            await asyncio.to_thread(self.queue.finish, job["id"], "failed", None, f"ValueError: {e}", worker=self.worker_id)
+            return
+        with telemetry.labels(stage=job["kind"], job_id=job["id"], tenant=job["tenant"]):
+            task = asyncio.ensure_future(handler(params))
+        renew_every = self.queue.lease / 3
+        renewed = time.monotonic()
+        while not task.done():
+            await asyncio.wait({task}, timeout=self.poll_interval)
+            if task.done():
+                break
+            if time.monotonic() - renewed >= renew_every:
+                renewed = time.monotonic()
+                if not await asyncio.to_thread(self.queue.heartbeat, job["id"], self.worker_id):
+                    print(f"⚠️ Lost the lease on job {job['id']}; stopping it here.")
+                    task.cancel()
+                    await asyncio.wait({task})
+                    return
+            if await asyncio.to_thread(self.queue.cancel_requested, job["id"]):
+                task.cancel()
+        finish = lambda *args: asyncio.to_thread(self.queue.finish, job["id"], *args, worker=self.worker_id)
+        try:
+            result = task.result()
+        except asyncio.CancelledError:
+            print(f"⚠️ Job {job['id']} cancelled.")
+            await finish("cancelled")
+        except Exception as e:
+            print(f"❌ Job {job['id']} ({job['kind']}) failed: {e}")
+            await finish("failed", None, f"{type(e).__name__}: {e}")
+        else:
+            if await finish("done", result):
+                print(f"✅ Job {job['id']} ({job['kind']}) done.")
+            else:
+                print(f"⚠️ Job {job['id']} finished after its lease expired; result discarded.")
+
+    async def _reaper(self):
+        """Requeues jobs whose worker stopped renewing its lease (this process or another)."""
+        while not self._stopping.is_set():
+            requeued = await asyncio.to_thread(self.queue.requeue_expired)
+            if requeued:
+                print(f"⚠️ Requeued {requeued} job(s) whose lease expired.")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.queue.lease / 2)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while not self._stopping.is_set():
+            job = await asyncio.to_thread(self.queue.claim, self.worker_id)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(job)
+
+    async def run(self):
+        """Runs until stop() is called; running jobs are finished first."""
+        self._stopping = asyncio.Event()
+        await asyncio.gather(self._reaper(), *(self._worker() for _ in range(self.workers)))
+
+    def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+
+
+# --- HTTP endpoint ---
+def make_http_handler(queue):
+    class JobHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _parts(self):
+            return [part for part in urlparse(self.path).path.split("/") if part]
+
+        def do_GET(self):
+            parts = self._parts()
+            if parts == ["jobs"]:
+                query = parse_qs(urlparse(self.path).query)
+                first = lambda name: query.get(name, [None])[0]
+                try:
+                    limit = int(first("limit") or 100)
+                except ValueError:
+                    return self._send(400, {"error": "limit must be an integer"})
+                if limit < 1:
+                    return self._send(400, {"error": "limit must be positive"})
+                return self._send(200, queue.list(first("tenant"), first("status"), limit))
+            if len(parts) == 2 and parts[0] == "jobs":
+                job = queue.get(parts[1])
+                return self._send(200, job) if job else self._send(404, {"error": "job not found"})
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            parts = self._parts()
+            if parts == ["jobs"]:
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                    tenant = body.get("tenant") or self.headers.get("X-Tenant")
+                    if not tenant:
+                        return self._send(400, {"error": "tenant is required"})
+                    job_id = queue.submit(tenant, body.get("kind", "course"), body.get("params"), body.get("priority", 0))
+                except (ValueError, TypeError) as e:
+                    return self._send(400, {"error": str(e)})
+                return self._send(201, queue.get(job_id))
+            if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+                job = queue.cancel(parts[1])
+                return self._send(200, job) if job else self._send(404, {"error": "job not found"})
+            self._send(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return JobHandler
+
+
+def serve(host="127.0.0.1", port=8765, workers=DEFAULT_WORKERS):
+    """HTTP endpoint on a background thread, worker pool on the main thread until Ctrl+C."""
+    queue = get_queue()
+    server = ThreadingHTTPServer((host, port), make_http_handler(queue))
+    threading.Thread(target=server.serve_forever, name="edupilot-jobs-http", daemon=True).start()
+    print(f"EduPilot job service on http://{host}:{port} with {workers} worker(s)")
+    pool = WorkerPool(queue, workers)
+    try:
+        asyncio.run(pool.run())
+    except KeyboardInterrupt:
+        print("Shutting down; interrupted jobs will be requeued once their lease expires.")
+    finally:
+        server.shutdown()
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EduPilot job queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = sub.add_parser("serve", help="run the HTTP endpoint and the worker pool")
+    serve_cmd.add_argument("--host", default="127.0.0.1")
+    serve_cmd.add_argument("--port", type=int, default=8765)
+    serve_cmd.add_argument("--workers", type=int, default=get_settings().workers)
+    work_cmd = sub.add_parser("work", help="run the worker pool only")
+    work_cmd.add_argument("--workers", type=int, default=get_settings().workers)
+    submit_cmd = sub.add_parser("submit", help="queue a job")
+    submit_cmd.add_argument("--tenant", required=True)
+    submit_cmd.add_argument("--kind", default="course", choices=sorted(JOB_HANDLERS))
+    submit_cmd.add_argument("--params", default="{}", help="job parameters as JSON")
+    submit_cmd.add_argument("--priority", type=int, default=0)
+    status_cmd = sub.add_parser("status", help="show a job")
+    status_cmd.add_argument("job_id")
+    list_cmd = sub.add_parser("list", help="list jobs")
+    list_cmd.add_argument("--tenant")
+    list_cmd.add_argument("--status", choices=JOB_STATES)
+    list_cmd.add_argument("--limit", type=int, default=50)
+    cancel_cmd = sub.add_parser("cancel", help="cancel a job")
+    cancel_cmd.add_argument("job_id")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.host, args.port, args.workers)
+        return 0
+    queue = get_queue()
+    if args.command == "work":
+        try:
+            asyncio.run(WorkerPool(queue, args.workers).run())
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "submit":
+        try:
+            print(queue.submit(args.tenant, args.kind, json.loads(args.params), args.priority))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+    elif args.command == "status":
+        job = queue.get(args.job_id)
+        if job is None:
+            print(f"❌ No job {args.job_id}")
+            return 1
+        print(json.dumps(job, indent=4))
+    elif args.command == "list":
+        for job in queue.list(args.tenant, args.status, args.limit):
+            print(f"{job['id']}  {job['tenant']:<16}{job['kind']:<14}{job['status']:<11}p{job['priority']}")
+    elif args.command == "cancel":
+        job = queue.cancel(args.job_id)
+        print(f"{args.job_id}: {job['status'] if job else 'not found'}{' (cancel requested)' if job and job['cancel_requested'] and job['status'] == 'running' else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,473 @@
+"""
+Verification of the links in generated reading materials.
+
+The reading_materials section asks the model for links, which are sometimes
+dead or made up. After the section is generated, module3 passes it through
+verify_markdown(): every URL (and DOI, checked via doi.org) is requested
+concurrently through one pooled httpx client, at most
+EDUPILOT_LINK_CHECK_PER_HOST requests per host, and the results are cached on
+disk (links.sqlite3 next to the response cache) so repeated links cost nothing.
+
+    ok        2xx/3xx, or 401/403/429 (the page exists but blocks bots)
+    dead      404/410, unknown host, malformed URL
+    error     timeout, 5xx, connection problems (cached briefly, may be transient)
+
+Links come from model output, and jobs may arrive over the HTTP queue, so only
+public http(s) targets are requested: loopback, private, link-local and other
+non-global addresses (and anything that resolves to one, including redirect
+targets) are refused without a request and reported as dead.
+
+Checking sends a request to every site the model cites, so it is opt-in:
+EDUPILOT_LINK_CHECK=off (default) skips the stage, flag marks dead and
+unverified links in the text, drop removes dead links (keeping the resource
+title) and flags the rest. If every request fails to connect (no network) the
+text is left unchanged.
+
+Requests run on the checker's own background event loop (like LLMClient's),
+so one pooled client serves every caller, whichever loop or thread it runs on.
+
+With EDUPILOT_LLM_BACKEND=mock, or after install(LinkChecker(transport=...)),
+requests go to a stub transport instead of the network (the mock config's
+"links": {"statuses": {"resource-3": 404}, "latency_s": 0.02} sets its answers):
+
+    from modules import link_checker
+    link_checker.install(link_checker.LinkChecker(transport=link_checker.stub_transport({"/missing": 404})))
+
+    python -m modules.link_checker check week3_reading.md
+    python -m modules.link_checker clear
+"""
+import os
+import re
+import sys
+import time
+import sqlite3
+import asyncio
+import argparse
+import ipaddress
+import threading
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from modules import telemetry
+from modules.settings import get_settings
+
+MODES = ("off", "flag", "drop")
+DEFAULT_TIMEOUT_S = 5.0
+DEFAULT_PER_HOST = 4
+DEFAULT_MAX_CONNECTIONS = 20
+OK_TTL = 7 * 24 * 3600
+FAILURE_TTL = 3600  # dead/error results are rechecked after an hour
+USER_AGENT = "Mozilla/5.0 (compatible; EduPilot link checker)"
+
+BLOCKED_STATUSES = {401, 403, 429}  # the server answered; the page most likely exists
+DEAD_STATUSES = {404, 410}
+HEAD_UNSUPPORTED = {400, 403, 405, 501}  # retried with GET
+
+URL_RE = re.compile(r"https?://[^\s<>\[\]\"'`]+", re.IGNORECASE)
+DOI_RE = re.compile(r"\bdoi:?\s*(10\.\d{4,9}/[^\s\"'<>\]]+)", re.IGNORECASE)
+TRAILING_PUNCTUATION = ".,;:!?*_'\""
+FLAGS = {
+    "dead": "⚠️ *(link appears to be broken)*",
+    "error": "⚠️ *(link could not be verified)*",
+}
+
+LinkResult = namedtuple("LinkResult", "url status code final_url error cached")
+
+
+class BlockedURLError(Exception):
+    """The URL uses a scheme other than http(s) or points at a non-public address."""
+
+
+# --- Extraction ---
+def _trim(url):
+    url = url.rstrip(TRAILING_PUNCTUATION)
+    while url.endswith(")") and url.count(")") > url.count("("):
+        url = url[:-1].rstrip(TRAILING_PUNCTUATION)
+    return url
+
+
+def extract_links(text):
+    """Unique URLs in text, in order of appearance; DOIs are returned as https://doi.org/ URLs."""
+    links = []
+    for match in URL_RE.finditer(text or ""):
+        url = _trim(match.group())
+        if url not in links:
+            links.append(url)
+    for match in DOI_RE.finditer(text or ""):
+        if "doi.org/" in text[max(0, match.start() - 20):match.start()].lower():
+            continue  # already part of a doi.org URL
+        url = "https://doi.org/" + _trim(match.group(1))
+        if url not in links:
+            links.append(url)
+    return links
+
+
+def _doi_of(url):
+    return url[len("https://doi.org/"):] if url.lower().startswith("https://doi.org/") else None
+
+
+def annotate(text, results, mode="flag"):
+    """Rewrites text for the failed results: flag appends a marker, drop removes dead links."""
+    for result in results:
+        if result.status == "ok":
+            continue
+        drop = mode == "drop" and result.status == "dead"
+        doi = _doi_of(result.url)
+        flag = FLAGS[result.status]
+        if doi and result.url not in text:
+            pattern = re.compile(r"\bdoi:?\s*" + re.escape(doi), re.IGNORECASE)
+            text = pattern.sub(lambda m: f"{m.group()} {flag}", text)  # citations are flagged, never removed
+            continue
+        link = re.compile(r"\[([^\]]*)\]\(<?" + re.escape(result.url) + r">?\)")
+        text = link.sub(lambda m: m.group(1) if drop else f"{m.group()} {flag}", text)
+        bare = re.compile(r"(?<!\]\()(?<!\]\(<)<?" + re.escape(result.url) + r"(?![\w/#?=&%~+-]|\.\w)>?")
+        text = bare.sub("*(broken link removed)*" if drop else (lambda m: f"{m.group()} {flag}"), text)
+    return text
+
+
+# --- Target policy ---
+def _public_address(address):
+    ip = ipaddress.ip_address(address.split("%", 1)[0])  # drop an IPv6 zone id
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def ensure_public_target(url, resolve=True):
+    """
+    Raises BlockedURLError unless url is http(s) on a public address. Hostnames
+    are resolved when resolve is set (a stub transport never connects, so it
+    only needs the literal checks); names that do not resolve are left to the
+    request, which reports them as unknown hosts.
+    """
+    parts = urlsplit(str(url))
+    if parts.scheme.lower() not in ("http", "https"):
+        raise BlockedURLError(f"scheme {parts.scheme or '(none)'!r} is not checked")
+    host = (parts.hostname or "").rstrip(".").lower()
+    if not host or host == "localhost" or host.endswith(".localhost"):
+        raise BlockedURLError(f"host {host or '(none)'!r} is not public")
+    try:
+        ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        pass
+    else:
+        if not _public_address(host):
+            raise BlockedURLError(f"address {host} is not public")
+        return
+    if not resolve:
+        return
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, parts.port or 443)
+    except OSError:
+        return
+    blocked = [info[4][0] for info in infos if not _public_address(info[4][0])]
+    if blocked:
+        raise BlockedURLError(f"{host} resolves to non-public address {blocked[0]}")
+
+
+# --- Result cache ---
+class LinkCache:
+    """Check results on disk, one row per URL; ok results live longer than failures."""
+
+    def __init__(self, path, ok_ttl=OK_TTL, failure_ttl=FAILURE_TTL):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ok_ttl = ok_ttl
+        self.failure_ttl = failure_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS links (url TEXT PRIMARY KEY, status TEXT, code INTEGER, "
+            "final_url TEXT, error TEXT, expires REAL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, urls):
+        if not urls:
+            return {}
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT url, status, code, final_url, error FROM links WHERE expires > ? AND url IN ({','.join('?' * len(urls))})",
+                (now, *urls),
+            ).fetchall()
+        return {row[0]: LinkResult(*row, cached=True) for row in rows}
+
+    def set_many(self, results):
+        now = time.time()
+        rows = [
+            (r.url, r.status, r.code, r.final_url, r.error, now + (self.ok_ttl if r.status == "ok" else self.failure_ttl))
+            for r in results
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            count = self._conn.execute("DELETE FROM links").rowcount
+            self._conn.commit()
+        return count
+
+
+# --- Stub transport for offline runs ---
+def stub_transport(statuses=None, latency_s=0.0, default_status=200):
+    """
+    httpx transport that answers locally: statuses maps a URL substring (e.g.
+    "/missing" or "dead.example") to a status code, or to "timeout"/"unreachable".
+    """
+    import httpx
+
+    statuses = statuses or {}
+
+    async def handler(request):
+        if latency_s:
+            await asyncio.sleep(latency_s)
+        url = str(request.url)
+        status = next((code for part, code in statuses.items() if part in url), default_status)
+        if status == "timeout":
+            raise httpx.ReadTimeout("stub timeout", request=request)
+        if status == "unreachable":
+            raise httpx.ConnectError("stub: name or service not known", request=request)
+        return httpx.Response(int(status), request=request)
+
+    return httpx.MockTransport(handler)
+
+
+# --- Checker ---
+class LinkChecker:
+    """
+    One pooled httpx client and per-host semaphores, owned by a background event
+    loop started on first use; close() shuts both down.
+    """
+
+    def __init__(self, cache=None, per_host=DEFAULT_PER_HOST, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 timeout=DEFAULT_TIMEOUT_S, transport=None, allow_private=False):
+        self.cache = cache
+        self.allow_private = allow_private  # tests against a local server only
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.transport = transport
+        self._lock = threading.Lock()
+        self._loop = None
+        self._client = None  # only touched on self._loop
+        self._hosts = {}
+
+    # --- Background event loop ---
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="edupilot-link-check", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    async def _on_checker_loop(self, coro):
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def close(self):
+        """Closes the pooled client and stops the background loop (a later check starts new ones)."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def shutdown():
+            client, self._client = self._client, None
+            self._hosts = {}
+            if client is not None:
+                await client.aclose()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
+    def _get_client(self):
+        """The pooled client; called on the checker loop only, so creating it needs no lock."""
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                follow_redirects=True,
+                timeout=httpx.Timeout(self.timeout, pool=None),  # queueing for a connection is not a failure
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                headers={"User-Agent": USER_AGENT},
+                event_hooks={"request": [self._check_target]},  # runs for every redirect hop too
+            )
+        return self._client
+
+    async def _check_target(self, request):
+        if not self.allow_private:
+            await ensure_public_target(request.url, resolve=self.transport is None)
+
+    def _host_limit(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    async def _request(self, client, url):
+        import httpx
+
+        try:
+            response = await client.head(url)
+            if response.status_code in HEAD_UNSUPPORTED:
+                async with client.stream("GET", url) as response:
+                    pass  # status and headers only; the body is never read
+            code = response.status_code
+            status = "ok" if code < 400 or code in BLOCKED_STATUSES else "dead" if code in DEAD_STATUSES else "error"
+            return LinkResult(url, status, code, str(response.url), None, False)
+        except httpx.ConnectError as e:
+            return LinkResult(url, "dead" if _unknown_host(e) else "error", None, None, f"ConnectError: {e}", False)
+        except (BlockedURLError, httpx.InvalidURL, httpx.UnsupportedProtocol) as e:
+            return LinkResult(url, "dead", None, None, f"{type(e).__name__}: {e}", False)
+        except httpx.HTTPError as e:
+            return LinkResult(url, "error", None, None, f"{type(e).__name__}: {e}", False)
+
+    async def _check(self, url):
+        async with self._host_limit(urlsplit(url).hostname or ""):
+            return await self._request(self._get_client(), url)
+
+    async def _check_all(self, urls):
+        return await asyncio.gather(*(self._check(url) for url in urls))
+
+    async def check(self, url):
+        return await self._on_checker_loop(self._check(url))
+
+    async def check_many(self, urls):
+        """{url: LinkResult} for every URL, from the cache where possible, the rest checked in parallel."""
+        urls = list(dict.fromkeys(urls))
+        cached = await asyncio.to_thread(self.cache.get_many, urls) if self.cache else {}
+        fresh = await self._on_checker_loop(self._check_all([url for url in urls if url not in cached]))
+        if self.cache and any(result.code is not None for result in fresh):
+            # Not cached when nothing answered at all (offline), so the links are rechecked next time
+            await asyncio.to_thread(self.cache.set_many, fresh)
+        results = {**cached, **{result.url: result for result in fresh}}
+        return {url: results[url] for url in urls}
+
+    async def verify_markdown(self, text, mode="flag"):
+        """Returns (text, results) with failed links flagged or dropped according to mode."""
+        links = extract_links(text)
+        if not links or mode == "off":
+            return text, []
+        span = telemetry.start_span("link-check", "http", text)
+        span.fields["task"] = "link_check"
+        results = list((await self.check_many(links)).values())
+        live = [r for r in results if not r.cached]
+        unreachable = [r for r in live if r.status != "ok" and r.code is None and not _refused(r)]
+        span.fields.update(cache_hit=not live, links=len(results), cached=len(results) - len(live),
+                           dead=sum(r.status == "dead" for r in results), unverified=sum(r.status == "error" for r in results))
+        span.fields["tokens_in"] = span.fields["tokens_out"] = 0
+        span.finish()
+        if live and len(unreachable) == len(results):
+            print(f"⚠️ Could not reach any of {len(results)} link(s); leaving them unchecked (offline?).")
+            return text, results
+        return annotate(text, results, mode), results
+
+
+def _unknown_host(error):
+    message = str(error).lower()
+    return any(hint in message for hint in ("name or service not known", "nodename nor servname", "getaddrinfo failed",
+                                            "no address associated"))
+
+
+def _refused(result):
+    return (result.error or "").startswith(BlockedURLError.__name__)
+
+
+def summarize_results(results):
+    counts = {"ok": 0, "dead": 0, "error": 0}
+    for result in results:
+        counts[result.status] += 1
+    cached = sum(1 for result in results if result.cached)
+    return f"{len(results)} link(s): {counts['ok']} ok, {counts['dead']} broken, {counts['error']} unverified ({cached} cached)"
+
+
+# --- Process-wide checker ---
+_checker = None
+_installed = False
+_checker_lock = threading.Lock()
+
+
+def link_check_mode():
+    """EDUPILOT_LINK_CHECK as one of MODES; a plain on/true/1 means flag, anything unknown means off."""
+    mode = get_settings().link_check
+    if mode in MODES:
+        return mode
+    return "flag" if mode in ("1", "true", "yes", "on") else "off"
+
+
+def install(checker):
+    """Uses checker for every verification (None restores the default); the previous checker is closed."""
+    global _checker, _installed
+    with _checker_lock:
+        previous, _checker, _installed = _checker, checker, checker is not None
+    if previous is not None and previous is not checker:
+        previous.close()
+    return checker
+
+
+def get_link_checker():
+    """Process-wide LinkChecker; with the mock LLM backend it answers from a local stub transport."""
+    global _checker
+    if _checker is None:
+        with _checker_lock:
+            if _checker is None:
+                settings = get_settings()
+                transport = None
+                if settings.llm_backend == "mock":
+                    from modules import mock_llm
+                    links = mock_llm.load_config(settings.mock_config).get("links", {})
+                    transport = stub_transport(links.get("statuses"), links.get("latency_s", 0.02))
+                _checker = LinkChecker(
+                    cache=LinkCache(os.path.join(settings.cache_dir, "links.sqlite3")),
+                    per_host=settings.link_check_per_host,
+                    timeout=settings.link_check_timeout,
+                    transport=transport,
+                )
+    return _checker
+
+
+async def verify_reading_materials(text):
+    """module3's post-processing stage for the reading_materials section."""
+    mode = link_check_mode()
+    if mode == "off" or not isinstance(text, str):
+        return text
+    checked, results = await get_link_checker().verify_markdown(text, mode)
+    if checked != text:
+        print(f"🔗 Reading materials: {summarize_results(results)}")
+    return checked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the links in a markdown file.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="check every link and print the annotated text")
+    check.add_argument("path")
+    check.add_argument("--mode", choices=MODES[1:], default="flag")
+    sub.add_parser("clear", help="forget cached results")
+    args = parser.parse_args(argv)
+
+    checker = get_link_checker()
+    if args.command == "clear":
+        print(f"Removed {checker.cache.clear()} cached result(s).")
+        return 0
+    with open(args.path, "r", encoding="utf-8") as f:
+        text = f.read()
+    checked, results = asyncio.run(checker.verify_markdown(text, args.mode))
+    for result in results:
+        mark = {"ok": "✅", "dead": "❌", "error": "⚠️"}[result.status]
+        print(f"{mark} {result.code or '-':>3} {result.url}{'  ' + result.error if result.error else ''}")
+    print(summarize_results(results))
+    print()
+    print(checked)
+    return 1 if any(result.status == "dead" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
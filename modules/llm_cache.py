@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import threading
+from collections import OrderedDict
+
+from modules.settings import get_settings
+
+# --- Cache configuration (read when the cache is first created) ---
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".edupilot", "cache")
+DEFAULT_TTL = 7 * 24 * 3600                # seconds
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024 # disk tier budget
+DEFAULT_MEMORY_ENTRIES = 256               # memory tier size
+
+
+def make_cache_key(provider, model, prompt, params=None):
+    """Content-addressed key: sha256 over provider, model, rendered prompt and generation params."""
+    payload = json.dumps([provider, model, prompt, params or {}], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses.
+
+    Memory tier: small in-process LRU, checked first.
+    Disk tier: SQLite table with TTL expiry and size-bounded LRU eviction,
+    shared by every Streamlit app and module running on this machine.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_DISK_BYTES, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "responses.sqlite3")
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+
+    # --- Memory tier ---
+    def _memory_get(self, key, now):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < now:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_set(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # --- Public API ---
+    def get(self, key):
+        """Returns the cached text for key, or None on a miss or an expired entry."""
+        now = time.time()
+        with self._lock:
+            value = self._memory_get(key, now)
+            if value is not None:
+                return value
+
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if created + self.ttl < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._memory_set(key, value, created + self.ttl)
+            return value
+
+    def set(self, key, value, provider=None, model=None):
+        """Stores text in both tiers and evicts least-recently-used rows past the disk budget."""
+        if not isinstance(value, str) or not value:
+            return
+        now = time.time()
+        with self._lock:
+            self._memory_set(key, value, now + self.ttl)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, model, value, size, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM responses")
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+            self._memory.pop(key, None)
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    # --- Read-through helpers ---
+    def fetch(self, provider, model, prompt, call, params=None, use_cache=True, refresh=False):
+        """
+        Sync read-through: returns the cached text or runs call() and stores its result.
+
+        use_cache=False bypasses the cache entirely; refresh=True skips the lookup
+        but still stores the fresh result.
+        """
+        if not use_cache:
+            return call()
+        key = make_cache_key(provider, model, prompt, params)
+        if not refresh:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+        value = call()
+        self.set(key, value, provider, model)
+        return value
+
+    async def afetch(self, provider, model, prompt, call, params=None, use_cache=True, refresh=False):
+        """Async read-through; call is a zero-argument coroutine function."""
+        if not use_cache:
+            return await call()
+        key = make_cache_key(provider, model, prompt, params)
+        if not refresh:
+            cached = await asyncio.to_thread(self.get, key)
+            if cached is not None:
+                return cached
+        value = await call()
+        await asyncio.to_thread(self.set, key, value, provider, model)
+        return value
+
+    async def astream(self, provider, model, prompt, stream, params=None, use_cache=True, refresh=False):
+        """
+        Async generator read-through for streaming calls. stream() returns an
+        async iterator of text chunks; a cache hit is yielded as a single chunk.
+        Shares keys with fetch/afetch, so streamed and blocking calls reuse each other's entries.
+        """
+        key = make_cache_key(provider, model, prompt, params) if use_cache else None
+        if key and not refresh:
+            cached = await asyncio.to_thread(self.get, key)
+            if cached is not None:
+                yield cached
+                return
+        pieces = []
+        async for chunk in stream():
+            pieces.append(chunk)
+            yield chunk
+        if key:
+            await asyncio.to_thread(self.set, key, "".join(pieces), provider, model)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the process-wide cache, created on first use from EDUPILOT_CACHE_* settings."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                settings = get_settings()
+                _default_cache = ResponseCache(
+                    cache_dir=settings.cache_dir,
+                    ttl=settings.cache_ttl,
+                    max_bytes=settings.cache_max_bytes,
+                    memory_entries=settings.cache_memory_entries,
+                )
+    return _default_cache
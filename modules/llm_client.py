@@ -0,0 +1,375 @@
+import os
+import json
+import asyncio
+import threading
+import contextlib
+
+from modules import telemetry
+from modules.llm_cache import get_cache
+from modules.llm_errors import LLMError, LLMUnavailableError, LLMResponseError
+from modules.rate_limiter import get_guard
+from modules.hedging import get_hedger
+from modules.settings import get_settings
+
+# --- Task routing: first entry is preferred, the rest are fallbacks in order ---
+DEFAULT_ROUTES = {
+    "objectives": ["gemini:gemini-2.5-pro", "groq:llama-3.3-70b-versatile"],
+    "curriculum": ["gemini:gemini-2.5-pro", "groq:llama-3.3-70b-versatile"],
+    "lecture_notes": ["gemini:gemini-2.5-flash", "groq:llama-3.1-8b-instant"],
+    "reading_materials": ["groq:llama-3.1-8b-instant", "gemini:gemini-2.5-flash"],
+    "exercises_projects": ["gemini:gemini-2.5-flash", "groq:llama-3.1-8b-instant"],
+    "assessment_questions": ["groq:llama-3.1-8b-instant", "gemini:gemini-2.5-flash"],
+}
+
+
+
+def load_routes(path=None):
+    """Default routes overlaid with the optional routes file (EDUPILOT_ROUTES_FILE, same shape, per-task overrides)."""
+    routes = dict(DEFAULT_ROUTES)
+    path = get_settings().routes_file if path is None else path
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            routes.update(json.load(f))
+    return routes
+
+
+def parse_route(route):
+    """'provider:model' -> (provider, model)"""
+    provider, _, model = route.partition(":")
+    return provider.strip(), model.strip()
+
+
+# --- Providers (SDKs are imported on first use) ---
+class GeminiProvider:
+    name = "gemini"
+
+    def __init__(self):
+        api_key = get_settings().value("GEMINI_API_KEY", None)
+        if not api_key:
+            raise LLMUnavailableError("Gemini API Key not found. Please set it in your .env file.", self.name)
+        from google import generativeai as genai
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self._models = {}
+
+    def _model(self, model):
+        if model not in self._models:
+            self._models[model] = self._genai.GenerativeModel(model)
+        return self._models[model]
+
+    @staticmethod
+    def _record_usage(response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage and getattr(usage, "prompt_token_count", None):
+            telemetry.record_usage(usage.prompt_token_count, getattr(usage, "candidates_token_count", 0))
+
+    @staticmethod
+    def _text(response):
+        try:
+            text = response.text
+        except ValueError as e:
+            raise LLMResponseError(f"Gemini returned no text: {e}", "gemini") from e
+        return text
+
+    @staticmethod
+    def _config(params):
+        """generation_config from call params; response_schema switches on JSON output."""
+        schema = params.pop("response_schema", None)
+        if schema is not None:
+            params.update(response_mime_type="application/json", response_schema=schema)
+        return params or None
+
+    async def generate(self, model, prompt, **params):
+        response = await self._model(model).generate_content_async(prompt, generation_config=self._config(params))
+        self._record_usage(response)
+        text = self._text(response)
+        if not text:
+            raise LLMResponseError("Gemini returned an empty response.", self.name)
+        return text
+
+    async def stream(self, model, prompt, **params):
+        response = await self._model(model).generate_content_async(prompt, generation_config=self._config(params), stream=True)
+        received = False
+        async for chunk in response:
+            self._record_usage(chunk)
+            text = self._text(chunk)
+            if text:
+                received = True
+                yield text
+        if not received:
+            raise LLMResponseError("Gemini returned an empty response.", self.name)
+
+
+class GroqProvider:
+    name = "groq"
+
+    def __init__(self):
+        api_key = get_settings().value("GROQ_API_KEY", None)
+        if not api_key:
+            raise LLMUnavailableError("Groq API Key not found. Please set it in your .env file.", self.name)
+        from groq import AsyncGroq
+        self._client = AsyncGroq(api_key=api_key)
+
+    @staticmethod
+    def _params(params):
+        """JSON mode for response_schema (Groq takes no schema; the prompt describes the shape)."""
+        if params.pop("response_schema", None) is not None:
+            params["response_format"] = {"type": "json_object"}
+        return params
+
+    async def generate(self, model, prompt, **params):
+        completion = await self._client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            **self._params(params),
+        )
+        usage = getattr(completion, "usage", None)
+        if usage:
+            telemetry.record_usage(usage.prompt_tokens, usage.completion_tokens)
+        text = completion.choices[0].message.content
+        if not text:
+            raise LLMResponseError("Groq returned an empty response.", self.name)
+        return text
+
+    async def stream(self, model, prompt, **params):
+        completion = await self._client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            stream=True,
+            **self._params(params),
+        )
+        received = False
+        async for chunk in completion:
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if usage:
+                telemetry.record_usage(usage.prompt_tokens, usage.completion_tokens)
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                received = True
+                yield text
+        if not received:
+            raise LLMResponseError("Groq returned an empty response.", self.name)
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "groq": GroqProvider,
+}
+
+
+def register_provider(name, factory):
+    """Adds a provider factory; factory() must return an object with generate() and stream()."""
+    PROVIDERS[name] = factory
+
+
+def _provider_limit(limits, provider):
+    """limits[provider] (an asyncio.Semaphore from the caller's loop), or a no-op."""
+    return (limits or {}).get(provider) or contextlib.nullcontext()
+
+
+class LLMClient:
+    """
+    Single entry point for every model call in EduPilot.
+
+    - Providers are created lazily, once per process, the first time a route needs them.
+    - All SDK calls run on one background event loop, so pooled HTTP/gRPC
+      connections survive across asyncio.run() calls and Streamlit reruns.
+    - generate(task, ...) picks provider/model from the routing table and falls
+      back down the list when a provider is unavailable or keeps failing.
+    - limits ({provider: asyncio.Semaphore}, e.g. module3's make_provider_limits())
+      caps in-flight calls per provider; the slot of each route is taken only when
+      that route is actually called, so fallbacks and hedges respect their own cap.
+    """
+
+    def __init__(self, routes=None):
+        self.routes = routes if routes is not None else load_routes()
+        self._providers = {}
+        self._lock = threading.Lock()
+        self._loop = None
+
+    # --- Providers and routing ---
+    def provider(self, name):
+        with self._lock:
+            if name not in self._providers:
+                factory = PROVIDERS.get(name)
+                if factory is None:
+                    raise LLMUnavailableError(f"Unknown LLM provider: {name}", name)
+                self._providers[name] = factory()
+            return self._providers[name]
+
+    def routes_for(self, task):
+        routes = self.routes.get(task)
+        if not routes:
+            raise LLMUnavailableError(f"No model route configured for task '{task}'.")
+        return [parse_route(route) for route in routes]
+
+    def primary_provider(self, task):
+        return self.routes_for(task)[0][0]
+
+    # --- Background event loop ---
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="edupilot-llm-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro):
+        """Blocking: runs coro on the client loop and returns its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    async def _on_client_loop(self, coro):
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    async def _stream_on_client_loop(self, make_stream):
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is loop:
+            async for chunk in make_stream():
+                yield chunk
+            return
+
+        consumer = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def push(kind, value):
+            try:
+                consumer.call_soon_threadsafe(queue.put_nowait, (kind, value))
+            except RuntimeError:
+                pass  # consumer loop already closed
+
+        async def pump():
+            try:
+                async for chunk in make_stream():
+                    push("chunk", chunk)
+                push("done", None)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                push("error", e)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "error":
+                    raise value
+                if kind == "done":
+                    return
+                yield value
+        finally:
+            future.cancel()
+
+    # --- Calls ---
+    async def call(self, provider, model, prompt, use_cache=True, refresh=False, limits=None, **params):
+        """One provider/model call through the response cache and the provider's guard, traced as a span."""
+        span = telemetry.start_span(provider, model, prompt)
+
+        async def guarded():
+            telemetry.mark_called()
+            backend = self.provider(provider)
+            return await get_guard(provider).call(lambda: backend.generate(model, prompt, **params), prompt)
+
+        async def traced():
+            with telemetry.track(span) as result:
+                text = await get_cache().afetch(
+                    provider, model, prompt, guarded, params=params or None, use_cache=use_cache, refresh=refresh
+                )
+                result["chars"] = len(text)
+                return text
+
+        # The semaphore belongs to the caller's loop, so it is held here rather than on the client loop
+        async with _provider_limit(limits, provider):
+            return await self._on_client_loop(traced())
+
+    async def stream_call(self, provider, model, prompt, use_cache=True, refresh=False, limits=None, **params):
+        """Streaming counterpart of call(); yields text chunks."""
+        span = telemetry.start_span(provider, model, prompt)
+
+        def guarded():
+            telemetry.mark_called()
+            backend = self.provider(provider)
+            return get_guard(provider).stream(lambda: backend.stream(model, prompt, **params), prompt)
+
+        async def make_stream():
+            with telemetry.track(span) as result:
+                async for chunk in get_cache().astream(
+                    provider, model, prompt, guarded, params=params or None, use_cache=use_cache, refresh=refresh
+                ):
+                    span.mark_first_token()
+                    result["chars"] += len(chunk)
+                    yield chunk
+
+        async with _provider_limit(limits, provider):
+            async for chunk in self._stream_on_client_loop(make_stream):
+                yield chunk
+
+    async def generate(self, task, prompt, use_cache=True, refresh=False, limits=None, **params):
+        """
+        Routes prompt for task to its configured models, falling back in order.
+        With hedging enabled (modules/hedging.py) slow routes are raced against the next one.
+        """
+        routes = self.routes_for(task)
+        hedger = get_hedger()
+        policy = hedger.policy_for(task) if hedger and len(routes) > 1 else None
+        if policy:
+            return await hedger.generate(self, task, routes, prompt, policy, use_cache=use_cache, refresh=refresh,
+                                         limits=limits, **params)
+
+        last_error = None
+        for provider, model in routes:
+            try:
+                with telemetry.labels(task=task):
+                    return await self.call(provider, model, prompt, use_cache=use_cache, refresh=refresh, limits=limits,
+                                           **params)
+            except LLMError as e:
+                print(f"⚠️ {task}: {provider}:{model} failed ({e}); trying next route.")
+                last_error = e
+        raise last_error
+
+    async def stream(self, task, prompt, use_cache=True, refresh=False, limits=None, **params):
+        """Routed streaming; falls back only if a route fails before its first chunk."""
+        last_error = None
+        for provider, model in self.routes_for(task):
+            started = False
+            try:
+                with telemetry.labels(task=task):
+                    async for chunk in self.stream_call(provider, model, prompt, use_cache=use_cache, refresh=refresh,
+                                                        limits=limits, **params):
+                        started = True
+                        yield chunk
+                return
+            except LLMError as e:
+                if started:
+                    raise
+                print(f"⚠️ {task}: {provider}:{model} failed ({e}); trying next route.")
+                last_error = e
+        raise last_error
+
+    def generate_sync(self, task, prompt, use_cache=True, refresh=False, **params):
+        """Blocking generate() for synchronous callers."""
+        return self.run(self.generate(task, prompt, use_cache=use_cache, refresh=refresh, **params))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the process-wide LLMClient (settings and .env are loaded on first use).
+    EDUPILOT_LLM_BACKEND=mock swaps every provider for the offline mock (modules/mock_llm.py).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                settings = get_settings()
+                _client = LLMClient()
+                if settings.llm_backend == "mock":
+                    from modules import mock_llm
+                    mock_llm.install(mock_llm.load_config(settings.mock_config))
+    return _client
@@ -0,0 +1,55 @@
+class LLMError(Exception):
+    """Base class for every failure raised by an LLM provider call."""
+
+    def __init__(self, message, provider=None):
+        super().__init__(message)
+        self.provider = provider
+
+
+class LLMUnavailableError(LLMError):
+    """The provider is not configured (missing API key or SDK)."""
+
+
+class LLMRequestError(LLMError):
+    """The provider rejected the request; retrying the same call will not help."""
+
+
+class LLMResponseError(LLMError):
+    """The provider answered but returned no usable text (empty or blocked)."""
+
+
+class TransientLLMError(LLMError):
+    """Timeouts, connection resets and 5xx responses; safe to retry."""
+
+
+class RateLimitError(TransientLLMError):
+    """429 / quota exhausted. retry_after holds the provider's hint in seconds, if any."""
+
+    def __init__(self, message, provider=None, retry_after=None):
+        super().__init__(message, provider)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(LLMError):
+    """The provider kept failing and its circuit breaker is open."""
+
+    def __init__(self, message, provider=None, retry_in=None):
+        super().__init__(message, provider)
+        self.retry_in = retry_in
+
+
+class IncompleteGenerationError(LLMError):
+    """
+    Some units of a batch failed. The finished results are still attached so
+    callers can show or save them; failures maps each failed unit to its error.
+    """
+
+    def __init__(self, message, results=None, filepaths=None, failures=None):
+        super().__init__(message)
+        self.results = results or {}
+        self.filepaths = filepaths or {}
+        self.failures = failures or {}
+
+
+class InvalidStructuredOutputError(LLMResponseError):
+    """Structured (JSON) output failed schema validation and could not be repaired locally."""
@@ -0,0 +1,298 @@
+"""
+Deterministic offline stand-in for Gemini and Groq.
+
+Plugs into the LLM client under the provider names "gemini" and "groq", so
+generate_with_gemini / generate_with_groq, module1, module2, module3 and the
+pipeline all run unchanged without network or API keys:
+
+    from modules import mock_llm
+    mock_llm.install({"latency": {"distribution": "fixed", "seconds": 0.2}, "rate_limit_rate": 0.05})
+
+or set EDUPILOT_LLM_BACKEND=mock before the client is created (EDUPILOT_MOCK_CONFIG
+may hold the config as inline JSON or a path to a JSON file).
+
+Latency = time to first token (from the configured distribution) plus
+output_tokens / tokens_per_second. Every random draw is seeded from the
+seed, model, prompt and attempt number, so runs repeat exactly regardless of
+scheduling order.
+"""
+import os
+import re
+import copy
+import json
+import asyncio
+import random
+from types import SimpleNamespace
+
+from modules import telemetry
+from modules.curriculum_parser import parse_curriculum
+
+DEFAULT_CONFIG = {
+    "seed": 1234,
+    # Time to first token. distribution: fixed (seconds) | uniform (low, high) | lognormal (median_s, sigma)
+    "latency": {"distribution": "lognormal", "median_s": 0.4, "sigma": 0.35},
+    "tokens_per_second": 400,
+    "output_tokens": 600,
+    "chunk_tokens": 25,
+    # Injected failures, drawn per attempt
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "retry_after_s": 0.5,
+    # task -> canned text overriding the built-in outputs
+    "outputs": {},
+}
+
+
+class MockAPIError(Exception):
+    """Shaped like the SDK errors: carries status_code and a response with headers."""
+
+    def __init__(self, message, status_code, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)} if retry_after else {})
+
+
+def merge_config(base, override):
+    merged = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_config(value):
+    """Config from inline JSON or a JSON file path; None/empty -> defaults."""
+    if not value:
+        return {}
+    if os.path.exists(value):
+        with open(value, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+# --- Canned outputs ---
+def detect_task(prompt):
+    if "learning objectives for a course titled" in prompt:
+        return "objectives"
+    if "week university curriculum" in prompt:
+        return "curriculum"
+    if "lecture notes" in prompt:
+        return "lecture_notes"
+    if "key resources" in prompt:
+        return "reading_materials"
+    if "practical exercises" in prompt:
+        return "exercises_projects"
+    if "MCQs" in prompt:
+        return "assessment_questions"
+    return "generic"
+
+
+def _week_number(prompt):
+    match = re.search(r"\*\*Week (\d+)\*\*", prompt)
+    return int(match.group(1)) if match else 1
+
+
+def _objectives(prompt, config):
+    topic = re.search(r"titled '(.+?)'", prompt)
+    topic = topic.group(1) if topic else "the course"
+    verbs = ["Describe", "Apply", "Analyze", "Design", "Evaluate"]
+    listed = re.search(r"verbs for the \S+ level: (.+?)\.\n", prompt)
+    if listed:
+        # Structured prompts name the level's verbs; cycle through them
+        level_verbs = [verb.strip() for verb in listed.group(1).split(",")]
+        verbs = [level_verbs[i % len(level_verbs)] for i in range(5)]
+    return "\n".join(f"{i}. {verb} core concepts of {topic} in realistic scenario {i}." for i, verb in enumerate(verbs, 1))
+
+
+def _curriculum(prompt, config):
+    match = re.search(r"Generate a (\d+)-week", prompt)
+    weeks = int(match.group(1)) if match else 15
+    per_module = -(-weeks // 4)
+    lines = []
+    week = 1
+    for module in range(1, 5):
+        first, last = week, min(weeks, week + per_module - 1)
+        if first > last:
+            break
+        lines += [f"**Module {module}: Mock Module {module}**", f"Weeks: {first}-{last}", ""]
+        for week in range(first, last + 1):
+            lines += [
+                f"{week}.  **Week {week}: Mock Topic {week}**",
+                f"    *   **Topics**: Concept {week}.1, concept {week}.2 and their practical use.",
+                f"    *   **Activities**: Lab {week}: guided exercise on concept {week}.1.",
+                f"    *   **Assessment**: Quiz {week}." if week % 3 == 0 else "    *   **Assessment**: None.",
+                "",
+            ]
+        week = last + 1
+    return "\n".join(lines).strip()
+
+
+def _lecture_notes(prompt, config):
+    week = _week_number(prompt)
+    parts = [f"# Week {week} Lecture Notes", "", "## Overview", f"This week introduces mock topic {week}.", ""]
+    filler = f"Explanation of concept {week} with a worked example and common pitfalls. "
+    target_chars = config["output_tokens"] * 4
+    body = []
+    while sum(len(p) for p in body) < target_chars:
+        body.append(f"- {filler}")
+    return "\n".join(parts + ["## Key Concepts"] + body)
+
+
+MOCK_LINK_HOSTS = ["docs.example.com", "books.example.org", "articles.example.net", "video.example.com", "example.edu"]
+
+
+def _reading_materials(prompt, config):
+    week = _week_number(prompt)
+    return "\n".join(
+        f"{i}. **Resource {i} for Week {week}** - https://{host}/week-{week}/resource-{i}"
+        for i, host in enumerate(MOCK_LINK_HOSTS, 1)
+    )
+
+
+def _exercises(prompt, config):
+    week = _week_number(prompt)
+    return (
+        f"### Exercise 1\nImplement concept {week}.1 step by step.\n\n"
+        f"### Exercise 2\nDebug a broken example of concept {week}.2.\n\n"
+        f"### Project Idea\nBuild a small application combining concepts {week}.1 and {week}.2."
+    )
+
+
+# Real models repeat a few course-level questions every week; the mock does too (see modules/question_bank.py)
+REPEATED_MCQ = "Which of the following best describes the main goal of this course?"
+REPEATED_SHORT = "Summarize the key ideas covered in this course so far."
+
+
+def _assessment(prompt, config):
+    week = _week_number(prompt)
+    lines = ["### Multiple Choice Questions", ""]
+    for i in range(1, 11):
+        stem = REPEATED_MCQ if i == 10 else f"Which statement about concept {week}.{i} is correct?"
+        lines += [f"{i}. {stem}", f"   a) Option A{i}", f"   b) Option B{i}", f"   c) Option C{i}", f"   d) Option D{i}", ""]
+    lines += ["### Short Questions", ""]
+    lines += [f"{i}. {REPEATED_SHORT if i == 10 else f'Explain how concept {week}.{i} is used in practice.'}"
+              for i in range(1, 11)]
+    lines += ["", "### MCQ Answers", ""]
+    lines += [f"{i}. {'abcd'[(week + i) % 4]}" for i in range(1, 11)]
+    lines += ["", "### Short Question Answers", ""]
+    lines += [f"{i}. Concept {week}.{i} is used to solve problem {i}." for i in range(1, 11)]
+    return "\n".join(lines)
+
+
+def _objectives_json(prompt, config):
+    objectives = [re.sub(r"^\d+\.\s*", "", line) for line in _objectives(prompt, config).splitlines()]
+    return json.dumps({"objectives": objectives})
+
+
+def _curriculum_json(prompt, config):
+    structure = parse_curriculum(_curriculum(prompt, config))
+    return json.dumps({"modules": [
+        {"number": module["number"], "title": module["title"], "weeks": [
+            {key: week[key] for key in ("number", "title", "topics", "activities", "assessment")} for week in module["weeks"]
+        ]} for module in structure["modules"]
+    ]})
+
+
+# JSON variants returned when a call asks for structured output (response_schema)
+CANNED_JSON = {
+    "objectives": _objectives_json,
+    "curriculum": _curriculum_json,
+}
+
+CANNED = {
+    "objectives": _objectives,
+    "curriculum": _curriculum,
+    "lecture_notes": _lecture_notes,
+    "reading_materials": _reading_materials,
+    "exercises_projects": _exercises,
+    "assessment_questions": _assessment,
+    "generic": lambda prompt, config: "Mock response.",
+}
+
+
+# --- Provider ---
+class MockProvider:
+    def __init__(self, name="mock", config=None):
+        self.name = name
+        self.config = merge_config(DEFAULT_CONFIG, config)
+        self.calls = 0
+        self._attempts = {}
+
+    def _rng(self, model, prompt):
+        key = (model, prompt)
+        attempt = self._attempts.get(key, 0)
+        self._attempts[key] = attempt + 1
+        return random.Random(f"{self.config['seed']}:{self.name}:{model}:{attempt}:{prompt}")
+
+    def _ttft(self, rng):
+        latency = self.config["latency"]
+        kind = latency.get("distribution", "fixed")
+        if kind == "uniform":
+            return rng.uniform(latency["low"], latency["high"])
+        if kind == "lognormal":
+            return rng.lognormvariate(0, latency.get("sigma", 0.3)) * latency["median_s"]
+        return latency.get("seconds", 0.0)
+
+    def _maybe_fail(self, rng):
+        roll = rng.random()
+        if roll < self.config["rate_limit_rate"]:
+            raise MockAPIError(f"{self.name}: 429 Too Many Requests (mock)", 429, self.config["retry_after_s"])
+        if roll < self.config["rate_limit_rate"] + self.config["error_rate"]:
+            raise MockAPIError(f"{self.name}: 503 Service Unavailable (mock)", 503)
+
+    def _text(self, prompt, params):
+        task = detect_task(prompt)
+        canned = self.config["outputs"].get(task)
+        if canned is not None:
+            return canned
+        if params.get("response_schema") is not None and task in CANNED_JSON:
+            return CANNED_JSON[task](prompt, self.config)
+        return CANNED[task](prompt, self.config)
+
+    async def generate(self, model, prompt, **params):
+        self.calls += 1
+        rng = self._rng(model, prompt)
+        await asyncio.sleep(self._ttft(rng))
+        self._maybe_fail(rng)
+        text = self._text(prompt, params)
+        await asyncio.sleep(self.config["output_tokens"] / self.config["tokens_per_second"])
+        telemetry.record_usage(len(prompt) // 4, self.config["output_tokens"])
+        return text
+
+    async def stream(self, model, prompt, **params):
+        self.calls += 1
+        rng = self._rng(model, prompt)
+        await asyncio.sleep(self._ttft(rng))
+        self._maybe_fail(rng)
+        text = self._text(prompt, params)
+        chunk_chars = self.config["chunk_tokens"] * 4
+        chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [text]
+        delay = self.config["output_tokens"] / self.config["tokens_per_second"] / len(chunks)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(delay)
+            yield chunk
+        telemetry.record_usage(len(prompt) // 4, self.config["output_tokens"])
+
+
+def install(config=None, providers=("gemini", "groq"), per_provider=None):
+    """
+    Replaces the named providers with mocks in the LLM client registry and drops
+    any real provider the client already created. per_provider maps a provider
+    name to config overrides on top of config. Returns {name: MockProvider}.
+    """
+    from modules import llm_client
+
+    mocks = {}
+    for name in providers:
+        mock = MockProvider(name, merge_config(config or {}, (per_provider or {}).get(name)))
+        llm_client.register_provider(name, lambda mock=mock: mock)
+        mocks[name] = mock
+    client = llm_client._client
+    if client is not None:
+        with client._lock:
+            for name in providers:
+                client._providers.pop(name, None)
+    return mocks
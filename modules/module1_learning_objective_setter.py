@@ -1,18 +1,12 @@
-import os
-import json
-from dotenv import load_dotenv
-from google import generativeai as genai
-
-# Load environment variables
-load_dotenv()
-
-# Configure Gemini
-GEMINI_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_KEY)
-
-# Data storage path
-DATA_PATH = r"D:\AI_MID_Project_Data\api_downloads\Objectives"
-os.makedirs(DATA_PATH, exist_ok=True)
+import asyncio
+from modules import telemetry
+from modules.llm_client import get_client
+from modules.artifact_store import get_store, fingerprint
+from modules.settings import get_settings
+from modules.llm_errors import InvalidStructuredOutputError
+from modules.structured_output import (
+    OBJECTIVES_SCHEMA, structured_enabled, generate_validated, parse_objectives, report_notes
+)
 
 # Bloom's taxonomy verbs
 BLOOM_VERBS = {
@@ -22,9 +16,23 @@ BLOOM_VERBS = {
     "Professional": ["Implement", "Optimize", "Strategize", "Lead"]
 }
 
-def generate_learning_objectives(topic, level, credit_hours):
-    try:
-        prompt = f"""
+def build_objectives_prompt(topic, level, credit_hours, structured=False):
+    if structured:
+        verbs = ", ".join(BLOOM_VERBS.get(level, []))
+        return f"""
+        You are an academic course designer.
+
+        Generate 5 measurable learning objectives for a course titled '{topic}'.
+        Audience: {level} students.
+        Course Duration: {credit_hours} credit hours.
+
+        Start each objective with one of these Bloom’s Taxonomy verbs for the {level} level: {verbs}.
+        Focus on both technical and practical skills that are highly relevant in today's job market.
+
+        Return only a JSON object of the form {{"objectives": ["...", "...", "...", "...", "..."]}}
+        with exactly 5 objective strings, without numbering or markdown.
+        """
+    return f"""
         You are an academic course designer.
 
         Generate 5 measurable learning objectives for a course titled '{topic}'.
@@ -37,25 +45,81 @@ def generate_learning_objectives(topic, level, credit_hours):
         Return only the numbered list of objectives.
         """
 
-        # Generate response using Gemini
-        model = genai.GenerativeModel("gemini-2.5-pro")
-        response = model.generate_content(prompt)
+def _save_objectives(topic, objectives, prompt_hash=None, notes=None):
+    meta = {"prompt_hash": prompt_hash} if prompt_hash else {}
+    if notes is not None:
+        meta.update(structured=True, notes=notes)
+    return get_store().put(
+        "objectives", {"topic": topic, "objectives": objectives}, course=topic, meta=meta or None
+    )
 
-        # Extract text safely
-        if not hasattr(response, "text") or not response.text:
-            raise ValueError("No valid response text from Gemini API.")
+async def generate_learning_objectives_async(topic, level, credit_hours, use_cache=True, refresh=False, structured=None):
+    """
+    Non-blocking objective generation; returns (objectives, artifact_id), or ([], None) on failure.
+    use_cache=False skips the shared response cache (and the semantic cache, see
+    modules/semantic_cache.py); refresh=True forces a new model call and
+    overwrites the cached answer. structured=True (default: EDUPILOT_STRUCTURED_OUTPUT)
+    requests JSON and validates/repairs it with modules/structured_output.py.
+    """
+    try:
+        structured = structured_enabled(structured)
+        prompt = build_objectives_prompt(topic, level, credit_hours, structured)
+        verbs = BLOOM_VERBS.get(level, [])
+        objectives = notes = None
+
+        # Near-duplicate requests ("Web Dev" vs "Web Development") reuse an earlier answer when enabled
+        semantic = None
+        if use_cache and get_settings().semantic_cache:
+            from modules.semantic_cache import get_semantic_cache  # loads NumPy, so only when enabled
+            semantic = get_semantic_cache()
+        # Level and credit hours must match exactly; only the topic is compared by similarity
+        request, scope = topic, f"{credit_hours}|{level}" + ("|json" if structured else "")
+        match = None
+        if semantic and not refresh:
+            with telemetry.labels(stage="objectives"):
+                match = await asyncio.to_thread(semantic.lookup, "objectives", request, scope)
 
-        objectives_text = response.text.strip()
-        objectives = [line.strip() for line in objectives_text.split("\n") if line.strip()]
+        if match:
+            from modules.semantic_cache import report_hit, adapt_text
+            report_hit("objectives", match, topic)
+            objectives_text = adapt_text(match.response, match.meta.get("topic"), topic)
+            if structured:
+                try:
+                    objectives, notes = parse_objectives(objectives_text, verbs)
+                except InvalidStructuredOutputError as e:
+                    print(f"⚠️ Ignoring semantic cache hit: {e}")
+                    match = None
+        if not match:
+            # Generate response (routed to Gemini 2.5 Pro by default, served from the response cache when possible)
+            with telemetry.labels(stage="objectives"):
+                if structured:
+                    objectives_text, objectives, notes = await generate_validated(
+                        get_client(), "objectives", prompt, OBJECTIVES_SCHEMA,
+                        lambda text: parse_objectives(text, verbs), use_cache=use_cache, refresh=refresh
+                    )
+                else:
+                    objectives_text = (await get_client().generate(
+                        "objectives", prompt, use_cache=use_cache, refresh=refresh
+                    )).strip()
+            if semantic:
+                await asyncio.to_thread(semantic.add, "objectives", request, objectives_text, scope, {"topic": topic})
 
-        # Save output
-        filename = f"{topic.replace(' ', '_')}_learning_objectives.json"
-        filepath = os.path.join(DATA_PATH, filename)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump({"topic": topic, "objectives": objectives}, f, indent=4)
+        if structured:
+            report_notes("Objectives", notes)
+        else:
+            objectives = [line.strip() for line in objectives_text.split("\n") if line.strip()]
 
-        return objectives, filepath
+        # Save output, recording which prompt produced it (and any local repairs)
+        artifact_id = await asyncio.to_thread(_save_objectives, topic, objectives, fingerprint(prompt), notes)
+
+        return objectives, artifact_id
 
     except Exception as e:
-        print(f"❌ Error generating objectives (Gemini): {e}")
+        print(f"❌ Error generating objectives: {e}")
         return [], None
+
+def generate_learning_objectives(topic, level, credit_hours, use_cache=True, refresh=False, structured=None):
+    """Blocking wrapper around generate_learning_objectives_async."""
+    return get_client().run(generate_learning_objectives_async(
+        topic, level, credit_hours, use_cache=use_cache, refresh=refresh, structured=structured
+    ))
@@ -1,46 +1,36 @@
-import os
-import json
-from dotenv import load_dotenv
-from google import generativeai as genai
-
-# Load environment variables
-load_dotenv()
-
-# Configure Gemini
-GEMINI_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_KEY)
+import asyncio
+from modules import telemetry
+from modules.llm_client import get_client
+from modules.curriculum_parser import parse_curriculum
+from modules.artifact_store import get_store, is_artifact_id, load_json, fingerprint
+from modules.settings import get_settings
+from modules.structured_output import (
+    CURRICULUM_SCHEMA, structured_enabled, generate_validated, parse_curriculum_json, report_notes
+)
+
+def build_curriculum_prompt(learning_objectives, semester_weeks, approach, assessments_str, structured=False):
+    if structured:
+        return f"""
+        You are an expert academic course designer.
 
-# Data storage path
-DATA_PATH = r"D:\AI_MID_Project_Data\api_downloads\curriculums"
-os.makedirs(DATA_PATH, exist_ok=True)
+Generate a {semester_weeks}-week university curriculum based on the following learning objectives:
 
-def generate_curriculum(input_data, semester_weeks=15, approach="Project-based", assessments="Mixed"):
-    """
-    Generate a structured weekly curriculum using Gemini 2.5 Pro.
+{learning_objectives}
 
-    input_data: list of learning objectives OR path to JSON from Module 1
-    semester_weeks: int
-    approach: str, e.g., Project-based / Theory / Blended
-    assessments: list or str, e.g., ["Quizzes", "Projects"]
-    """
-    try:
-        # Load learning objectives if input is a JSON file
-        if isinstance(input_data, str) and input_data.endswith(".json"):
-            with open(input_data, "r", encoding="utf-8") as f:
-                obj = json.load(f)
-                learning_objectives = obj.get("objectives", [])
-                course_name = obj.get("topic", "Unknown Course")
-        else:
-            learning_objectives = input_data
-            course_name = "Custom Course"
+Course Parameters:
+- Pedagogical Approach: {approach}
+- Assessment Preferences: {assessments_str}
+- Duration: {semester_weeks} weeks
 
-        # Convert assessments to string if list
-        if isinstance(assessments, list):
-            assessments_str = ", ".join(assessments)
-        else:
-            assessments_str = assessments
+Requirements:
+1. Divide the course into exactly 4 modules, numbered 1-4, each covering consecutive weeks.
+2. Cover every week from 1 to {semester_weeks} exactly once, numbered in order.
+3. For each week, provide the topics, the activities and the assessment ("None" if there is none).
 
-        prompt = f"""
+Return only a JSON object of this shape, without markdown:
+{{"modules": [{{"number": 1, "title": "...", "weeks": [{{"number": 1, "title": "...", "topics": "...", "activities": "...", "assessment": "..."}}]}}]}}
+"""
+    return f"""
         You are an expert academic course designer.
 
 Generate a {semester_weeks}-week university curriculum based on the following learning objectives:
@@ -70,15 +60,88 @@ Requirements:
 Ensure the output is ready for Streamlit expanders.
 """
 
-        # Generate response using Gemini
-        model = genai.GenerativeModel("gemini-2.5-pro")
-        response = model.generate_content(prompt)
+def objective_lines(objectives):
+    """Objectives as a list: pasted text (as in app2) is split into its non-empty lines."""
+    if isinstance(objectives, str):
+        return [line.strip() for line in objectives.splitlines() if line.strip()]
+    return list(objectives or [])
+
+def _save_curriculum(course_name, curriculum_json, prompt_hash=None, notes=None):
+    meta = {"prompt_hash": prompt_hash} if prompt_hash else {}
+    if notes is not None:
+        meta.update(structured=True, notes=notes)
+    return get_store().put("curriculum", curriculum_json, course=course_name, meta=meta or None)
+
+async def generate_curriculum_async(input_data, semester_weeks=15, approach="Project-based", assessments="Mixed", use_cache=True, refresh=False, course_name=None, structured=None):
+    """
+    Non-blocking curriculum generation; returns (curriculum_text, artifact_id), or ("", None) on failure.
+
+    Generate a structured weekly curriculum using Gemini 2.5 Pro (the "curriculum" route in modules/llm_client.py).
+
+    input_data: list of learning objectives (or pasted text, one per line) OR Module 1 artifact id / path to its JSON
+    semester_weeks: int
+    approach: str, e.g., Project-based / Theory / Blended
+    assessments: list or str, e.g., ["Quizzes", "Projects"]
+    use_cache: bool, read/write the shared response cache (and the semantic cache when enabled)
+    refresh: bool, ignore any cached answer and store the fresh one
+    course_name: str, names the course when input_data is a plain list of objectives
+    structured: bool, request JSON and validate/repair it locally (default: EDUPILOT_STRUCTURED_OUTPUT);
+                the result is rendered to the usual curriculum text
+    """
+    try:
+        # Load learning objectives if input is a stored artifact or a JSON file
+        if isinstance(input_data, str) and (is_artifact_id(input_data) or input_data.endswith(".json")):
+            obj = await asyncio.to_thread(load_json, input_data)
+            learning_objectives = obj.get("objectives", [])
+            course_name = course_name or obj.get("topic", "Unknown Course")
+        else:
+            learning_objectives = objective_lines(input_data)
+            course_name = course_name or "Custom Course"
 
-        # Extract text safely
-        if not hasattr(response, "text") or not response.text:
-            raise ValueError("No valid response text from Gemini API.")
+        # Convert assessments to string if list
+        if isinstance(assessments, list):
+            assessments_str = ", ".join(assessments)
+        else:
+            assessments_str = assessments
 
-        curriculum_text = response.text.strip()
+        structured = structured_enabled(structured)
+        prompt = build_curriculum_prompt(learning_objectives, semester_weeks, approach, assessments_str, structured)
+        notes = None
+
+        # Near-duplicate objective sets with the same weeks/approach/assessments reuse an earlier curriculum when enabled
+        semantic = None
+        if use_cache and get_settings().semantic_cache:
+            from modules.semantic_cache import get_semantic_cache  # loads NumPy, so only when enabled
+            semantic = get_semantic_cache()
+        request = f"{' '.join(map(str, learning_objectives))} | {course_name}"
+        scope = f"{semester_weeks}|{approach}|{assessments_str}" + ("|json" if structured else "")
+        match = None
+        if semantic and not refresh:
+            with telemetry.labels(stage="curriculum"):
+                match = await asyncio.to_thread(semantic.lookup, "curriculum", request, scope)
+
+        if match:
+            from modules.semantic_cache import report_hit, adapt_text
+            report_hit("curriculum", match, course_name)
+            curriculum_text = adapt_text(match.response, match.meta.get("course_name"), course_name)
+        else:
+            # Generate response (routed to Gemini 2.5 Pro by default, served from the response cache when possible)
+            with telemetry.labels(stage="curriculum"):
+                if structured:
+                    # The validated JSON is rendered to markdown, so everything downstream sees the usual text
+                    _, curriculum_text, notes = await generate_validated(
+                        get_client(), "curriculum", prompt, CURRICULUM_SCHEMA,
+                        lambda text: parse_curriculum_json(text, semester_weeks), use_cache=use_cache, refresh=refresh
+                    )
+                    report_notes("Curriculum", notes)
+                else:
+                    curriculum_text = (await get_client().generate(
+                        "curriculum", prompt, use_cache=use_cache, refresh=refresh
+                    )).strip()
+            if semantic:
+                await asyncio.to_thread(
+                    semantic.add, "curriculum", request, curriculum_text, scope, {"course_name": course_name}
+                )
 
         # Save curriculum to JSON in a structured format for Module 3
         curriculum_json = {
@@ -87,16 +150,22 @@ Ensure the output is ready for Streamlit expanders.
             "assessments": assessments_str,
             "semester_weeks": semester_weeks,
             "learning_objectives": learning_objectives,
-            "curriculum_text": curriculum_text
+            "curriculum_text": curriculum_text,
+            # Parsed once here so Module 3 and the apps can index weeks without re-parsing
+            "curriculum_structure": parse_curriculum(curriculum_text)
         }
 
-        filename = f"{course_name.replace(' ', '_')}_curriculum.json"
-        filepath = os.path.join(DATA_PATH, filename)
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(curriculum_json, f, indent=4)
+        artifact_id = await asyncio.to_thread(_save_curriculum, course_name, curriculum_json, fingerprint(prompt), notes)
 
-        return curriculum_text, filepath
+        return curriculum_text, artifact_id
 
     except Exception as e:
-        print(f"❌ Error generating curriculum (Gemini): {e}")
+        print(f"❌ Error generating curriculum: {e}")
         return "", None
+
+def generate_curriculum(input_data, semester_weeks=15, approach="Project-based", assessments="Mixed", use_cache=True, refresh=False, course_name=None, structured=None):
+    """Blocking wrapper around generate_curriculum_async (same arguments and return value)."""
+    return get_client().run(generate_curriculum_async(
+        input_data, semester_weeks, approach, assessments, use_cache=use_cache, refresh=refresh, course_name=course_name,
+        structured=structured
+    ))
@@ -1,121 +1,327 @@
-import os
-import json
 import asyncio
-from dotenv import load_dotenv
-import google.generativeai as genai
-from groq import AsyncGroq
-
-# Load environment variables
-load_dotenv()
-
-# --- API KEY CONFIGURATION ---
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
-# Configure Gemini
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
-    print("⚠️ Gemini API Key not found. Please set it in your .env file.")
-
-# --- Data storage path ---
-DATA_PATH = r"D:\AI_MID_Project_Data\api_downloads\generated_content"
-os.makedirs(DATA_PATH, exist_ok=True)
-
-# --- MODEL AND CLIENT INITIALIZATION ---
-gemini_model = None
-if GEMINI_API_KEY:
-    gemini_model = genai.GenerativeModel("gemini-2.5-flash")
-
-groq_client = None
-if GROQ_API_KEY:
-    groq_client = AsyncGroq(api_key=GROQ_API_KEY)
-else:
-    print("⚠️ Groq API Key not found. Please set it in your .env file.")
-
-
-async def generate_with_gemini(model, prompt):
-    """Asynchronously generates content using a Gemini model."""
-    if not model:
-        return "Error: Gemini model is not initialized. Check API key."
-    try:
-        # No need for artificial sleep in parallel execution
-        response = await model.generate_content_async(prompt)
-        return response.text
-    except Exception as e:
-        return f"Error with Gemini: {e}"
-
-async def generate_with_groq(client, prompt):
-    """Asynchronously generates content using a Groq model."""
-    if not client:
-        return "Error: Groq client is not initialized. Check API key."
-    try:
-        # No need for artificial sleep in parallel execution
-        chat_completion = await client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-        )
-        return chat_completion.choices[0].message.content
-    except Exception as e:
-        return f"Error with Groq: {e}"
+from modules import telemetry
+from modules.llm_client import get_client
+from modules.curriculum_parser import get_structure, find_week, course_outline
+from modules.llm_errors import IncompleteGenerationError
+from modules.artifact_store import get_store, load_json, fingerprint
+from modules.settings import get_settings
+from modules.link_checker import verify_reading_materials
 
+# --- Default models for direct provider calls (section routing lives in modules/llm_client.py) ---
+GEMINI_MODEL = "gemini-2.5-flash"
+GROQ_MODEL = "llama-3.1-8b-instant"
 
-# --- UPDATED: Integrated logic from reference code ---
-async def generate_course_content(curriculum_json_path, week_number=1, complexity="Intermediate", multimedia_prefs=None):
+
+async def generate_with_gemini(model, prompt, use_cache=True, refresh=False):
     """
-    Generates comprehensive course content for a specific week by running API calls in parallel.
+    Asynchronously generates content using a Gemini model (name, or None for GEMINI_MODEL).
+    Goes through the shared cache and rate limiter; failures raise an LLMError subclass.
     """
-    if not multimedia_prefs:
-        multimedia_prefs = ["Text", "Books", "Articles"] # Default if none are selected
+    return await get_client().call("gemini", model or GEMINI_MODEL, prompt, use_cache=use_cache, refresh=refresh)
+
+async def generate_with_groq(model, prompt, use_cache=True, refresh=False):
+    """Asynchronously generates content using a Groq model (name, or None for GROQ_MODEL)."""
+    return await get_client().call("groq", model or GROQ_MODEL, prompt, use_cache=use_cache, refresh=refresh)
+
+
+# --- Streaming variants ---
+async def stream_with_gemini(model, prompt, use_cache=True, refresh=False):
+    """Async generator of text chunks from Gemini (stream=True); a cache hit arrives as one chunk."""
+    async for chunk in get_client().stream_call("gemini", model or GEMINI_MODEL, prompt, use_cache=use_cache, refresh=refresh):
+        yield chunk
 
-    with open(curriculum_json_path, "r", encoding="utf-8") as f:
-        curriculum_data = json.load(f)
+async def stream_with_groq(model, prompt, use_cache=True, refresh=False):
+    """Async generator of text chunks from a Groq streaming chat completion."""
+    async for chunk in get_client().stream_call("groq", model or GROQ_MODEL, prompt, use_cache=use_cache, refresh=refresh):
+        yield chunk
 
+
+# --- Section routing and concurrency limits ---
+SECTIONS = ["lecture_notes", "reading_materials", "exercises_projects", "assessment_questions"]
+
+# Max in-flight requests per provider during semester runs (override with <PROVIDER>_MAX_CONCURRENCY)
+DEFAULT_MAX_CONCURRENCY = 10
+
+
+def make_provider_limits():
+    """One semaphore per provider; create inside the event loop that will use them."""
+    return {
+        provider: asyncio.Semaphore(get_settings().provider_value(provider, "MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+        for provider in ("gemini", "groq")
+    }
+
+
+def load_curriculum(curriculum_ref):
+    """curriculum_ref: Module 2 artifact id, or a path to its JSON (e.g. an uploaded file)."""
+    return load_json(curriculum_ref)
+
+
+def build_base_prompt(curriculum_data, week_number, complexity="Intermediate"):
+    """
+    Shared context for a week's prompts: a compact course outline plus only that
+    week's plan. Falls back to the full curriculum text if the week can't be found.
+    """
     course_name = curriculum_data.get("course_name", "Unknown Course")
-    curriculum_text = curriculum_data.get("curriculum_text", "")
+    structure = get_structure(curriculum_data)
+    module, week = find_week(structure, week_number)
 
-    base_prompt = (
+    if week is None:
+        return (
+            f"You are an expert instructional designer creating content for a university course.\n"
+            f"Course: {course_name}\n"
+            f"Overall Curriculum:\n{curriculum_data.get('curriculum_text', '')}\n"
+            f"Learning Complexity: {complexity}\n\n"
+            f"Your task is to generate content *only* for the topics and activities listed for **Week {week_number}** in the curriculum."
+        )
+
+    return (
         f"You are an expert instructional designer creating content for a university course.\n"
         f"Course: {course_name}\n"
-        f"Overall Curriculum:\n{curriculum_text}\n"
+        f"Course Outline:\n{course_outline(structure)}\n\n"
+        f"Week {week_number} Plan ({module['header']}):\n{week['text']}\n"
         f"Learning Complexity: {complexity}\n\n"
-        f"Your task is to generate content *only* for the topics and activities listed for **Week {week_number}** in the curriculum."
+        f"Your task is to generate content *only* for the topics and activities listed for **Week {week_number}** in the plan above."
     )
 
+
+def build_week_prompts(curriculum_data, week_number, complexity="Intermediate", multimedia_prefs=None):
+    """Builds the four section prompts for one week of the curriculum."""
+    if not multimedia_prefs:
+        multimedia_prefs = ["Text", "Books", "Articles"] # Default if none are selected
+
+    base_prompt = build_base_prompt(curriculum_data, week_number, complexity)
     multimedia_str = ", ".join(multimedia_prefs)
 
-    prompts = {
+    return {
         "lecture_notes": f"{base_prompt}\n\nGenerate detailed lecture notes for **Week {week_number}**. The notes should be clear, comprehensive, and include practical examples and explanations suitable for the specified complexity level.",
         "reading_materials": f"{base_prompt}\n\nProvide a list of 5-7 key resources that are highly relevant to the topics of **Week {week_number}**. Based on the user's preferences, please include a mix of the following types: **{multimedia_str}**. Provide links where applicable.",
         "exercises_projects": f"{base_prompt}\n\nDesign two practical exercises and one project idea that directly correspond to the learning objectives and activities planned for **Week {week_number}**.",
         "assessment_questions": f"{base_prompt}\n\nDevelop a set of 10 MCQs and 10 Short Questions that specifically test the knowledge and skills covered in **Week {week_number}**.After writing the questions, provide a concise answer key. The order should be MCQs first followed by Short Questions than MCQs answers and then Short Questions answers."
     }
 
+
+def prompt_hashes(prompts):
+    """{section: hash of its rendered prompt}; recorded with each week so stale sections can be detected."""
+    return {section: fingerprint(prompt) for section, prompt in prompts.items()}
+
+
+def save_week_content(course_name, week_number, generated_content, prompts=None):
+    """Stores a week's sections (with the hashes of the prompts that produced them); returns the artifact id."""
+    meta = {"prompt_hashes": prompt_hashes(prompts)} if prompts else None
+    return get_store().put("week_content", generated_content, course=course_name, week=week_number, meta=meta)
+
+
+def is_week_complete(generated_content):
+    """True when every section holds real content (older runs saved "Error ..." strings as content)."""
+    return all(_section_ok(generated_content, section) for section in SECTIONS)
+
+
+# What the old generate_with_* helpers returned instead of raising; weeks saved by them hold these as content
+LEGACY_ERROR_PREFIXES = (
+    "Error with Gemini:",
+    "Error with Groq:",
+    "Error: Gemini model is not initialized",
+    "Error: Groq client is not initialized",
+)
+
+
+def _section_ok(content, section):
+    text = content.get(section)
+    return isinstance(text, str) and bool(text.strip()) and not text.startswith(LEGACY_ERROR_PREFIXES)
+
+
+def load_week_state(course_name, week_number, prompts):
+    """
+    Latest stored version of a week checked against the current prompts.
+    Returns (content, artifact_id, stale_sections): a section is stale when it is
+    missing/failed or was produced by a different prompt. Weeks stored without
+    prompt hashes count as up to date if complete.
+    """
+    store = get_store()
+    artifact_id = store.latest("week_content", course_name, week_number)
+    if artifact_id is None:
+        return {}, None, list(prompts)
+    try:
+        content = store.get(artifact_id)
+        stored_hashes = (store.info(artifact_id)["meta"] or {}).get("prompt_hashes", {})
+    except (OSError, ValueError, KeyError):
+        return {}, None, list(prompts)
+    current = prompt_hashes(prompts)
+    stale = [
+        section for section in prompts
+        if not _section_ok(content, section) or (stored_hashes and stored_hashes.get(section) != current[section])
+    ]
+    return content, artifact_id, stale
+
+
+async def _post_process(section, text):
+    """Checks the links in reading materials (modules/link_checker.py); other sections pass through."""
+    if section == "reading_materials":
+        return await verify_reading_materials(text)
+    return text
+
+
+async def generate_section(section, prompt, limits=None, use_cache=True, refresh=False):
+    """Runs one section prompt on its routed model; the client holds the semaphore in limits of each provider it calls."""
+    with telemetry.labels(stage="content", section=section):
+        text = await get_client().generate(section, prompt, use_cache=use_cache, refresh=refresh, limits=limits)
+        # Outside the provider slot: link checks overlap with the week's other sections
+        return await _post_process(section, text)
+
+
+async def stream_section(section, prompt, on_chunk, limits=None, use_cache=True, refresh=False):
+    """Streams one section, calling on_chunk(section, chunk) per chunk; returns the full text."""
+    pieces = []
+    with telemetry.labels(stage="content", section=section):
+        async for chunk in get_client().stream(section, prompt, use_cache=use_cache, refresh=refresh, limits=limits):
+            pieces.append(chunk)
+            if on_chunk:
+                on_chunk(section, chunk)
+        return await _post_process(section, "".join(pieces))
+
+
+async def _gather_or_cancel(coros):
+    """gather() that cancels the remaining coroutines as soon as one fails."""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def generate_week_sections(prompts, limits=None, use_cache=True, refresh=False):
+    """
+    Runs the sections in prompts (normally all four) concurrently; if one fails
+    the others are cancelled and the error is raised.
+    """
+    sections = [section for section in SECTIONS if section in prompts]
+    results = await _gather_or_cancel(
+        generate_section(section, prompts[section], limits, use_cache, refresh)
+        for section in sections
+    )
+    return dict(zip(sections, results))
+
+
+async def stream_week_sections(prompts, on_chunk, limits=None, use_cache=True, refresh=False):
+    """Streaming counterpart of generate_week_sections."""
+    sections = [section for section in SECTIONS if section in prompts]
+    results = await _gather_or_cancel(
+        stream_section(section, prompts[section], on_chunk, limits, use_cache, refresh)
+        for section in sections
+    )
+    return dict(zip(sections, results))
+
+
+# --- UPDATED: Integrated logic from reference code ---
+async def generate_course_content(curriculum_ref, week_number=1, complexity="Intermediate", multimedia_prefs=None, use_cache=True, refresh=False):
+    """
+    Generates comprehensive course content for a specific week by running API calls in parallel.
+    use_cache/refresh are passed to every call (see modules/llm_cache.py).
+    Returns (content, artifact_id).
+    """
+    curriculum_data = load_curriculum(curriculum_ref)
+    course_name = curriculum_data.get("course_name", "Unknown Course")
+    prompts = build_week_prompts(curriculum_data, week_number, complexity, multimedia_prefs)
+
     # --- OPTIMIZATION: Run API calls in parallel ---
     print(f"Generating content for Week {week_number} in parallel...")
 
-    tasks = [
-        generate_with_gemini(gemini_model, prompts["lecture_notes"]),
-        generate_with_groq(groq_client, prompts["reading_materials"]),
-        generate_with_gemini(gemini_model, prompts["exercises_projects"]),
-        generate_with_groq(groq_client, prompts["assessment_questions"])
-    ]
+    with telemetry.labels(week=week_number):
+        generated_content = await generate_week_sections(prompts, use_cache=use_cache, refresh=refresh)
+    artifact_id = save_week_content(course_name, week_number, generated_content, prompts)
 
-    results = await asyncio.gather(*tasks)
+    return generated_content, artifact_id
 
-    lecture_notes, reading_materials, exercises_projects, assessment_questions = results
 
-    generated_content = {
-        "lecture_notes": lecture_notes,
-        "reading_materials": reading_materials,
-        "exercises_projects": exercises_projects,
-        "assessment_questions": assessment_questions,
-    }
+async def stream_course_content(curriculum_ref, week_number=1, complexity="Intermediate", multimedia_prefs=None,
+                                on_chunk=None, use_cache=True, refresh=False):
+    """
+    Streaming version of generate_course_content: on_chunk(section, chunk) is called
+    as text arrives from each of the four sections. The week is stored once,
+    after every section has finished. Returns (content, artifact_id).
+    """
+    curriculum_data = load_curriculum(curriculum_ref)
+    course_name = curriculum_data.get("course_name", "Unknown Course")
+    prompts = build_week_prompts(curriculum_data, week_number, complexity, multimedia_prefs)
+
+    with telemetry.labels(week=week_number):
+        generated_content = await stream_week_sections(prompts, on_chunk, use_cache=use_cache, refresh=refresh)
+    artifact_id = save_week_content(course_name, week_number, generated_content, prompts)
+
+    return generated_content, artifact_id
 
-    output_filename = f"{course_name.replace(' ', '_')}_Week_{week_number}_content.json"
-    output_filepath = os.path.join(DATA_PATH, output_filename)
-    with open(output_filepath, "w", encoding="utf-8") as f:
-        json.dump(generated_content, f, indent=4)
 
-    return generated_content, output_filepath
+async def generate_semester_content(curriculum_ref, weeks=None, complexity="Intermediate", multimedia_prefs=None,
+                                    resume=True, use_cache=True, refresh=False, on_week_done=None):
+    """
+    Generates content for many weeks at once through a single event loop.
+
+    All week x section prompts are scheduled together; in-flight calls are capped
+    per provider (GEMINI_MAX_CONCURRENCY / GROQ_MAX_CONCURRENCY in .env). Each week is
+    stored as soon as its four sections finish. With resume=True, each week's
+    latest stored version is checked against the current prompts and only the
+    stale sections (changed prompt, missing or failed) are regenerated.
 
+    weeks: iterable of week numbers, defaults to every week in the curriculum
+    on_week_done: optional callback(week_number, content, artifact_id)
+
+    Returns ({week: content}, {week: artifact_id}). If any week fails, the remaining
+    weeks still finish and an IncompleteGenerationError carrying the partial
+    results is raised at the end; rerunning resumes from the failed weeks.
+    """
+    curriculum_data = load_curriculum(curriculum_ref)
+    course_name = curriculum_data.get("course_name", "Unknown Course")
+    if weeks is None:
+        weeks = range(1, int(curriculum_data.get("semester_weeks", 15)) + 1)
+
+    limits = make_provider_limits()
+    semester_content, artifact_ids = {}, {}
+
+    async def run_week(week_number, prompts, existing, stale):
+        try:
+            with telemetry.labels(week=week_number):
+                fresh = await generate_week_sections({s: prompts[s] for s in stale}, limits, use_cache, refresh)
+        except Exception as e:
+            return week_number, prompts, e
+        return week_number, prompts, {section: fresh.get(section, existing.get(section)) for section in SECTIONS}
+
+    failures = {}
+    pending = []
+    stale_count = 0
+    for week_number in weeks:
+        prompts = build_week_prompts(curriculum_data, week_number, complexity, multimedia_prefs)
+        existing, artifact_id, stale = load_week_state(course_name, week_number, prompts) if resume and not refresh else ({}, None, list(prompts))
+        if not stale:
+            semester_content[week_number] = existing
+            artifact_ids[week_number] = artifact_id
+            continue
+        stale_count += len(stale)
+        pending.append(run_week(week_number, prompts, existing, stale))
+
+    print(f"Generating {stale_count} section(s) in {len(pending)} week(s) for {course_name} "
+          f"({len(semester_content)} week(s) up to date)...")
+
+    for finished in asyncio.as_completed(pending):
+        week_number, prompts, content = await finished
+        if isinstance(content, Exception):
+            print(f"❌ Week {week_number} failed: {content}")
+            failures[week_number] = content
+            continue
+        artifact_id = save_week_content(course_name, week_number, content, prompts)
+        semester_content[week_number] = content
+        artifact_ids[week_number] = artifact_id
+        if on_week_done:
+            on_week_done(week_number, content, artifact_id)
+
+    ordered = sorted(semester_content)
+    semester_content = {w: semester_content[w] for w in ordered}
+    artifact_ids = {w: artifact_ids[w] for w in ordered}
+    if failures:
+        raise IncompleteGenerationError(
+            f"{len(failures)} week(s) failed: {sorted(failures)}",
+            results=semester_content, filepaths=artifact_ids, failures=failures
+        )
+    return semester_content, artifact_ids
@@ -0,0 +1,437 @@
+"""
+End-to-end course pipeline: objectives -> curriculum -> weekly content, run as a DAG.
+
+Every node (objectives, curriculum, each week's four sections, each week's
+assembly) starts as soon as its dependencies finish, so all weeks and sections
+run concurrently under the per-provider limits. Each node's result is
+checkpointed in the run directory together with a fingerprint of its inputs
+(prompt, routes, upstream results); rerunning the same command resumes from
+the last good node instead of starting over, and "regenerate" redoes only the
+nodes whose inputs changed.
+
+    python -m modules.pipeline --topic "Web Development" --level Graduate --weeks 15
+    python -m modules.pipeline regenerate --run-dir RUN_DIR --week-complexity 3=Advanced
+    python -m modules.pipeline regenerate --run-dir RUN_DIR --objective 2 "Design REST APIs"
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+
+from modules import telemetry
+from modules.llm_client import get_client
+from modules.artifact_store import get_store, load_json, fingerprint, course_key
+from modules.structured_output import structured_enabled
+from modules.llm_errors import LLMError, IncompleteGenerationError
+from modules.settings import get_settings
+from modules.module1_learning_objective_setter import build_objectives_prompt, generate_learning_objectives_async
+from modules.module2_curriculum_structurer import build_curriculum_prompt, generate_curriculum_async
+from modules.module3_content_generator import (
+    SECTIONS,
+    build_week_prompts,
+    generate_section,
+    make_provider_limits,
+    save_week_content,
+)
+
+
+# --- Checkpoints ---
+class CheckpointStore:
+    """One JSON file per completed node ({"fingerprint", "result"}), written atomically."""
+
+    def __init__(self, run_dir):
+        self.dir = os.path.join(run_dir, "checkpoints")
+        os.makedirs(self.dir, exist_ok=True)
+
+    def path(self, node_name):
+        return os.path.join(self.dir, re.sub(r"[^A-Za-z0-9_.-]", "_", node_name) + ".json")
+
+    def load(self, node_name):
+        try:
+            with open(self.path(node_name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, node_name, result, node_fingerprint=None):
+        path = self.path(node_name)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": node_fingerprint, "result": result}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def result(self, node_name):
+        """Stored result of a node, whatever its fingerprint (None if missing)."""
+        return (self.load(node_name) or {}).get("result")
+
+
+# --- DAG runner ---
+class DependencyFailed(LLMError):
+    """Raised for a node whose upstream node failed."""
+
+
+class Node:
+    """
+    fn(dep_results) is a coroutine function; dep_results maps each dependency name to its result.
+    fingerprint(dep_results) returns a hash of everything the node's output depends on; the
+    default hashes the node name and its dependency results.
+    """
+
+    def __init__(self, name, fn, deps=(), fingerprint=None):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.fingerprint = fingerprint
+
+    def input_fingerprint(self, dep_results):
+        if self.fingerprint is not None:
+            return self.fingerprint(dep_results)
+        return fingerprint(self.name, dep_results)
+
+
+async def run_dag(nodes, checkpoints=None, verbose=True):
+    """
+    Runs nodes (given in topological order) as concurrently as their dependencies allow.
+    A node whose checkpoint was made from the same input fingerprint is not re-run;
+    since fingerprints include upstream results, a regenerated node that produces
+    the same result does not invalidate its dependents. If any node fails, its
+    dependents fail too but independent branches still finish; an
+    IncompleteGenerationError with the successful results is raised at the end.
+    verbose=False keeps per-node progress lines quiet (batch runs).
+    """
+    tasks = {}
+    reused, regenerated = [], []
+
+    async def run(node):
+        dep_results = {}
+        for dep in node.deps:
+            try:
+                dep_results[dep] = await tasks[dep]
+            except Exception as e:
+                raise DependencyFailed(f"{node.name}: dependency {dep} failed") from e
+        node_fingerprint = node.input_fingerprint(dep_results)
+        if checkpoints:
+            cached = await asyncio.to_thread(checkpoints.load, node.name)
+            if cached and cached.get("fingerprint") == node_fingerprint:
+                reused.append(node.name)
+                return cached["result"]
+        started = time.perf_counter()
+        result = await node.fn(dep_results)
+        if checkpoints:
+            await asyncio.to_thread(checkpoints.save, node.name, result, node_fingerprint)
+        regenerated.append(node.name)
+        if verbose:
+            print(f"✅ {node.name} ({time.perf_counter() - started:.1f}s)")
+        return result
+
+    for node in nodes:
+        tasks[node.name] = asyncio.ensure_future(run(node))
+    outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    if checkpoints and verbose:
+        print(f"♻️ Reused {len(reused)} node(s), regenerated {len(regenerated)}")
+
+    results, failures = {}, {}
+    for name, outcome in zip(tasks, outcomes):
+        if isinstance(outcome, BaseException):
+            failures[name] = outcome
+        else:
+            results[name] = outcome
+    if failures:
+        root_causes = {name: err for name, err in failures.items() if not isinstance(err, DependencyFailed)}
+        raise IncompleteGenerationError(
+            f"{len(failures)} pipeline node(s) failed: {sorted(root_causes)}", results=results, failures=failures
+        )
+    return results
+
+
+# --- Course graph ---
+def course_params(topic, level="Undergraduate_Basic", credit_hours=3, weeks=15, approach="Project-based",
+                  assessments="Mixed", complexity="Intermediate", multimedia_prefs=None):
+    return {
+        "topic": topic,
+        "level": level,
+        "credit_hours": credit_hours,
+        "weeks": weeks,
+        "approach": approach,
+        "assessments": assessments,
+        "complexity": complexity,
+        "multimedia_prefs": multimedia_prefs or ["Text", "Books", "Articles"],
+    }
+
+
+def week_setting(params, week_number, key):
+    """Per-week override from params["week_overrides"] (set by "regenerate"), else the course-wide value."""
+    return params.get("week_overrides", {}).get(str(week_number), {}).get(key, params[key])
+
+
+def run_id_for(params):
+    """
+    Same inputs -> same run id, which is what makes reruns resume. The topic is
+    slugged like artifact course keys, so "C/C++" or "Networking: TCP/IP" stay
+    one valid directory name on every platform.
+    """
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+    return f"{course_key(params['topic'])}-{digest}"
+
+
+def build_course_graph(params, use_cache=True, limits=None):
+    """
+    Nodes for one course. Generation nodes are fingerprinted by their prompt and
+    model routes; params["objectives"] replaces the generated objectives and
+    params["week_overrides"] changes complexity/multimedia for single weeks.
+    limits: per-provider semaphores to share with other graphs (default: this graph's own).
+    """
+    limits = limits if limits is not None else make_provider_limits()
+    routes = get_client().routes
+
+    def curriculum_prompt(deps):
+        assessments = params["assessments"]
+        return build_curriculum_prompt(
+            deps["objectives"]["objectives"], params["weeks"], params["approach"],
+            ", ".join(assessments) if isinstance(assessments, list) else assessments, structured_enabled()
+        )
+
+    def week_prompts(deps, week_number):
+        return build_week_prompts(
+            deps["curriculum"]["curriculum"], week_number,
+            week_setting(params, week_number, "complexity"), week_setting(params, week_number, "multimedia_prefs")
+        )
+
+    def objectives_fingerprint(deps):
+        if params.get("objectives"):
+            return fingerprint("objectives", params["topic"], params["objectives"])
+        return fingerprint(build_objectives_prompt(params["topic"], params["level"], params["credit_hours"],
+                                                   structured_enabled()), routes.get("objectives"))
+
+    def curriculum_fingerprint(deps):
+        return fingerprint(curriculum_prompt(deps), params["topic"], routes.get("curriculum"))
+
+    async def objectives_node(deps):
+        if params.get("objectives"):
+            artifact_id = await asyncio.to_thread(
+                get_store().put, "objectives", {"topic": params["topic"], "objectives": params["objectives"]},
+                course=params["topic"], meta={"edited": True}
+            )
+            return {"objectives": params["objectives"], "artifact_id": artifact_id}
+        objectives, artifact_id = await generate_learning_objectives_async(
+            params["topic"], params["level"], params["credit_hours"], use_cache=use_cache
+        )
+        if not objectives:
+            raise LLMError("Objective generation failed.")
+        return {"objectives": objectives, "artifact_id": artifact_id}
+
+    async def curriculum_node(deps):
+        curriculum_text, artifact_id = await generate_curriculum_async(
+            deps["objectives"]["objectives"], params["weeks"], params["approach"], params["assessments"],
+            use_cache=use_cache, course_name=params["topic"]
+        )
+        if not curriculum_text:
+            raise LLMError("Curriculum generation failed.")
+        curriculum = await asyncio.to_thread(load_json, artifact_id)
+        return {"curriculum": curriculum, "artifact_id": artifact_id}
+
+    def section_node(week_number, section):
+        async def fn(deps):
+            prompt = week_prompts(deps, week_number)[section]
+            with telemetry.labels(week=week_number):
+                return await generate_section(section, prompt, limits, use_cache=use_cache)
+
+        def section_fingerprint(deps):
+            return fingerprint(week_prompts(deps, week_number)[section], routes.get(section))
+        return fn, section_fingerprint
+
+    def week_node(week_number):
+        async def fn(deps):
+            content = {section: deps[f"week:{week_number}:{section}"] for section in SECTIONS}
+            course_name = deps["curriculum"]["curriculum"].get("course_name", params["topic"])
+            artifact_id = await asyncio.to_thread(
+                save_week_content, course_name, week_number, content, week_prompts(deps, week_number)
+            )
+            return {"artifact_id": artifact_id}
+        return fn
+
+    async def course_node(deps):
+        return {
+            "objectives_id": deps["objectives"]["artifact_id"],
+            "curriculum_id": deps["curriculum"]["artifact_id"],
+            "week_ids": {str(w): deps[f"week:{w}"]["artifact_id"] for w in range(1, params["weeks"] + 1)},
+        }
+
+    nodes = [
+        Node("objectives", objectives_node, fingerprint=objectives_fingerprint),
+        Node("curriculum", curriculum_node, ["objectives"], fingerprint=curriculum_fingerprint),
+    ]
+    for week_number in range(1, params["weeks"] + 1):
+        section_names = []
+        for section in SECTIONS:
+            name = f"week:{week_number}:{section}"
+            fn, section_fingerprint = section_node(week_number, section)
+            nodes.append(Node(name, fn, ["curriculum"], fingerprint=section_fingerprint))
+            section_names.append(name)
+        nodes.append(Node(f"week:{week_number}", week_node(week_number), ["curriculum"] + section_names))
+    nodes.append(Node("course", course_node, ["objectives", "curriculum"] + [f"week:{w}" for w in range(1, params["weeks"] + 1)]))
+    return nodes
+
+
+async def run_pipeline(topic, level="Undergraduate_Basic", credit_hours=3, weeks=15, approach="Project-based",
+                       assessments="Mixed", complexity="Intermediate", multimedia_prefs=None,
+                       run_dir=None, use_cache=True):
+    """
+    Builds a full course in one call. Returns the "course" node result:
+    {"objectives_id", "curriculum_id", "week_ids", "run_dir"} (ids from modules/artifact_store.py).
+    A telemetry summary for the run is printed and saved in the run directory.
+    """
+    params = course_params(topic, level, credit_hours, weeks, approach, assessments, complexity, multimedia_prefs)
+    return await run_course(params, run_dir or os.path.join(get_settings().runs_dir, run_id_for(params)), use_cache=use_cache)
+
+
+async def run_course(params, run_dir, use_cache=True, limits=None, verbose=True):
+    """Runs (or resumes) the course graph for params in run_dir; see run_pipeline."""
+    checkpoints = CheckpointStore(run_dir)
+    with open(os.path.join(run_dir, "params.json"), "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=4)
+
+    if verbose:
+        print(f"Running course pipeline for {params['topic']} in {run_dir}")
+    with telemetry.collect(run_id=os.path.basename(run_dir)) as spans:
+        try:
+            results = await run_dag(build_course_graph(params, use_cache=use_cache, limits=limits), checkpoints, verbose)
+        finally:
+            write_run_report(run_dir, spans, verbose)
+    return dict(results["course"], run_dir=run_dir)
+
+
+def write_run_report(run_dir, spans, verbose=True):
+    """Prints the per-run telemetry summary and saves it as telemetry_summary.json."""
+    summary = telemetry.summarize(spans)
+    with open(os.path.join(run_dir, "telemetry_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4)
+    if verbose:
+        print(telemetry.format_summary(summary))
+    return summary
+
+
+# --- Incremental regeneration ---
+def load_params(run_dir):
+    with open(os.path.join(run_dir, "params.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _parse_value(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def apply_edits(params, checkpoints, settings=(), week_complexity=(), objectives=None, objective_edits=()):
+    """
+    Returns a copy of params with the requested changes:
+    settings            "key=value" pairs for course-wide params (JSON values allowed)
+    week_complexity     "N=Level" pairs stored in params["week_overrides"]
+    objectives          a full replacement list of objectives
+    objective_edits     (N, text) pairs replacing objective N (1-based) of the current set
+    """
+    params = json.loads(json.dumps(params))
+    for item in settings:
+        key, _, value = item.partition("=")
+        if key not in params or key == "topic":
+            raise ValueError(f"Cannot set '{key}'; editable keys: {sorted(k for k in params if k != 'topic')}")
+        params[key] = _parse_value(value)
+    for item in week_complexity:
+        week, _, level = item.partition("=")
+        params.setdefault("week_overrides", {}).setdefault(str(int(week)), {})["complexity"] = level
+    if objectives is not None:
+        params["objectives"] = list(objectives)
+    if objective_edits:
+        current = list(params.get("objectives") or (checkpoints.result("objectives") or {}).get("objectives", []))
+        if not current:
+            raise ValueError("No objectives to edit yet; run the pipeline first or pass --objectives-file.")
+        for number, text in objective_edits:
+            index = int(number) - 1
+            if not 0 <= index < len(current):
+                raise ValueError(f"Objective {number} does not exist (the course has {len(current)}).")
+            current[index] = text
+        params["objectives"] = current
+    return params
+
+
+async def regenerate(run_dir, use_cache=True, **edits):
+    """Applies edits (see apply_edits) to a run's params and reruns only the stale nodes."""
+    params = apply_edits(load_params(run_dir), CheckpointStore(run_dir), **edits)
+    return await run_course(params, run_dir, use_cache=use_cache)
+
+
+def regenerate_main(argv):
+    parser = argparse.ArgumentParser(prog="python -m modules.pipeline regenerate",
+                                     description="Change inputs of an existing run and regenerate only what they affect.")
+    parser.add_argument("--run-dir", required=True)
+    parser.add_argument("--set", dest="settings", action="append", default=[], metavar="KEY=VALUE",
+                        help="change a course-wide parameter, e.g. --set complexity=Advanced")
+    parser.add_argument("--week-complexity", action="append", default=[], metavar="WEEK=LEVEL",
+                        help="override the complexity of one week, e.g. --week-complexity 3=Advanced")
+    parser.add_argument("--objectives-file", default=None, help="text file with one learning objective per line")
+    parser.add_argument("--objective", nargs=2, action="append", default=[], metavar=("N", "TEXT"),
+                        help="replace learning objective N")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    args = parser.parse_args(argv)
+
+    objectives = None
+    if args.objectives_file:
+        with open(args.objectives_file, "r", encoding="utf-8") as f:
+            objectives = [line.strip() for line in f if line.strip()]
+    try:
+        course = asyncio.run(regenerate(
+            args.run_dir, use_cache=not args.no_cache, settings=args.settings,
+            week_complexity=args.week_complexity, objectives=objectives, objective_edits=args.objective
+        ))
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 2
+    except IncompleteGenerationError as e:
+        print(f"❌ {e}. Rerun the same command to resume.")
+        return 1
+    print(json.dumps(course, indent=4))
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "regenerate":
+        return regenerate_main(argv[1:])
+    parser = argparse.ArgumentParser(description="Generate a full EduPilot course (objectives, curriculum, weekly content).")
+    parser.add_argument("--topic", required=True)
+    parser.add_argument("--level", default="Undergraduate_Basic",
+                        choices=["Undergraduate_Basic", "Undergraduate_Advanced", "Graduate", "Professional"])
+    parser.add_argument("--credit-hours", type=int, default=3)
+    parser.add_argument("--weeks", type=int, default=15)
+    parser.add_argument("--approach", default="Project-based")
+    parser.add_argument("--assessments", nargs="+", default=["Quizzes", "Projects", "Exams"])
+    parser.add_argument("--complexity", default="Intermediate", choices=["Beginner", "Intermediate", "Advanced", "Expert"])
+    parser.add_argument("--multimedia", nargs="+", default=None)
+    parser.add_argument("--run-dir", default=None, help="checkpoint directory (default: derived from the inputs)")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    parser.add_argument("--metrics-file", default=None, help="write Prometheus-format counters here when done")
+    args = parser.parse_args(argv)
+
+    try:
+        course = asyncio.run(run_pipeline(
+            args.topic, args.level, args.credit_hours, args.weeks, args.approach, args.assessments,
+            args.complexity, args.multimedia, run_dir=args.run_dir, use_cache=not args.no_cache
+        ))
+    except IncompleteGenerationError as e:
+        print(f"❌ {e}. Rerun the same command to resume.")
+        return 1
+    finally:
+        if args.metrics_file:
+            telemetry.export_prometheus(args.metrics_file)
+    print(json.dumps(course, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,388 @@
+"""
+Per-course question bank built from the weekly assessment_questions sections.
+
+Each week's assessment markdown (10 MCQs, 10 short questions, then the answer
+keys) is parsed into individual questions with their options and answers.
+Near-duplicate questions across weeks are found with MinHash over word
+shingles (LSH banding for candidates, exact Jaccard to confirm); the earliest
+occurrence is kept and the repeats point at it. The bank is stored as a
+"question_bank" artifact and rebuilt only when a week's content changes.
+
+Exams are assembled from the bank alone (no model calls), spreading questions
+evenly over the covered weeks:
+
+    python -m modules.question_bank build "Web Development"
+    python -m modules.question_bank exam "Web Development" --kind midterm --mcq 20 --short 5 --output midterm.md
+    python -m modules.question_bank exam "Web Development" --kind final --answers --output final.docx
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+
+from modules.artifact_store import get_store, fingerprint
+from modules.exporter import find_course
+
+BANK_VERSION = 1
+DUPLICATE_THRESHOLD = 0.7  # Jaccard similarity of word-pair shingles; one changed word in a 12-word question ~0.71
+NUM_PERM = 96
+BANDS = 32                 # 32 bands x 3 rows: a 0.7-similar pair becomes a candidate >99.9% of the time
+SHINGLE_SIZE = 2
+EXAM_KINDS = ("midterm", "final")
+
+HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s+.*|\*\*[^*].*\*\*:?|__[^_].*__:?)\s*$")
+NUMBERED_RE = re.compile(r"^\s*(?:[-*]\s*)?(?:\*\*)?(?:Q(?:uestion)?\s*)?(\d+)\s*[.):]\s*(?:\*\*)?\s*(.*)$", re.IGNORECASE)
+OPTION_RE = re.compile(r"^\s*(?:[-*]\s*)?\(?([a-hA-H])[.)]\s+(.+)$")
+INLINE_ANSWER_RE = re.compile(r"^\s*(?:\*\*)?(?:correct\s+)?answer\s*(?:\*\*)?\s*:\s*(?:\*\*)?\s*(.+)$", re.IGNORECASE)
+LETTER_RE = re.compile(r"^\(?([a-hA-H])(?:\)|\.(?:\s|$)|$|\s+[-–:])")  # "b", "(b)", "B) ...", "b. ...", not "A foreign key"
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# --- Parsing ---
+def _strip_md(text):
+    return text.replace("**", "").replace("__", "").strip()
+
+
+def _section_kind(line, in_answers):
+    """Section a heading line starts, or None for unrelated headings; in_answers: inside an answer key."""
+    if not HEADING_RE.match(line) and not (line.strip().endswith(":") and len(line.strip()) < 60 and not NUMBERED_RE.match(line)):
+        return None
+    text = _strip_md(line.strip().lstrip("#")).lower()
+    is_mcq = "mcq" in text or "multiple" in text or "choice" in text
+    is_short = "short" in text
+    if "answer" in text or "key" in text or in_answers:
+        return "short_answers" if is_short else "mcq_answers" if is_mcq else "answers"
+    return "short" if is_short else "mcq" if is_mcq else None
+
+
+def _answer_letter(text):
+    match = LETTER_RE.match(_strip_md(text))
+    return match.group(1).lower() if match else None
+
+
+def parse_assessment(markdown, week=None):
+    """
+    Splits one week's assessment markdown into questions:
+    {"type": "mcq"|"short", "week", "number", "stem", "options": [...], "answer"}.
+    Answers come from the answer-key sections or "Answer: ..." lines under a question.
+    """
+    questions, answers = [], {"mcq": {}, "short": {}}
+    section, current, in_answers = None, None, False
+
+    for line in (markdown or "").splitlines():
+        if not line.strip():
+            continue
+        kind = _section_kind(line, in_answers)
+        if kind:
+            section, current = kind, None
+            in_answers = kind.endswith("answers")
+            continue
+        numbered = NUMBERED_RE.match(line)
+
+        if in_answers:
+            if numbered:
+                text = _strip_md(numbered.group(2))
+                letter = _answer_letter(text)
+                target = "short" if section == "short_answers" else "mcq" if section == "mcq_answers" else ("mcq" if letter else "short")
+                answers[target][int(numbered.group(1))] = letter if target == "mcq" and letter else text
+            continue
+
+        option = OPTION_RE.match(line) if current is not None else None
+        inline_answer = INLINE_ANSWER_RE.match(line) if current is not None else None
+        if inline_answer:
+            text = _strip_md(inline_answer.group(1))
+            current["answer"] = _answer_letter(text) if current["options"] and _answer_letter(text) else text
+        elif option:
+            current["options"].append(_strip_md(option.group(2)))
+        elif numbered and _strip_md(numbered.group(2)):
+            current = {"type": section, "week": week, "number": int(numbered.group(1)),
+                       "stem": _strip_md(numbered.group(2)), "options": [], "answer": None}
+            questions.append(current)
+        elif current is not None:
+            current["stem"] += "\n" + _strip_md(line)
+
+    for question in questions:
+        # Decided by the options, not the heading (headings can be missing or mislabelled)
+        question["type"] = "mcq" if question["options"] else "short"
+    for kind in ("mcq", "short"):
+        same = [q for q in questions if q["type"] == kind]
+        for index, question in enumerate(same):
+            if question["answer"] is None:
+                question["answer"] = answers[kind].get(question["number"])
+            if question["answer"] is None and len(answers[kind]) == len(same):
+                question["answer"] = answers[kind].get(sorted(answers[kind])[index])  # answers numbered separately
+    return questions
+
+
+# --- Similarity index (MinHash + LSH) ---
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingle_set):
+    hashed = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingle_set]
+    if not hashed:
+        return [0] * NUM_PERM
+    return [min((a * h + b) % _PRIME for h in hashed) for a, b in _PERMUTATIONS]
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def find_duplicates(texts, threshold=DUPLICATE_THRESHOLD):
+    """Pairs (i, j, similarity) with i < j whose shingle Jaccard similarity is >= threshold."""
+    sets = [shingles(text) for text in texts]
+    rows = NUM_PERM // BANDS
+    buckets = {}
+    for index, shingle_set in enumerate(sets):
+        signature = minhash(shingle_set)
+        for band in range(BANDS):
+            buckets.setdefault((band, tuple(signature[band * rows:(band + 1) * rows])), []).append(index)
+    candidates = {(i, j) for members in buckets.values() for n, i in enumerate(members) for j in members[n + 1:]}
+    pairs = []
+    for i, j in sorted(candidates):
+        similarity = jaccard(sets[i], sets[j])
+        if similarity >= threshold:
+            pairs.append((i, j, round(similarity, 3)))
+    return pairs
+
+
+# --- Bank ---
+def question_id(question):
+    return fingerprint(question["type"], WORD_RE.findall(question["stem"].lower()), question["options"])[:12]
+
+
+def build_bank(course_name, week_ids, threshold=DUPLICATE_THRESHOLD):
+    """Parses every week and marks near-duplicates; returns the bank dict."""
+    store = get_store()
+    questions = []
+    for week, artifact_id in sorted((int(w), ref) for w, ref in week_ids.items()):
+        content = store.get(artifact_id)
+        for question in parse_assessment(content.get("assessment_questions"), week):
+            question.update(id=question_id(question), source=artifact_id, duplicate_of=None, similarity=None)
+            questions.append(question)
+
+    duplicates = 0
+    for kind in ("mcq", "short"):
+        same = [q for q in questions if q["type"] == kind]  # already in week order: the earlier one is canonical
+        parent = list(range(len(same)))
+
+        def root(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j, similarity in find_duplicates([q["stem"] for q in same], threshold):
+            ri, rj = root(i), root(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+            same[j]["similarity"] = max(same[j]["similarity"] or 0, similarity)
+        for index, question in enumerate(same):
+            canonical = root(index)
+            if canonical != index:
+                question["duplicate_of"] = same[canonical]["id"]
+                duplicates += 1
+            else:
+                question["similarity"] = None
+
+    return {
+        "version": BANK_VERSION,
+        "course_name": course_name,
+        "sources": {str(week): ref for week, ref in sorted((int(w), r) for w, r in week_ids.items())},
+        "threshold": threshold,
+        "questions": questions,
+        "stats": {
+            "weeks": len(week_ids),
+            "questions": len(questions),
+            "duplicates": duplicates,
+            "unique_mcq": sum(1 for q in questions if q["type"] == "mcq" and not q["duplicate_of"]),
+            "unique_short": sum(1 for q in questions if q["type"] == "short" and not q["duplicate_of"]),
+            "missing_answers": sum(1 for q in questions if not q["answer"]),
+        },
+    }
+
+
+def load_bank(course_name, rebuild=False, threshold=DUPLICATE_THRESHOLD):
+    """Returns (bank, artifact_id): the stored bank if it still matches the latest weeks, else a fresh one."""
+    week_ids = find_course(course_name)["week_ids"]
+    if not week_ids:
+        raise ValueError(f"No weekly content stored for '{course_name}'.")
+    store = get_store()
+    sources = fingerprint(BANK_VERSION, threshold, {str(w): ref for w, ref in week_ids.items()})
+    latest = store.latest("question_bank", course_name)
+    if latest and not rebuild and (store.info(latest)["meta"] or {}).get("sources") == sources:
+        return store.get(latest), latest
+    bank = build_bank(course_name, week_ids, threshold)
+    return bank, store.put("question_bank", bank, course=course_name, meta={"sources": sources})
+
+
+# --- Exams ---
+def exam_weeks(bank, kind="final", weeks=None):
+    available = sorted(int(week) for week in bank["sources"])
+    if weeks:
+        return [week for week in available if week in set(weeks)]
+    if kind == "midterm":
+        return available[:(len(available) + 1) // 2]
+    return available
+
+
+def _pick(pools, count, rng):
+    """Round-robin over the weeks so every week is represented before any week repeats."""
+    for pool in pools.values():
+        rng.shuffle(pool)
+    picked = []
+    while len(picked) < count and any(pools.values()):
+        for week in sorted(pools):
+            if pools[week] and len(picked) < count:
+                picked.append(pools[week].pop())
+    return picked
+
+
+def assemble_exam(bank, kind="final", weeks=None, mcq=20, short=5, seed=None, exclude=()):
+    """Selects unique questions (with answers) from the bank; no model calls."""
+    covered = exam_weeks(bank, kind, weeks)
+    seed = int(time.time()) if seed is None else seed
+    rng = random.Random(seed)
+    excluded = set(exclude)
+    sections = {}
+    for qtype, count in (("mcq", mcq), ("short", short)):
+        pools = {week: [] for week in covered}
+        for question in bank["questions"]:
+            if (question["type"] == qtype and question["week"] in pools and not question["duplicate_of"]
+                    and question["answer"] and question["id"] not in excluded
+                    and (qtype != "mcq" or len(question["options"]) >= 2)):
+                pools[question["week"]].append(question)
+        sections[qtype] = _pick(pools, count, rng)
+        if len(sections[qtype]) < count:
+            print(f"⚠️ Only {len(sections[qtype])} {qtype} question(s) available for weeks {covered}; asked for {count}.")
+    title = f"{bank['course_name']} - {'Midterm' if kind == 'midterm' else 'Final'} Exam"
+    return {"title": title, "course_name": bank["course_name"], "kind": kind, "weeks": covered, "seed": seed,
+            "mcq": sections["mcq"], "short": sections["short"]}
+
+
+def render_exam_markdown(exam, answers=False):
+    lines = [f"# {exam['title']}", "", f"Covers weeks {exam['weeks'][0]}-{exam['weeks'][-1]}." if exam["weeks"] else "", ""]
+    if exam["mcq"]:
+        lines += ["## Part A: Multiple Choice Questions", ""]
+        for number, question in enumerate(exam["mcq"], 1):
+            lines.append(f"{number}. {question['stem']}")
+            lines += [f"    - {'abcdefgh'[i]}) {option}" for i, option in enumerate(question["options"])]
+            lines.append("")
+    if exam["short"]:
+        lines += ["## Part B: Short Questions", ""]
+        lines += [f"{number}. {question['stem']}" for number, question in enumerate(exam["short"], 1)]
+        lines.append("")
+    if answers:
+        lines += ["## Answer Key", "", "### Part A", ""]
+        lines += [f"{number}. {question['answer']} (week {question['week']})" for number, question in enumerate(exam["mcq"], 1)]
+        lines += ["", "### Part B", ""]
+        lines += [f"{number}. {question['answer']} (week {question['week']})" for number, question in enumerate(exam["short"], 1)]
+    return "\n".join(lines).strip() + "\n"
+
+
+def write_exam(exam, output_path, answers=False):
+    """Writes the exam as .md, .html or .docx (by extension); returns the path."""
+    from modules.exporter import HTML_HEAD, parse_markdown, render_html, render_docx
+
+    text = render_exam_markdown(exam, answers)
+    fmt = os.path.splitext(output_path)[1].lstrip(".").lower()
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    if fmt == "docx":
+        from docx import Document
+
+        doc = Document()
+        render_docx(doc, parse_markdown(text))
+        doc.save(output_path)
+    elif fmt == "html":
+        import html
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(HTML_HEAD.format(title=html.escape(exam["title"])) + render_html(parse_markdown(text)) + "</body></html>\n")
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m modules questions", description="Course question bank and exam assembly.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="parse every week's questions and report duplicates")
+    build_cmd.add_argument("course")
+    build_cmd.add_argument("--rebuild", action="store_true", help="ignore the stored bank")
+    build_cmd.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD, help="duplicate similarity (0-1)")
+    build_cmd.add_argument("--show-duplicates", action="store_true")
+    exam_cmd = sub.add_parser("exam", help="assemble an exam from the bank")
+    exam_cmd.add_argument("course")
+    exam_cmd.add_argument("--kind", choices=EXAM_KINDS, default="final", help="midterm covers the first half of the weeks")
+    exam_cmd.add_argument("--weeks", type=int, nargs="+", default=None, help="explicit weeks instead of --kind's range")
+    exam_cmd.add_argument("--mcq", type=int, default=20)
+    exam_cmd.add_argument("--short", type=int, default=5)
+    exam_cmd.add_argument("--seed", type=int, default=None, help="same seed -> same exam")
+    exam_cmd.add_argument("--exclude", default=None, help="JSON file of an earlier exam whose questions to skip")
+    exam_cmd.add_argument("--answers", action="store_true", help="append the answer key")
+    exam_cmd.add_argument("--output", default=None, help=".md, .html or .docx; also writes <output>.json for --exclude")
+    args = parser.parse_args(argv)
+
+    try:
+        bank, bank_id = load_bank(args.course, rebuild=getattr(args, "rebuild", False),
+                                  threshold=getattr(args, "threshold", DUPLICATE_THRESHOLD))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+
+    if args.command == "build":
+        print(f"✅ {bank_id}")
+        print(json.dumps(bank["stats"], indent=4))
+        if args.show_duplicates:
+            by_id = {q["id"]: q for q in bank["questions"] if not q["duplicate_of"]}
+            for question in bank["questions"]:
+                if question["duplicate_of"]:
+                    original = by_id[question["duplicate_of"]]
+                    print(f"- week {question['week']} {question['type']} {question['number']} ~ week {original['week']} "
+                          f"{original['number']} ({question['similarity']:.2f}): {question['stem'][:70]}")
+        return 0
+
+    exclude = ()
+    if args.exclude:
+        with open(args.exclude, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        exclude = [q["id"] for q in previous.get("mcq", []) + previous.get("short", [])]
+    if not exam_weeks(bank, args.kind, args.weeks):
+        available = sorted(int(week) for week in bank["sources"])
+        if not available:
+            print(f"❌ No weeks are stored in the question bank for {args.course}.")
+        else:
+            print(f"❌ None of weeks {' '.join(map(str, args.weeks))} are in the bank for {args.course} "
+                  f"(available: {', '.join(map(str, available))}).")
+        return 2
+    started = time.perf_counter()
+    exam = assemble_exam(bank, args.kind, args.weeks, args.mcq, args.short, args.seed, exclude)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not args.output:
+        print(render_exam_markdown(exam, args.answers))
+    else:
+        write_exam(exam, args.output, args.answers)
+        with open(os.path.splitext(args.output)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(exam, f, indent=4, ensure_ascii=False)
+        print(f"✅ {exam['title']}: {len(exam['mcq'])} MCQ(s) + {len(exam['short'])} short question(s) from weeks "
+              f"{exam['weeks'][0]}-{exam['weeks'][-1]} in {elapsed_ms:.1f} ms (seed {exam['seed']}) -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+import re
+import time
+import random
+import asyncio
+import threading
+
+from modules import telemetry
+from modules.settings import get_settings
+from modules.llm_errors import (
+    LLMError,
+    LLMRequestError,
+    TransientLLMError,
+    RateLimitError,
+    CircuitOpenError,
+)
+
+# --- Per-provider quotas (override in .env; read when a provider's guard is created) ---
+DEFAULT_LIMITS = {
+    "gemini": {"rpm": 150, "tpm": 2_000_000},
+    "groq": {"rpm": 30, "tpm": 6_000},
+}
+
+RETRY_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30.0
+
+TRANSIENT_ERROR_NAMES = {
+    "APITimeoutError", "APIConnectionError", "InternalServerError",
+    "DeadlineExceeded", "ServiceUnavailable", "TooManyRequests",
+}
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) used for TPM accounting."""
+    return max(1, len(text or "") // 4)
+
+
+# --- Token buckets ---
+class TokenBucket:
+    """
+    Refills at capacity/60 units per second. reserve() always succeeds and may
+    drive the balance negative; it returns how long the caller must wait, so
+    concurrent callers queue up in arrival order.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.fill_rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.fill_rate
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one provider."""
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def reserve(self, tokens):
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def charge(self, tokens):
+        """Bills tokens that were only known after the call (the completion)."""
+        self.tokens.reserve(tokens)
+
+
+# --- Retry policy ---
+class RetryPolicy:
+    def __init__(self, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        """Exponential backoff with jitter; never shorter than the provider's retry-after hint."""
+        backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(backoff / 2, backoff)
+        if retry_after:
+            delay = max(delay, retry_after + random.uniform(0, self.base_delay))
+        return delay
+
+
+# --- Circuit breaker ---
+class CircuitBreaker:
+    """
+    closed -> open after failure_threshold consecutive transient failures.
+    open -> half-open after reset_timeout; a single probe call decides whether
+    the circuit closes again or re-opens.
+    """
+
+    def __init__(self, provider, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "open":
+                elapsed = time.monotonic() - self.opened_at
+                if elapsed < self.reset_timeout:
+                    raise CircuitOpenError(
+                        f"{self.provider} circuit is open after {self.failures} consecutive failures",
+                        self.provider, retry_in=self.reset_timeout - elapsed,
+                    )
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probe_in_flight:
+                    raise CircuitOpenError(f"{self.provider} circuit is half-open; probe in flight", self.provider)
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """Frees a half-open probe slot when the probing call was cancelled."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+# --- Error classification ---
+def _retry_after(exc):
+    """Reads a retry-after hint from a Groq response header or a Gemini error message."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            pass
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", str(exc)) or re.search(r"retry in ([\d.]+)s", str(exc))
+    return float(match.group(1)) if match else None
+
+
+def classify_error(provider, exc):
+    """Maps an SDK exception (Gemini or Groq) to one of the typed errors in llm_errors."""
+    if isinstance(exc, LLMError):
+        return exc
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    status = status if isinstance(status, int) else None
+    name = type(exc).__name__
+    message = f"{provider} call failed: {name}: {exc}"
+
+    if status == 429 or name in ("ResourceExhausted", "RateLimitError"):
+        return RateLimitError(message, provider, retry_after=_retry_after(exc))
+    if (
+        isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError))
+        or name in TRANSIENT_ERROR_NAMES
+        or (status is not None and status >= 500)
+    ):
+        return TransientLLMError(message, provider)
+    return LLMRequestError(message, provider)
+
+
+# --- Provider guard: limiter + retries + breaker around one call ---
+class ProviderGuard:
+    def __init__(self, provider, rpm, tpm, retry=None, breaker=None):
+        self.provider = provider
+        self.limiter = RateLimiter(rpm, tpm)
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(provider)
+
+    def _handle_failure(self, exc, attempt):
+        """Returns how long to back off before the next attempt, or raises the typed error."""
+        error = classify_error(self.provider, exc)
+        if not isinstance(error, TransientLLMError):
+            # The provider answered; the request itself was bad.
+            self.breaker.record_success()
+            raise error from (None if error is exc else exc)
+        self.breaker.record_failure()
+        if attempt + 1 >= self.retry.max_attempts:
+            raise error from (None if error is exc else exc)
+        return self.retry.delay(attempt, getattr(error, "retry_after", None))
+
+    def _handle_success(self, result):
+        self.breaker.record_success()
+        if isinstance(result, str):
+            self.limiter.charge(estimate_tokens(result))
+        return result
+
+    async def _wait_for_slot(self, prompt):
+        """
+        Sleeps until the limiter admits the call. Runs inside the callers' try
+        blocks so a cancellation here still frees a claimed half-open probe.
+        """
+        wait = self.limiter.reserve(estimate_tokens(prompt))
+        if wait:
+            telemetry.record_wait(wait)
+            await asyncio.sleep(wait)
+
+    async def call(self, fn, prompt=""):
+        """Runs the zero-argument coroutine function fn under this provider's limits."""
+        for attempt in range(self.retry.max_attempts):
+            self.breaker.before_call()
+            try:
+                await self._wait_for_slot(prompt)
+                result = await fn()
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as exc:
+                await asyncio.sleep(self._handle_failure(exc, attempt))
+                telemetry.record_retry()
+                continue
+            return self._handle_success(result)
+
+    async def stream(self, fn, prompt=""):
+        """
+        Async generator variant of call(). fn returns an async iterator of text
+        chunks; the call is retried only if it fails before the first chunk.
+        """
+        for attempt in range(self.retry.max_attempts):
+            self.breaker.before_call()
+            received = 0
+            try:
+                await self._wait_for_slot(prompt)
+                async for chunk in fn():
+                    received += len(chunk)
+                    yield chunk
+            except (GeneratorExit, asyncio.CancelledError):
+                self.breaker.release()
+                raise
+            except Exception as exc:
+                if received:
+                    # Chunks were already handed out; a retry would duplicate them.
+                    error = classify_error(self.provider, exc)
+                    if isinstance(error, TransientLLMError):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    raise error from (None if error is exc else exc)
+                await asyncio.sleep(self._handle_failure(exc, attempt))
+                telemetry.record_retry()
+                continue
+            self.breaker.record_success()
+            self.limiter.charge(max(1, received // 4))
+            return
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(provider):
+    """Returns the process-wide guard for provider, configured from <PROVIDER>_RPM / _TPM and LLM_* settings."""
+    with _guards_lock:
+        if provider not in _guards:
+            limits = DEFAULT_LIMITS.get(provider, {"rpm": 60, "tpm": 1_000_000})
+            settings = get_settings()
+            retry = RetryPolicy(
+                max_attempts=settings.value("LLM_RETRY_MAX_ATTEMPTS", RETRY_MAX_ATTEMPTS, int),
+                base_delay=settings.value("LLM_RETRY_BASE_DELAY", RETRY_BASE_DELAY, float),
+                max_delay=settings.value("LLM_RETRY_MAX_DELAY", RETRY_MAX_DELAY, float),
+            )
+            breaker = CircuitBreaker(
+                provider,
+                failure_threshold=settings.value("LLM_BREAKER_FAILURE_THRESHOLD", BREAKER_FAILURE_THRESHOLD, int),
+                reset_timeout=settings.value("LLM_BREAKER_RESET_TIMEOUT", BREAKER_RESET_TIMEOUT, float),
+            )
+            _guards[provider] = ProviderGuard(
+                provider,
+                rpm=settings.provider_value(provider, "RPM", limits["rpm"]),
+                tpm=settings.provider_value(provider, "TPM", limits["tpm"]),
+                retry=retry,
+                breaker=breaker,
+            )
+        return _guards[provider]
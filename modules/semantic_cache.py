@@ -0,0 +1,309 @@
+"""
+Optional near-duplicate cache in front of objective and curriculum generation.
+
+The exact response cache (modules/llm_cache.py) only helps when the prompt is
+byte-identical. This cache embeds a normalized description of the request
+("web dev fundamentals") and, when a previous request of the same task and
+scope (fields that must match exactly, e.g. level and credit hours) is
+similar enough, returns its result (adapted to the new topic) instead of
+calling the model.
+
+    EDUPILOT_SEMANTIC_CACHE=1                      enable (off by default)
+    EDUPILOT_SEMANTIC_THRESHOLD=0.8                cosine similarity needed for a hit
+    EDUPILOT_SEMANTIC_THRESHOLD_<TASK>=0.9         per-task override (OBJECTIVES, CURRICULUM)
+    EDUPILOT_EMBEDDING_MODEL=all-MiniLM-L6-v2      local sentence-transformers model (optional;
+                                                   default is a TF-IDF over hashed n-grams)
+
+Entries live in semantic.sqlite3 next to the response cache; vectors are kept
+in a NumPy matrix per (task, scope) for the nearest-neighbour search. Every
+hit is emitted as a telemetry span (provider "semantic-cache") carrying the
+similarity and threshold, so it shows up in run summaries as a cache hit.
+
+    python -m modules.semantic_cache stats
+    python -m modules.semantic_cache query objectives "Web Dev Fundamentals" --scope "3|Graduate"
+"""
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import argparse
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from modules import telemetry
+from modules.llm_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL
+from modules.settings import get_settings, reload_settings
+
+DEFAULT_THRESHOLD = 0.8
+HASH_DIM = 2 ** 14
+# Requests are "primary | secondary | ..." (e.g. "objectives | course name"); later fields count for less
+SECONDARY_FIELD_WEIGHT = 0.3
+
+Match = namedtuple("Match", "response similarity threshold request meta")
+
+
+# Course-title filler that says little about the content
+FILLER_WORDS = {
+    "a", "an", "and", "the", "of", "to", "for", "in", "on", "with",
+    "intro", "introduction", "fundamentals", "foundations", "basics", "principles", "essentials", "course",
+}
+
+
+# Common abbreviations in course titles
+ABBREVIATIONS = {
+    "dev": "development", "prog": "programming", "ml": "machine learning", "ai": "artificial intelligence",
+    "db": "database", "os": "operating systems", "comp": "computer", "sci": "science", "eng": "engineering",
+    "mgmt": "management", "stats": "statistics", "econ": "economics", "chem": "chemistry", "bio": "biology",
+    "math": "mathematics", "maths": "mathematics",
+}
+
+
+def normalize(text):
+    """Lowercase, punctuation and title filler stripped, abbreviations expanded, whitespace collapsed."""
+    words = re.sub(r"[^\w\s|]", " ", str(text).lower()).replace("|", " | ").split()
+    return " ".join(ABBREVIATIONS.get(word, word) for word in words if word not in FILLER_WORDS)
+
+
+# --- Embedders ---
+class HashingTfidfEmbedder:
+    """
+    Word, word-prefix and character-trigram counts hashed into HASH_DIM buckets (log-scaled).
+    IDF weights are applied at query time from the indexed entries, so the
+    stored vectors never need recomputing.
+    """
+    name = "tfidf-hash"
+    uses_idf = True
+
+    def embed(self, text):
+        vector = np.zeros(HASH_DIM, dtype=np.float32)
+        for field_index, field in enumerate(normalize(text).split("|")):
+            weight = 1.0 if field_index == 0 else SECONDARY_FIELD_WEIGHT
+            for word in field.split():
+                features = [f"w:{word}", f"p:{word[:3]}"] + [f"c:{g}" for g in _trigrams(f" {word} ")]
+                for feature in features:
+                    vector[zlib.crc32(f"{field_index}:{feature}".encode("utf-8")) % HASH_DIM] += weight
+        return np.log1p(vector)
+
+
+def _trigrams(padded):
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class SentenceTransformerEmbedder:
+    """Dense embeddings from a local sentence-transformers model (CPU)."""
+    uses_idf = False
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = f"st:{model_name}"
+        self._model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(self, text):
+        return np.asarray(self._model.encode(normalize(text)), dtype=np.float32)
+
+
+def make_embedder(model_name=None):
+    """sentence-transformers model when configured and installed, else the TF-IDF fallback."""
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            print(f"⚠️ Embedding model {model_name} unavailable ({e}); using the TF-IDF fallback.")
+    return HashingTfidfEmbedder()
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# --- Cache ---
+class SemanticCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, embedder=None, threshold=DEFAULT_THRESHOLD, thresholds=None, ttl=DEFAULT_TTL):
+        self.embedder = embedder or HashingTfidfEmbedder()
+        self.threshold = threshold
+        self.thresholds = thresholds or {}
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._indexes = {}  # (task, scope) -> (ids, matrix)
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "semantic.sqlite3")
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                embedder TEXT NOT NULL,
+                request TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                response TEXT NOT NULL,
+                meta TEXT,
+                created REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_scope ON entries(task, scope, embedder)")
+
+    def threshold_for(self, task):
+        return self.thresholds.get(task, self.threshold)
+
+    def _index(self, task, scope):
+        """(ids, matrix) of the live entries for task/scope, loaded from SQLite on first use."""
+        key = (task, scope)
+        if key not in self._indexes:
+            rows = self._conn.execute(
+                "SELECT id, vector FROM entries WHERE task = ? AND scope = ? AND embedder = ? AND created >= ? ORDER BY id",
+                (task, scope, self.embedder.name, time.time() - self.ttl),
+            ).fetchall()
+            ids = [row[0] for row in rows]
+            matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+            self._indexes[key] = (ids, matrix)
+        return self._indexes[key]
+
+    def nearest(self, task, request, scope=""):
+        """(entry_id, similarity) of the closest entry, or (None, 0.0) when the index is empty."""
+        query = self.embedder.embed(request)
+        with self._lock:
+            ids, matrix = self._index(task, scope)
+            if matrix is None:
+                return None, 0.0
+            if self.embedder.uses_idf:
+                df = np.count_nonzero(matrix, axis=0) + (query > 0)
+                idf = np.log((2.0 + len(ids)) / (1.0 + df)) + 1.0
+                matrix, query = matrix * idf, query * idf
+            scores = _unit_rows(matrix) @ (query / (np.linalg.norm(query) or 1.0))
+            best = int(np.argmax(scores))
+            return ids[best], float(scores[best])
+
+    def lookup(self, task, request, scope=""):
+        """Returns a Match when the nearest entry reaches the task's threshold, else None."""
+        threshold = self.threshold_for(task)
+        entry_id, similarity = self.nearest(task, request, scope)
+        if entry_id is None or similarity < threshold:
+            self.misses += 1
+            return None
+        with self._lock:
+            cached_request, response, meta = self._conn.execute(
+                "SELECT request, response, meta FROM entries WHERE id = ?", (entry_id,)
+            ).fetchone()
+        self.hits += 1
+        span = telemetry.start_span("semantic-cache", self.embedder.name, request)
+        span.fields.update(task=task, similarity=round(similarity, 4), threshold=threshold, matched_request=cached_request)
+        span.finish()
+        return Match(response, similarity, threshold, cached_request, json.loads(meta) if meta else {})
+
+    def add(self, task, request, response, scope="", meta=None):
+        if not isinstance(response, str) or not response.strip():
+            return
+        vector = self.embedder.embed(request).astype(np.float32)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO entries (task, scope, embedder, request, vector, response, meta, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (task, scope, self.embedder.name, request, vector.tobytes(), response, json.dumps(meta) if meta else None, time.time()),
+            )
+            ids, matrix = self._index(task, scope)
+            ids = ids + [cursor.lastrowid]
+            matrix = vector[None, :] if matrix is None else np.vstack([matrix, vector])
+            self._indexes[(task, scope)] = (ids, matrix)
+
+    def stats(self):
+        rows = self._conn.execute("SELECT task, embedder, COUNT(*) FROM entries GROUP BY task, embedder").fetchall()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "threshold": self.threshold,
+            "thresholds": self.thresholds,
+            "embedder": self.embedder.name,
+            "entries": [{"task": task, "embedder": embedder, "count": count} for task, embedder, count in rows],
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._indexes.clear()
+
+
+def report_hit(task, match, label):
+    print(f"♻️ Semantic cache hit for {task} '{label}': similarity {match.similarity:.2f} "
+          f"(threshold {match.threshold:.2f}) with '{match.request[:80]}'")
+
+
+def adapt_text(text, old, new):
+    """Swaps the cached request's topic for the new one (case-insensitive)."""
+    if not old or not new or old.casefold() == new.casefold():
+        return text
+    return re.sub(re.escape(old), new.replace("\\", r"\\"), text, flags=re.IGNORECASE)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def semantic_cache_enabled():
+    return get_settings().semantic_cache
+
+
+def get_semantic_cache():
+    """Process-wide semantic cache, or None unless EDUPILOT_SEMANTIC_CACHE=1."""
+    global _default_cache
+    if not semantic_cache_enabled():
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                settings = get_settings()
+                _default_cache = SemanticCache(
+                    cache_dir=settings.cache_dir,
+                    embedder=make_embedder(settings.embedding_model),
+                    threshold=settings.semantic_threshold,
+                    thresholds=settings.semantic_thresholds,
+                    ttl=settings.cache_ttl,
+                )
+    return _default_cache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the semantic near-duplicate cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats")
+    query = sub.add_parser("query", help="show the nearest cached request and its similarity")
+    query.add_argument("task", choices=["objectives", "curriculum"])
+    query.add_argument("request")
+    query.add_argument("--scope", default="")
+    sub.add_parser("clear")
+    args = parser.parse_args(argv)
+
+    os.environ["EDUPILOT_SEMANTIC_CACHE"] = "1"
+    reload_settings()
+    cache = get_semantic_cache()
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=4))
+    elif args.command == "query":
+        entry_id, similarity = cache.nearest(args.task, args.request, args.scope)
+        if entry_id is None:
+            print("No entries.")
+            return 1
+        cached = cache._conn.execute("SELECT request FROM entries WHERE id = ?", (entry_id,)).fetchone()[0]
+        verdict = "hit" if similarity >= cache.threshold_for(args.task) else "miss"
+        print(f"{similarity:.3f} ({verdict} at {cache.threshold_for(args.task):.2f}): {cached}")
+    elif args.command == "clear":
+        cache.clear()
+        print("✅ Semantic cache cleared.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
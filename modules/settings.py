@@ -0,0 +1,121 @@
+"""
+Process-wide configuration, read once from the environment (and .env).
+
+Every EDUPILOT_* setting used by the modules is resolved here the first time
+get_settings() is called, not at import time, so importing a module stays
+cheap and a .env file is honoured no matter which module is used first.
+Provider SDKs, NumPy and python-docx are imported by the code that needs them,
+on first use.
+
+    from modules.settings import get_settings
+    get_settings().cache_dir
+
+reload_settings() re-reads the environment (benchmarks and scripts that change
+EDUPILOT_* variables at runtime call it before creating caches or stores).
+"""
+import os
+import threading
+
+HOME_DIR = os.path.join(os.path.expanduser("~"), ".edupilot")
+
+
+def _flag(name, default):
+    return os.getenv(name, "1" if default else "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+class Settings:
+    def __init__(self):
+        env = os.getenv
+
+        # LLM client
+        self.llm_backend = env("EDUPILOT_LLM_BACKEND", "").lower()
+        self.mock_config = env("EDUPILOT_MOCK_CONFIG")
+        self.routes_file = env("EDUPILOT_ROUTES_FILE", "llm_routes.json")
+
+        # Response cache (modules/llm_cache.py)
+        self.cache_dir = env("EDUPILOT_CACHE_DIR", os.path.join(HOME_DIR, "cache"))
+        self.cache_ttl = int(env("EDUPILOT_CACHE_TTL", 7 * 24 * 3600))
+        self.cache_max_bytes = int(env("EDUPILOT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        self.cache_memory_entries = int(env("EDUPILOT_CACHE_MEMORY_ENTRIES", 256))
+
+        # Semantic cache (modules/semantic_cache.py)
+        self.semantic_cache = _flag("EDUPILOT_SEMANTIC_CACHE", False)
+        self.semantic_threshold = float(env("EDUPILOT_SEMANTIC_THRESHOLD", 0.8))
+        self.semantic_thresholds = {
+            task: float(env(f"EDUPILOT_SEMANTIC_THRESHOLD_{task.upper()}"))
+            for task in ("objectives", "curriculum")
+            if env(f"EDUPILOT_SEMANTIC_THRESHOLD_{task.upper()}")
+        }
+        self.embedding_model = env("EDUPILOT_EMBEDDING_MODEL")
+
+        # Structured output and hedging
+        self.structured_output = _flag("EDUPILOT_STRUCTURED_OUTPUT", False)
+        self.hedge = _flag("EDUPILOT_HEDGE", False)
+        self.hedge_file = env("EDUPILOT_HEDGE_FILE", "llm_hedging.json")
+        self.hedge_budget = float(env("EDUPILOT_HEDGE_BUDGET", 0.1))
+        self.hedge_burst = float(env("EDUPILOT_HEDGE_BURST", 3.0))
+
+        # Link verification for reading materials (modules/link_checker.py)
+        self.link_check = env("EDUPILOT_LINK_CHECK", "off").lower()  # opt-in: checks call out to every cited site
+        self.link_check_per_host = int(env("EDUPILOT_LINK_CHECK_PER_HOST", 4))
+        self.link_check_timeout = float(env("EDUPILOT_LINK_CHECK_TIMEOUT", 5.0))
+
+        # Storage and runs
+        self.store_backend = env("EDUPILOT_STORE", "fs").lower()
+        self.store_dir = env("EDUPILOT_STORE_DIR", os.path.join(HOME_DIR, "artifacts"))
+        self.store_compress = _flag("EDUPILOT_STORE_COMPRESS", True)
+        self.runs_dir = env("EDUPILOT_RUNS_DIR", os.path.join(HOME_DIR, "runs"))
+        self.export_cache = env("EDUPILOT_EXPORT_CACHE", os.path.join(HOME_DIR, "export_cache"))
+        self.queue_db = env("EDUPILOT_QUEUE_DB", os.path.join(HOME_DIR, "jobs.sqlite3"))
+        self.tenant_max_running = int(env("EDUPILOT_TENANT_MAX_RUNNING", 2))
+        self.job_lease = float(env("EDUPILOT_JOB_LEASE", 60))
+        self.workers = int(env("EDUPILOT_WORKERS", 4))
+
+        # Telemetry
+        self.telemetry = _flag("EDUPILOT_TELEMETRY", True)
+        self.telemetry_file = env("EDUPILOT_TELEMETRY_FILE", os.path.join(HOME_DIR, "telemetry", "spans.jsonl"))
+
+    def provider_value(self, provider, name, default, cast=int):
+        """Per-provider override such as GEMINI_RPM or GROQ_MAX_CONCURRENCY."""
+        return cast(os.getenv(f"{provider.upper()}_{name}", default))
+
+    def value(self, name, default, cast=str):
+        """Any other environment setting (e.g. LLM_RETRY_MAX_ATTEMPTS), after .env is loaded."""
+        return cast(os.getenv(name, default))
+
+
+_settings = None
+_settings_lock = threading.Lock()
+_dotenv_loaded = False
+
+
+def _load_dotenv():
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    _dotenv_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def get_settings():
+    """Shared Settings, built on first use after loading .env (existing variables win)."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _load_dotenv()
+                _settings = Settings()
+    return _settings
+
+
+def reload_settings():
+    """Re-reads the environment; returns the new Settings."""
+    global _settings
+    with _settings_lock:
+        _load_dotenv()
+        _settings = Settings()
+    return _settings
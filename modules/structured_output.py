@@ -0,0 +1,302 @@
+"""
+Structured (JSON) output for learning objectives and curricula.
+
+In structured mode module1 and module2 ask the model for JSON (Gemini
+response schema / Groq JSON mode, via the provider-neutral response_schema
+parameter), then validate it here against typed schemas. Small defects are
+repaired locally instead of paying for another Pro call:
+
+    - code fences, text around the JSON object, trailing commas
+    - numbering, bullets and markdown left inside objective strings
+    - intro/heading lines ("Here are the objectives:") and duplicates
+    - extra objectives, unordered or misnumbered modules and weeks, extra weeks
+
+Each repair and each warning (e.g. an objective not starting with a Bloom verb
+for the level) is returned as a note; only output that cannot be repaired
+raises InvalidStructuredOutputError. The validated curriculum is rendered back
+to the usual markdown so app2.py and module3 keep working unchanged.
+"""
+import re
+import json
+
+from modules.llm_errors import InvalidStructuredOutputError
+from modules.settings import get_settings
+
+OBJECTIVES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "objectives": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["objectives"],
+}
+
+WEEK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "number": {"type": "integer"},
+        "title": {"type": "string"},
+        "topics": {"type": "string"},
+        "activities": {"type": "string"},
+        "assessment": {"type": "string"},
+    },
+    "required": ["number", "title", "topics", "activities", "assessment"],
+}
+
+CURRICULUM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "modules": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "number": {"type": "integer"},
+                    "title": {"type": "string"},
+                    "weeks": {"type": "array", "items": WEEK_SCHEMA},
+                },
+                "required": ["number", "title", "weeks"],
+            },
+        },
+    },
+    "required": ["modules"],
+}
+
+OBJECTIVE_COUNT = 5
+MIN_OBJECTIVES = 3  # fewer usable objectives than this is not worth repairing
+WEEK_FIELDS = ["topics", "activities", "assessment"]
+
+FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+TRAILING_COMMA_RE = re.compile(r",\s*([\]}])")
+LIST_MARKER_RE = re.compile(r"^\s*(?:[-*•]+|\(?\d+[.)]|[a-z][.)])\s+", re.IGNORECASE)
+LEAD_IN_RE = re.compile(r"^(?:by the end of (?:this|the) course,?\s*)?(?:students|learners|participants)\s+(?:will|should)\s+(?:be able to\s+)?",
+                        re.IGNORECASE)
+
+
+# --- JSON extraction ---
+def extract_json(text):
+    """Parses the first JSON object/array in text; returns (data, repairs)."""
+    repairs = []
+    cleaned = FENCE_RE.sub("", text.strip())
+    if cleaned != text.strip():
+        repairs.append("removed code fences")
+    start = min((i for i in (cleaned.find("{"), cleaned.find("[")) if i >= 0), default=-1)
+    end = max(cleaned.rfind("}"), cleaned.rfind("]"))
+    if start < 0 or end < start:
+        raise InvalidStructuredOutputError("No JSON object found in the response.")
+    if start > 0 or end < len(cleaned) - 1:
+        repairs.append("dropped text around the JSON")
+    cleaned = cleaned[start:end + 1]
+    try:
+        return json.loads(cleaned), repairs
+    except ValueError:
+        pass
+    fixed = TRAILING_COMMA_RE.sub(r"\1", cleaned)
+    try:
+        return json.loads(fixed), repairs + ["removed trailing commas"]
+    except ValueError as e:
+        raise InvalidStructuredOutputError(f"Response is not valid JSON: {e}") from e
+
+
+# --- Objectives ---
+def clean_objective(text):
+    """Strips list markers, markdown emphasis and "Students will be able to" lead-ins."""
+    text = LIST_MARKER_RE.sub("", str(text).strip())
+    text = text.replace("**", "").replace("__", "").strip()
+    stripped = LEAD_IN_RE.sub("", text)
+    if stripped != text and stripped:
+        text = stripped[0].upper() + stripped[1:]
+    return text.strip()
+
+
+def _is_heading(text):
+    return not text or text.endswith(":") or text.startswith("#") or len(text.split()) < 3
+
+
+def starts_with_verb(objective, verbs):
+    lowered = objective.lower()
+    return any(lowered.startswith(verb.lower() + " ") for verb in verbs)
+
+
+def validate_objectives(data, bloom_verbs=(), expected=OBJECTIVE_COUNT):
+    """
+    data: parsed JSON ({"objectives": [...]}, or a bare list; items may be
+    strings or {"text"/"objective": ...}). Returns (objectives, notes).
+    """
+    notes = []
+    items = data.get("objectives") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise InvalidStructuredOutputError("Expected an 'objectives' list.")
+
+    objectives, seen, cleaned_count = [], set(), 0
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get("text") or item.get("objective") or ""
+        cleaned = clean_objective(item)
+        if _is_heading(cleaned):
+            notes.append(f"repaired: dropped non-objective line '{str(item).strip()[:40]}'")
+            continue
+        if cleaned.lower() in seen:
+            notes.append(f"repaired: dropped duplicate '{cleaned[:40]}'")
+            continue
+        seen.add(cleaned.lower())
+        objectives.append(cleaned)
+        cleaned_count += cleaned != str(item).strip()
+    if cleaned_count:
+        notes.append(f"repaired: stripped list markers/markdown from {cleaned_count} objective(s)")
+
+    if len(objectives) < MIN_OBJECTIVES:
+        raise InvalidStructuredOutputError(f"Only {len(objectives)} usable objective(s) in the response.")
+    if len(objectives) > expected:
+        notes.append(f"repaired: kept the first {expected} of {len(objectives)} objectives")
+        objectives = objectives[:expected]
+    elif len(objectives) < expected:
+        notes.append(f"warning: {len(objectives)} objectives instead of {expected}")
+
+    off_level = [str(n) for n, objective in enumerate(objectives, 1) if bloom_verbs and not starts_with_verb(objective, bloom_verbs)]
+    if off_level:
+        notes.append(f"warning: objective(s) {', '.join(off_level)} do not start with a level verb ({', '.join(bloom_verbs)})")
+    return objectives, notes
+
+
+def parse_objectives(text, bloom_verbs=(), expected=OBJECTIVE_COUNT):
+    """JSON response -> (objectives, notes); plain-text answers are repaired line by line."""
+    try:
+        data, notes = extract_json(text)
+    except InvalidStructuredOutputError:
+        data, notes = text.splitlines(), ["repaired: parsed a plain-text answer line by line"]
+    objectives, more = validate_objectives(data, bloom_verbs, expected)
+    return objectives, notes + more
+
+
+# --- Curriculum ---
+def _as_int(value):
+    try:
+        return int(re.search(r"\d+", str(value)).group())
+    except (AttributeError, TypeError):
+        return None
+
+
+def validate_curriculum(data, semester_weeks, module_count=4):
+    """Returns ({"modules": [...]}, notes) with modules and weeks numbered in order."""
+    notes = []
+    modules = data.get("modules") if isinstance(data, dict) else data
+    if not isinstance(modules, list) or not modules:
+        raise InvalidStructuredOutputError("Expected a non-empty 'modules' list.")
+
+    numbered = []
+    for position, module in enumerate(modules):
+        if not isinstance(module, dict) or not isinstance(module.get("weeks"), list):
+            raise InvalidStructuredOutputError(f"Module {position + 1} has no 'weeks' list.")
+        numbered.append((_as_int(module.get("number")) or position + 1, position, module))
+    numbered.sort()
+    if [n for n, _, _ in numbered] != list(range(1, len(numbered) + 1)):
+        notes.append("repaired: renumbered modules")
+    if len(numbered) != module_count:
+        notes.append(f"warning: {len(numbered)} modules instead of {module_count}")
+
+    result, week_numbers = [], []
+    for index, (_, _, module) in enumerate(numbered, 1):
+        weeks = []
+        for week in module["weeks"]:
+            if not isinstance(week, dict):
+                raise InvalidStructuredOutputError(f"Module {index} has a malformed week entry.")
+            clean = {"number": _as_int(week.get("number")), "title": str(week.get("title") or "").strip()}
+            for field in WEEK_FIELDS:
+                value = week.get(field) or ""
+                clean[field] = "; ".join(map(str, value)) if isinstance(value, list) else str(value).strip()
+            if not clean["title"]:
+                raise InvalidStructuredOutputError(f"A week in module {index} has no title.")
+            weeks.append(clean)
+        weeks.sort(key=lambda week: (week["number"] is None, week["number"] or 0))
+        week_numbers += [week["number"] for week in weeks]
+        result.append({"number": index, "title": str(module.get("title") or f"Module {index}").strip(), "weeks": weeks})
+
+    total = len(week_numbers)
+    if total < semester_weeks:
+        raise InvalidStructuredOutputError(f"Curriculum covers {total} week(s), expected {semester_weeks}.")
+    if week_numbers != list(range(1, total + 1)):
+        notes.append("repaired: renumbered weeks in order")
+    number = 0
+    for module in result:
+        for week in module["weeks"]:
+            number += 1
+            week["number"] = number
+        if number > semester_weeks:
+            module["weeks"] = [week for week in module["weeks"] if week["number"] <= semester_weeks]
+    if total > semester_weeks:
+        notes.append(f"repaired: dropped {total - semester_weeks} week(s) past week {semester_weeks}")
+    empty = [module for module in result if not module["weeks"]]
+    if empty:
+        notes.append(f"repaired: dropped {len(empty)} module(s) with no weeks")
+        result = [module for module in result if module["weeks"]]
+        for index, module in enumerate(result, 1):
+            module["number"] = index
+
+    missing = [(m["number"], w["number"], f) for m in result for w in m["weeks"] for f in ("topics", "activities") if not w[f]]
+    for module_number, week_number, field in missing:
+        notes.append(f"warning: week {week_number} has no {field}")
+    return {"modules": result}, notes
+
+
+def render_curriculum_text(curriculum):
+    """Markdown in the format modules/curriculum_parser.py and app2.py expect."""
+    lines = []
+    for module in curriculum["modules"]:
+        weeks = module["weeks"]
+        lines += [f"**Module {module['number']}: {module['title']}**", f"Weeks: {weeks[0]['number']}-{weeks[-1]['number']}", ""]
+        for week in weeks:
+            lines += [
+                f"{week['number']}.  **Week {week['number']}: {week['title']}**",
+                f"    *   **Topics**: {week['topics'] or '-'}",
+                f"    *   **Activities**: {week['activities'] or '-'}",
+                f"    *   **Assessment**: {week['assessment'] or 'None.'}",
+                "",
+            ]
+    return "\n".join(lines).strip()
+
+
+def parse_curriculum_json(text, semester_weeks, module_count=4):
+    """JSON response -> (curriculum_text, notes)."""
+    data, notes = extract_json(text)
+    curriculum, more = validate_curriculum(data, semester_weeks, module_count)
+    return render_curriculum_text(curriculum), notes + more
+
+
+def report_notes(what, notes):
+    repairs = [note for note in notes if not note.startswith("warning:")]
+    warnings = [note for note in notes if note.startswith("warning:")]
+    if repairs:
+        print(f"🔧 Repaired {what} locally: {'; '.join(note.replace('repaired: ', '') for note in repairs)}")
+    for note in warnings:
+        print(f"⚠️ {what}: {note.replace('warning: ', '')}")
+
+
+# --- Generation helpers ---
+MAX_ATTEMPTS = 2  # one extra model call, only when the output cannot be repaired
+
+
+def structured_enabled(structured=None):
+    """Explicit flag, else EDUPILOT_STRUCTURED_OUTPUT=1 (off by default)."""
+    if structured is not None:
+        return bool(structured)
+    return get_settings().structured_output
+
+
+async def generate_validated(client, task, prompt, schema, parse, use_cache=True, refresh=False, attempts=MAX_ATTEMPTS):
+    """
+    Requests JSON for task and returns (text, parsed, notes), where parse(text)
+    returns (parsed, notes). A retry (bypassing the cached answer) happens only
+    when parse raises InvalidStructuredOutputError.
+    """
+    error = None
+    for attempt in range(attempts):
+        text = (await client.generate(
+            task, prompt, use_cache=use_cache, refresh=refresh or attempt > 0, response_schema=schema
+        )).strip()
+        try:
+            parsed, notes = parse(text)
+            return text, parsed, notes
+        except InvalidStructuredOutputError as e:
+            print(f"⚠️ Unrepairable {task} output (attempt {attempt + 1}/{attempts}): {e}")
+            error = e
+    raise error
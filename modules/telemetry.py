@@ -0,0 +1,317 @@
+"""
+Per-call spans for every LLM request: stage, week, section, provider, model,
+time to first token, latency, tokens in/out, cache hit, retries.
+
+Spans are appended to a local JSONL file (EDUPILOT_TELEMETRY_FILE, disable with
+EDUPILOT_TELEMETRY=0), aggregated into Prometheus-style counters, and can be
+collected per pipeline run for a summary report.
+
+    with telemetry.labels(stage="content", week=3):
+        ...  # every call made in here is tagged with stage/week
+"""
+import os
+import json
+import time
+import threading
+import contextlib
+import contextvars
+from collections import defaultdict
+
+from modules.settings import get_settings
+
+_labels = contextvars.ContextVar("edupilot_labels", default={})
+_current_span = contextvars.ContextVar("edupilot_span", default=None)
+
+
+@contextlib.contextmanager
+def labels(**fields):
+    """Tags every span started inside the block (merged with any outer labels)."""
+    token = _labels.set({**_labels.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+class Span:
+    def __init__(self, provider, model, prompt_chars=0):
+        self.fields = {
+            "ts": time.time(),
+            "run_id": None,
+            "stage": None,
+            "task": None,
+            "week": None,
+            "section": None,
+            **_labels.get(),
+            "provider": provider,
+            "model": model,
+            "prompt_chars": prompt_chars,
+            "ttft_s": None,
+            "latency_s": None,
+            "tokens_in": None,
+            "tokens_out": None,
+            "tokens_estimated": False,
+            "cache_hit": True,
+            "retries": 0,
+            "rate_limit_wait_s": 0.0,
+            "status": "ok",
+            "error": None,
+        }
+        self._started = time.perf_counter()
+
+    def mark_first_token(self):
+        if self.fields["ttft_s"] is None:
+            self.fields["ttft_s"] = round(time.perf_counter() - self._started, 4)
+
+    def finish(self, error=None, output_chars=0):
+        self.fields["latency_s"] = round(time.perf_counter() - self._started, 4)
+        self.mark_first_token()
+        if error is not None:
+            self.fields["status"] = type(error).__name__
+            self.fields["error"] = str(error)[:500]
+        if not self.fields["cache_hit"] and self.fields["tokens_in"] is None:
+            # Provider gave no usage data: fall back to the ~4 chars/token estimate
+            self.fields["tokens_in"] = max(1, self.fields["prompt_chars"] // 4)
+            self.fields["tokens_out"] = max(0, output_chars // 4)
+            self.fields["tokens_estimated"] = True
+        if self.fields["cache_hit"]:
+            self.fields["tokens_in"] = self.fields["tokens_out"] = 0
+        emit(self.fields)
+
+
+# --- Hooks called from the client, guard and providers ---
+def start_span(provider, model, prompt=""):
+    return Span(provider, model, len(prompt or ""))
+
+
+@contextlib.contextmanager
+def track(span):
+    """Makes span current for the enclosed call and emits it when the call ends."""
+    token = _current_span.set(span)
+    result = {"chars": 0}
+    try:
+        yield result
+    except BaseException as e:
+        span.finish(error=e)
+        raise
+    else:
+        span.finish(output_chars=result["chars"])
+    finally:
+        _current_span.reset(token)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def mark_called():
+    span = _current_span.get()
+    if span:
+        span.fields["cache_hit"] = False
+
+
+def mark_first_token():
+    span = _current_span.get()
+    if span:
+        span.mark_first_token()
+
+
+def record_usage(tokens_in=None, tokens_out=None):
+    span = _current_span.get()
+    if span and tokens_in is not None:
+        span.fields["tokens_in"] = int(tokens_in)
+        span.fields["tokens_out"] = int(tokens_out or 0)
+        span.fields["tokens_estimated"] = False
+
+
+def record_retry():
+    span = _current_span.get()
+    if span:
+        span.fields["retries"] += 1
+
+
+def record_wait(seconds):
+    span = _current_span.get()
+    if span and seconds:
+        span.fields["rate_limit_wait_s"] = round(span.fields["rate_limit_wait_s"] + seconds, 4)
+
+
+# --- Sinks ---
+class JSONLSink:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def __call__(self, fields):
+        line = json.dumps(fields, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class Metrics:
+    """In-process counters rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.latency_sum = defaultdict(float)
+        self.tokens_in = defaultdict(int)
+        self.tokens_out = defaultdict(int)
+        self.retries = defaultdict(int)
+
+    def __call__(self, fields):
+        key = (fields["provider"], fields["model"], fields.get("task") or fields.get("stage") or "", str(fields["cache_hit"]).lower(), fields["status"])
+        with self._lock:
+            self.calls[key] += 1
+            self.latency_sum[key] += fields["latency_s"] or 0.0
+            self.tokens_in[key] += fields["tokens_in"] or 0
+            self.tokens_out[key] += fields["tokens_out"] or 0
+            self.retries[key] += fields["retries"]
+
+    def render(self):
+        lines = []
+        series = [
+            ("edupilot_llm_calls_total", "counter", "LLM calls", self.calls),
+            ("edupilot_llm_latency_seconds_sum", "counter", "Total LLM call latency", self.latency_sum),
+            ("edupilot_llm_tokens_in_total", "counter", "Prompt tokens", self.tokens_in),
+            ("edupilot_llm_tokens_out_total", "counter", "Completion tokens", self.tokens_out),
+            ("edupilot_llm_retries_total", "counter", "Retried attempts", self.retries),
+        ]
+        with self._lock:
+            for name, kind, help_text, values in series:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for (provider, model, task, cache_hit, status), value in sorted(values.items()):
+                    lines.append(
+                        f'{name}{{provider="{provider}",model="{model}",task="{task}",cache_hit="{cache_hit}",status="{status}"}} {value}'
+                    )
+        return "\n".join(lines) + "\n"
+
+
+_sinks = []
+_sinks_lock = threading.Lock()
+metrics = Metrics()
+
+
+def _default_sinks():
+    sinks = [metrics]
+    settings = get_settings()
+    if settings.telemetry:
+        sinks.append(JSONLSink(settings.telemetry_file))
+    return sinks
+
+
+def add_sink(sink):
+    with _sinks_lock:
+        if not _sinks:
+            _sinks.extend(_default_sinks())
+        _sinks.append(sink)
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def emit(fields):
+    with _sinks_lock:
+        if not _sinks:
+            _sinks.extend(_default_sinks())
+        sinks = list(_sinks)
+    for sink in sinks:
+        try:
+            sink(fields)
+        except Exception as e:
+            print(f"⚠️ Telemetry sink failed: {e}")
+
+
+def prometheus_text():
+    return metrics.render()
+
+
+def export_prometheus(path):
+    """Writes the current counters to path (e.g. for a node_exporter textfile collector)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+# --- Per-run collection and summary ---
+@contextlib.contextmanager
+def collect(run_id=None):
+    """Collects every span emitted inside the block; yields the list."""
+    spans = []
+
+    def sink(fields):
+        if run_id is None or fields.get("run_id") == run_id:
+            spans.append(fields)
+
+    add_sink(sink)
+    try:
+        if run_id is None:
+            yield spans
+        else:
+            with labels(run_id=run_id):
+                yield spans
+    finally:
+        remove_sink(sink)
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+
+def summarize(spans):
+    """Aggregates spans per task (or stage) and provider/model."""
+    groups = defaultdict(list)
+    for span in spans:
+        groups[(span.get("task") or span.get("stage") or "-", f"{span['provider']}:{span['model']}")].append(span)
+
+    rows = []
+    for (task, model), items in sorted(groups.items()):
+        live = [s for s in items if not s["cache_hit"]]
+        latencies = [s["latency_s"] for s in live if s["latency_s"] is not None]
+        ttfts = [s["ttft_s"] for s in live if s["ttft_s"] is not None]
+        rows.append({
+            "task": task,
+            "model": model,
+            "calls": len(items),
+            "cache_hits": len(items) - len(live),
+            "errors": sum(1 for s in items if s["status"] != "ok"),
+            "retries": sum(s["retries"] for s in items),
+            "p50_latency_s": _percentile(latencies, 50),
+            "p95_latency_s": _percentile(latencies, 95),
+            "p50_ttft_s": _percentile(ttfts, 50),
+            "tokens_in": sum(s["tokens_in"] or 0 for s in items),
+            "tokens_out": sum(s["tokens_out"] or 0 for s in items),
+            "rate_limit_wait_s": round(sum(s["rate_limit_wait_s"] for s in items), 3),
+        })
+    return {
+        "calls": len(spans),
+        "cache_hits": sum(1 for s in spans if s["cache_hit"]),
+        "tokens_in": sum(s["tokens_in"] or 0 for s in spans),
+        "tokens_out": sum(s["tokens_out"] or 0 for s in spans),
+        "rows": rows,
+    }
+
+
+def format_summary(summary):
+    lines = [
+        f"LLM calls: {summary['calls']} ({summary['cache_hits']} cache hits), "
+        f"tokens in/out: {summary['tokens_in']}/{summary['tokens_out']}",
+        f"{'task':<22}{'model':<38}{'calls':>6}{'hits':>6}{'err':>5}{'retry':>6}{'p50 s':>8}{'p95 s':>8}{'ttft s':>8}{'tok in':>9}{'tok out':>9}",
+    ]
+    for row in summary["rows"]:
+        fmt = lambda v: "-" if v is None else f"{v:.2f}"
+        lines.append(
+            f"{row['task']:<22}{row['model']:<38}{row['calls']:>6}{row['cache_hits']:>6}{row['errors']:>5}{row['retries']:>6}"
+            f"{fmt(row['p50_latency_s']):>8}{fmt(row['p95_latency_s']):>8}{fmt(row['p50_ttft_s']):>8}{row['tokens_in']:>9}{row['tokens_out']:>9}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,101 @@
+"""
+Shared Streamlit helpers for app.py, app2.py and app3.py.
+
+Anything expensive that depends only on its inputs (CSS file, curriculum
+splitting, DOCX rendering via modules/exporter.py, stored artifacts) is cached with st.cache_data, so
+widget interaction after a generation reruns the script without redoing work.
+Generated results are kept in st.session_state by the apps themselves.
+"""
+import io
+import json
+import hashlib
+
+import streamlit as st
+
+from modules.curriculum_parser import split_modules
+from modules.artifact_store import load_json
+from modules.exporter import render_docx, curriculum_blocks, week_blocks
+
+CSS_PATH = "HtmlCSS/streamlit.css"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+@st.cache_data(show_spinner=False)
+def _read_css(file_name):
+    with open(file_name, encoding="utf-8") as f:
+        return f.read()
+
+
+def local_css(file_name=CSS_PATH):
+    try:
+        st.markdown(f'<style>{_read_css(file_name)}</style>', unsafe_allow_html=True)
+    except FileNotFoundError:
+        st.error(f"CSS file not found: {file_name}. Make sure the 'styles' directory and 'style.css' file exist.")
+
+
+def input_key(*values):
+    """Stable key for a set of widget values (used to tell whether stored results still match the inputs)."""
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def upload_digest(uploaded_file):
+    """Content hash of an st.file_uploader file (None when nothing is uploaded)."""
+    return hashlib.sha256(uploaded_file.getvalue()).hexdigest() if uploaded_file else None
+
+
+@st.cache_data(show_spinner=False)
+def curriculum_sections(curriculum_text):
+    return split_modules(curriculum_text)
+
+
+@st.cache_data(show_spinner=False)
+def artifact_json(artifact_id):
+    """Pretty JSON of a stored artifact; ids are content-hashed, so this never goes stale."""
+    return json.dumps(load_json(artifact_id), indent=4, ensure_ascii=False)
+
+
+def _docx_bytes(doc):
+    bio = io.BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def curriculum_docx(curriculum_text):
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading("Curriculum Plan", level=0)
+    render_docx(doc, curriculum_blocks({"curriculum_text": curriculum_text}))
+    return _docx_bytes(doc)
+
+
+@st.cache_data(show_spinner=False)
+def week_docx(week_number, content):
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading(f'Course Content: Week {week_number}', level=0)
+    render_docx(doc, week_blocks(week_number, content))
+    return _docx_bytes(doc)
+
+
+def lazy_download(label, key, build, file_name, mime, use_container_width=True):
+    """
+    Download button whose payload is only built on request: a first click on
+    "Prepare ..." runs build() (cached by the caller), then the real download
+    button is shown for the rest of the session.
+    """
+    ready_key = f"_download_ready_{key}"
+    if not st.session_state.get(ready_key):
+        if not st.button(f"⚙️ Prepare {label}", key=f"prepare_{key}", use_container_width=use_container_width):
+            return
+        st.session_state[ready_key] = True
+    st.download_button(
+        label=f"📥 Download {label}",
+        data=build(),
+        file_name=file_name,
+        mime=mime,
+        use_container_width=use_container_width,
+        key=f"download_{key}",
+    )
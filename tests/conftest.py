@@ -0,0 +1,38 @@
+"""
+Shared fixtures: every test runs against the offline mock backend with the
+caches, artifact store, runs and queue under its own tmp_path.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FAST_MOCK = {"latency": {"distribution": "fixed", "seconds": 0}, "tokens_per_second": 1e9}
+
+
+@pytest.fixture(autouse=True)
+def edupilot_env(tmp_path, monkeypatch):
+    """Isolated EDUPILOT_* settings and fresh process-wide singletons."""
+    from modules import settings, llm_cache, artifact_store, llm_client, rate_limiter, hedging, link_checker
+
+    monkeypatch.setenv("EDUPILOT_LLM_BACKEND", "mock")
+    monkeypatch.setenv("EDUPILOT_MOCK_CONFIG", json.dumps(FAST_MOCK))
+    for name, sub in (("CACHE_DIR", "cache"), ("STORE_DIR", "artifacts"), ("RUNS_DIR", "runs"),
+                      ("EXPORT_CACHE", "export_cache"), ("QUEUE_DB", "jobs.sqlite3")):
+        monkeypatch.setenv(f"EDUPILOT_{name}", str(tmp_path / sub))
+    monkeypatch.setenv("EDUPILOT_TELEMETRY_FILE", str(tmp_path / "telemetry" / "spans.jsonl"))
+    for name in ("EDUPILOT_SEMANTIC_CACHE", "EDUPILOT_STRUCTURED_OUTPUT", "EDUPILOT_HEDGE", "EDUPILOT_LINK_CHECK"):
+        monkeypatch.delenv(name, raising=False)
+
+    monkeypatch.setattr(settings, "_settings", None)
+    monkeypatch.setattr(llm_cache, "_default_cache", None)
+    monkeypatch.setattr(artifact_store, "_default_store", None)
+    monkeypatch.setattr(llm_client, "_client", None)
+    monkeypatch.setattr(rate_limiter, "_guards", {})
+    monkeypatch.setattr(hedging, "_hedger", None)
+    monkeypatch.setattr(hedging, "_installed", False)
+    monkeypatch.setattr(link_checker, "_checker", None)
+    return tmp_path
@@ -0,0 +1,57 @@
+import pytest
+
+from modules.artifact_store import BACKENDS, course_key, is_artifact_id
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def store(request, tmp_path):
+    return BACKENDS[request.param](root=str(tmp_path / request.param))
+
+
+def test_course_key_keeps_plain_names_and_separates_lossy_ones():
+    assert course_key("Web Development") == course_key("web-development") == "web-development"
+    assert course_key("C++ Programming") != course_key("C# Programming")
+    assert course_key("C++ Programming").startswith("c-programming-")
+    assert course_key(course_key("C++ Programming")) == course_key("C++ Programming")
+    assert course_key(None) == "unknown"
+
+
+def test_new_content_adds_a_version(store):
+    first = store.put("objectives", {"objectives": ["a"]}, course="Web Development")
+    second = store.put("objectives", {"objectives": ["b"]}, course="Web Development")
+
+    assert is_artifact_id(first) and is_artifact_id(second)
+    assert first.startswith("objectives/web-development/v1-") and second.startswith("objectives/web-development/v2-")
+    assert store.latest("objectives", "Web Development") == second
+    assert store.get(first) == {"objectives": ["a"]}
+    assert [row["version"] for row in store.list(kind="objectives", course="Web Development")] == [2, 1]
+
+
+def test_same_content_keeps_the_latest_id_and_updates_meta(store):
+    first = store.put("week_content", {"text": "x"}, course="Web Development", week=3, meta={"inputs": "old"})
+    again = store.put("week_content", {"text": "x"}, course="Web Development", week=3, meta={"inputs": "new"})
+
+    assert again == first and "/w03/v1-" in first
+    assert store.info(first)["meta"] == {"inputs": "new"}
+    assert len(store.list(course="Web Development")) == 1
+
+
+def test_identical_payloads_share_one_blob(store):
+    one = store.put("objectives", {"objectives": ["a"]}, course="Course A")
+    two = store.put("objectives", {"objectives": ["a"]}, course="Course B")
+
+    assert one != two
+    store.delete(one)
+    assert store.get(two) == {"objectives": ["a"]}
+    with pytest.raises(KeyError):
+        store.get(one)
+
+
+def test_colliding_slugs_are_separate_courses(store):
+    cpp = store.put("objectives", {"objectives": ["templates"]}, course="C++ Programming")
+    csharp = store.put("objectives", {"objectives": ["LINQ"]}, course="C# Programming")
+
+    assert "/v1-" in cpp and "/v1-" in csharp  # neither is a new version of the other
+    assert store.latest("objectives", "C++ Programming") == cpp
+    assert store.latest("objectives", "C# Programming") == csharp
+    assert store.get(store.latest("objectives", "C++ Programming")) == {"objectives": ["templates"]}
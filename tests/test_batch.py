@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from modules.batch import read_manifest, run_batch
+
+
+def write_manifest(tmp_path, lines):
+    path = tmp_path / "catalogue.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def results(output_dir):
+    with open(output_dir / "results.jsonl", encoding="utf-8") as f:
+        return {record["row"]: record for record in map(json.loads, f)}
+
+
+def test_read_manifest_reports_bad_lines_instead_of_raising(tmp_path):
+    path = write_manifest(tmp_path, ['{"topic": "Databases"}', "# comment", '{"topic": ', '["Networks"]', ""])
+
+    rows = list(read_manifest(path))
+
+    assert rows[0] == (1, {"topic": "Databases"}, None)
+    assert rows[1][:2] == (2, None) and rows[1][2].startswith("invalid JSON")
+    assert rows[2] == (3, None, "expected a JSON object, got list")
+
+
+def test_bad_rows_are_recorded_and_the_rest_still_run(tmp_path):
+    path = write_manifest(tmp_path, [
+        '{"id": "db", "topic": "Databases", "weeks": 2}',
+        '{"topic": "Broken",',
+        '"just a string"',
+        '{"topic": "Networks", "weeks": [2]}',
+        '{"weeks": 2}',
+    ])
+    output_dir = tmp_path / "out"
+
+    summary = asyncio.run(run_batch(path, str(output_dir), concurrency=2))
+
+    assert summary["completed"] == 1 and summary["failed"] == 4
+    records = results(output_dir)
+    assert sorted(records) == [1, 2, 3, 4, 5]
+    assert records[1]["status"] == "ok" and records[1]["key"] == "db"
+    assert "invalid JSON" in records[2]["error"]
+    assert "expected a JSON object" in records[3]["error"]
+    assert records[4]["error"].startswith("TypeError")
+    assert "missing topic" in records[5]["error"]
+
+    again = asyncio.run(run_batch(path, str(output_dir), concurrency=2))
+    assert again["skipped"] == 1 and again["failed"] == 4
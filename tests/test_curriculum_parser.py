@@ -0,0 +1,64 @@
+from modules.curriculum_parser import (
+    PARSER_VERSION, course_outline, find_week, get_structure, parse_curriculum, split_modules
+)
+
+CURRICULUM = """Here is the plan.
+
+**Module 1: Foundations**
+Weeks 1-2
+1. **Week 1: Introduction to the Web**
+   * **Topics**: HTTP, browsers
+     and DNS
+   * **Activities**: Inspect requests
+   * **Assessment**: None
+2. **Week 2: HTML**
+   - Topics: Semantic markup
+   - Activity: Build a page
+
+**Module 2: Styling**
+3. **Week 3: CSS**
+   * Topics: Selectors
+   * Assessments: Quiz 1
+"""
+
+
+def test_modules_weeks_and_fields():
+    structure = parse_curriculum(CURRICULUM)
+
+    assert structure["parser_version"] == PARSER_VERSION
+    assert structure["preamble"] == "Here is the plan."
+    first, second = structure["modules"]
+    assert (first["number"], first["title"], first["weeks_range"]) == (1, "Foundations", [1, 2])
+    assert second["weeks_range"] == [3, 3]  # taken from its weeks when not stated
+    week1 = first["weeks"][0]
+    assert week1["title"] == "Introduction to the Web"
+    assert week1["topics"] == "HTTP, browsers and DNS"  # continuation lines are joined
+    assert first["weeks"][1]["activities"] == "Build a page"
+    assert second["weeks"][0]["assessment"] == "Quiz 1"
+
+
+def test_find_week_and_outline():
+    structure = parse_curriculum(CURRICULUM)
+
+    module, week = find_week(structure, 3)
+    assert module["title"] == "Styling" and week["title"] == "CSS"
+    assert find_week(structure, 9) == (None, None)
+    assert course_outline(structure).splitlines()[:2] == ["Module 1: Foundations (Weeks 1-2)", "  Week 1: Introduction to the Web"]
+
+
+def test_weeks_without_module_headers_go_in_one_module():
+    structure = parse_curriculum("**Week 1: Basics**\n- Topics: A\n**Week 2: More**\n- Topics: B")
+
+    (module,) = structure["modules"]
+    assert [week["number"] for week in module["weeks"]] == [1, 2]
+
+
+def test_stale_stored_structure_is_reparsed():
+    stored = {"curriculum_text": CURRICULUM, "curriculum_structure": {"parser_version": 0, "modules": []}}
+
+    assert len(get_structure(stored)["modules"]) == 2
+
+
+def test_split_modules_falls_back_to_one_block():
+    assert [header for header, _ in split_modules(CURRICULUM)] == ["Overview", "Module 1: Foundations", "Module 2: Styling"]
+    assert split_modules("Just some text") == [("Overview", "Just some text")]
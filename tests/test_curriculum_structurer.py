@@ -0,0 +1,24 @@
+import asyncio
+
+from modules.artifact_store import get_store
+from modules.module2_curriculum_structurer import generate_curriculum_async, objective_lines
+
+
+def test_objective_lines_splits_pasted_text():
+    assert objective_lines("  Build a REST API\n\nDeploy it \n") == ["Build a REST API", "Deploy it"]
+    assert objective_lines(["Build a REST API"]) == ["Build a REST API"]
+    assert objective_lines(None) == []
+
+
+def test_text_objectives_are_stored_as_lines(monkeypatch):
+    monkeypatch.setenv("EDUPILOT_SEMANTIC_CACHE", "1")
+
+    text, artifact_id = asyncio.run(generate_curriculum_async(
+        "Design relational schemas\nWrite SQL queries", 4, course_name="Databases"
+    ))
+
+    assert text and artifact_id
+    stored = get_store().get(artifact_id)
+    assert stored["learning_objectives"] == ["Design relational schemas", "Write SQL queries"]
+    weeks = [week["number"] for module in stored["curriculum_structure"]["modules"] for week in module["weeks"]]
+    assert weeks == [1, 2, 3, 4]
@@ -0,0 +1,185 @@
+"""Markdown parsing, the three renderers and per-week fragment reuse in the course exporter."""
+import json
+
+import pytest
+
+from modules import exporter
+from modules.artifact_store import get_store
+from modules.exporter import FragmentCache, export_course, parse_markdown, render_html, render_week_fragment
+
+SAMPLE = """## Overview
+Intro line one
+continues here.
+
+**Key Ideas**
+- First **bold** point
+   - Nested with `code`
+1. Step one
+2. Step [two](https://example.com/two)
+
+```
+print("<hi>")
+```
+
+| Term | Meaning |
+|------|---------|
+| DAG | graph |
+"""
+
+
+def week_content(tag):
+    return {section: f"{tag} {section} text" for section, _ in exporter.SECTION_TITLES}
+
+
+def test_parse_markdown_blocks():
+    blocks = parse_markdown(SAMPLE)
+
+    assert blocks == [
+        {"type": "heading", "level": 2, "text": "Overview"},
+        {"type": "para", "text": "Intro line one continues here."},
+        {"type": "heading", "level": 4, "text": "Key Ideas"},
+        {"type": "list", "ordered": False, "level": 0, "text": "First **bold** point"},
+        {"type": "list", "ordered": False, "level": 1, "text": "Nested with `code`"},
+        {"type": "list", "ordered": True, "level": 0, "text": "Step one"},
+        {"type": "list", "ordered": True, "level": 0, "text": "Step [two](https://example.com/two)"},
+        {"type": "code", "text": 'print("<hi>")'},
+        {"type": "table", "rows": [["Term", "Meaning"], ["DAG", "graph"]]},
+    ]
+
+
+def test_parse_markdown_joins_wrapped_list_items_and_closes_open_fences():
+    blocks = parse_markdown("- a long item\n  that wraps\n```\nunterminated")
+
+    assert blocks == [
+        {"type": "list", "ordered": False, "level": 0, "text": "a long item that wraps"},
+        {"type": "code", "text": "unterminated"},
+    ]
+
+
+def test_render_html_structure_and_escaping():
+    out = render_html(parse_markdown(SAMPLE))
+
+    assert "<h2>Overview</h2>" in out and "<h4>Key Ideas</h4>" in out
+    assert "<ul>\n<li>First <strong>bold</strong> point</li>\n<ul>\n<li>Nested with <code>code</code></li>\n</ul>\n</ul>" in out
+    assert '<ol>\n<li>Step one</li>\n<li>Step <a href="https://example.com/two">two</a></li>\n</ol>' in out
+    assert "<pre><code>print(&quot;&lt;hi&gt;&quot;)</code></pre>" in out
+    assert "<tr><th>Term</th><th>Meaning</th></tr>" in out and "<tr><td>DAG</td><td>graph</td></tr>" in out
+
+
+def test_render_html_escapes_model_text():
+    assert render_html([{"type": "para", "text": "<script>alert(1)</script>"}]) == \
+        "<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>\n"
+
+
+def test_render_docx_uses_heading_list_and_table_styles():
+    docx = pytest.importorskip("docx")
+    doc = docx.Document()
+
+    exporter.render_docx(doc, parse_markdown(SAMPLE))
+
+    styles = [(p.style.name, p.text) for p in doc.paragraphs]
+    assert ("Heading 2", "Overview") in styles and ("Heading 4", "Key Ideas") in styles
+    assert ("List Bullet", "First bold point") in styles
+    assert ("List Bullet 2", "Nested with code") in styles
+    assert ("List Number", "Step two (https://example.com/two)") in styles
+    assert [[cell.text for cell in row.cells] for row in doc.tables[0].rows] == [["Term", "Meaning"], ["DAG", "graph"]]
+
+
+@pytest.fixture
+def counted_renders(monkeypatch):
+    """Week numbers passed to week_blocks, i.e. fragments that were actually rendered."""
+    rendered = []
+    original = exporter.week_blocks
+
+    def week_blocks(week_number, content, title=""):
+        rendered.append(week_number)
+        return original(week_number, content, title)
+
+    monkeypatch.setattr(exporter, "week_blocks", week_blocks)
+    return rendered
+
+
+def test_fragment_cache_reuses_unchanged_content(tmp_path, counted_renders):
+    cache = FragmentCache(str(tmp_path / "fragments"))
+    content = week_content("v1")
+
+    first = render_week_fragment("html", 1, content, "Intro", cache)
+    again = render_week_fragment("html", 1, dict(content), "Intro", cache)
+
+    assert first == again and counted_renders == [1]
+
+
+@pytest.mark.parametrize("change", [
+    {"week_ref": week_content("v2")},
+    {"title": "Renamed"},
+    {"fmt": "md"},
+])
+def test_fragment_cache_invalidates_on_content_title_or_format(tmp_path, counted_renders, change):
+    cache = FragmentCache(str(tmp_path / "fragments"))
+    args = {"fmt": "html", "week_number": 1, "week_ref": week_content("v1"), "title": "Intro"}
+    render_week_fragment(cache=cache, **args)
+
+    render_week_fragment(cache=cache, **{**args, **change})
+
+    assert counted_renders == [1, 1]
+
+
+def test_fragment_cache_invalidates_on_export_version(tmp_path, counted_renders, monkeypatch):
+    cache = FragmentCache(str(tmp_path / "fragments"))
+    render_week_fragment("md", 1, week_content("v1"), "", cache)
+
+    monkeypatch.setattr(exporter, "EXPORT_VERSION", exporter.EXPORT_VERSION + 1)
+    render_week_fragment("md", 1, week_content("v1"), "", cache)
+
+    assert counted_renders == [1, 1]
+
+
+def test_reexport_renders_only_the_changed_week(tmp_path, counted_renders):
+    store = get_store()
+    week_ids = {week: store.put("week_content", week_content(f"w{week}"), course="Export Course", week=week)
+                for week in (1, 2, 3)}
+    output = str(tmp_path / "course.md")
+    export_course(output, week_ids=week_ids)
+
+    week_ids[2] = store.put("week_content", week_content("w2 edited"), course="Export Course", week=2)
+    counted_renders.clear()
+    export_course(output, week_ids=week_ids)
+
+    assert counted_renders == [2]
+    text = open(output, encoding="utf-8").read()
+    assert text.index("# Week 1") < text.index("# Week 2") < text.index("# Week 3")
+    assert "w2 edited lecture_notes text" in text and "w2 lecture_notes" not in text
+
+
+def test_export_docx_caches_parsed_blocks(tmp_path, counted_renders):
+    docx = pytest.importorskip("docx")
+    output = str(tmp_path / "course.docx")
+    week_ids = {1: week_content("w1")}
+
+    export_course(output, week_ids=week_ids)
+    export_course(output, week_ids=week_ids)
+
+    assert counted_renders == [1]
+    headings = [p.text for p in docx.Document(output).paragraphs if p.style.name.startswith("Heading")]
+    assert "Week 1" in headings and "Lecture Notes" in headings
+
+
+def test_export_without_cache_always_renders(tmp_path, counted_renders):
+    output = str(tmp_path / "course.html")
+    export_course(output, week_ids={1: week_content("w1")}, use_cache=False)
+    export_course(output, week_ids={1: week_content("w1")}, use_cache=False)
+
+    assert counted_renders == [1, 1]
+    assert open(output, encoding="utf-8").read().rstrip().endswith("</body></html>")
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        export_course(str(tmp_path / "course.pdf"), week_ids={1: week_content("w1")})
+
+
+def test_fragment_for_docx_is_json_blocks():
+    fragment = render_week_fragment("docx", 3, week_content("w3"), "Graphs")
+
+    blocks = json.loads(fragment)
+    assert blocks[0] == {"type": "heading", "level": 2, "text": "Week 3: Graphs"}
@@ -0,0 +1,46 @@
+"""Import-time budget from the benchmark's imports scenario, enforced per module."""
+import pytest
+
+from modules import benchmark
+from modules.benchmark import IMPORT_BUDGET_S, IMPORT_TARGETS, bench_imports, import_problems
+
+
+@pytest.mark.parametrize("target", IMPORT_TARGETS)
+def test_import_stays_light(target):
+    results = {"imports": bench_imports([target])}
+    row = results["imports"]["modules"][0]
+    if "skipped" in row:
+        pytest.skip(row["skipped"])
+
+    assert not import_problems(results)
+    assert row["import_s"] <= IMPORT_BUDGET_S and row["heavy"] == []
+
+
+@pytest.fixture
+def probe_modules(tmp_path, monkeypatch):
+    """Writes importable modules under tmp_path for the import probe."""
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+
+    def write(name, source):
+        (tmp_path / f"{name}.py").write_text(source)
+        return name
+    return write
+
+
+def test_broken_first_party_import_fails_instead_of_skipping(probe_modules):
+    target = probe_modules("probe_broken", "from modules.no_such_module import helper\n")
+
+    results = {"imports": bench_imports([target], runs=1)}
+
+    assert "skipped" not in results["imports"]["modules"][0]
+    assert import_problems(results) == [f"{target}: import failed (ModuleNotFoundError: "
+                                        "No module named 'modules.no_such_module')"]
+
+
+def test_missing_third_party_package_is_skipped(probe_modules, monkeypatch):
+    monkeypatch.setattr(benchmark, "THIRD_PARTY_PACKAGES", [*benchmark.THIRD_PARTY_PACKAGES, "edupilot_absent_pkg"])
+    target = probe_modules("probe_optional", "import edupilot_absent_pkg.sub\n")
+
+    row = bench_imports([target], runs=1)["modules"][0]
+
+    assert "edupilot_absent_pkg" in row["skipped"] and "error" not in row
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from modules.job_queue import JobQueue, make_http_handler
+
+
+def make_queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / "queue.sqlite3"), **kwargs)
+
+
+def claim_all(queue, worker="w1"):
+    claimed = []
+    while (job := queue.claim(worker)) is not None:
+        claimed.append(job)
+    return claimed
+
+
+def test_claim_prefers_priority_then_submission_order(tmp_path):
+    queue = make_queue(tmp_path, tenant_max_running=10)
+    low = queue.submit("alice", "objectives", {"topic": "A"})
+    high = queue.submit("alice", "objectives", {"topic": "B"}, priority=5)
+    later = queue.submit("alice", "objectives", {"topic": "C"})
+
+    assert [job["id"] for job in claim_all(queue)] == [high, low, later]
+
+
+def test_claim_balances_tenants_and_caps_running(tmp_path):
+    queue = make_queue(tmp_path, tenant_max_running=2)
+    alice = [queue.submit("alice", "objectives", {"topic": f"A{i}"}, priority=9) for i in range(3)]
+    bob = queue.submit("bob", "objectives", {"topic": "B"})
+
+    claimed = [job["id"] for job in claim_all(queue)]
+
+    # Alice's higher priority wins the first claim, then Bob has fewer running jobs,
+    # and Alice's third job waits for one of her two running slots
+    assert claimed == [alice[0], bob, alice[1]]
+    queue.finish(alice[0], "done", {}, worker="w1")
+    assert queue.claim("w1")["id"] == alice[2]
+
+
+def test_claim_records_worker_and_lease(tmp_path):
+    queue = make_queue(tmp_path, lease=30)
+    queue.submit("alice", "objectives", {"topic": "A"})
+
+    job = queue.claim("w1")
+
+    assert job["status"] == "running" and job["worker"] == "w1"
+    assert job["lease_until"] > time.time() + 20
+
+
+def test_requeue_expired_leaves_live_leases_alone(tmp_path):
+    queue = make_queue(tmp_path, lease=60)
+    live = queue.submit("alice", "objectives", {"topic": "A"})
+    stale = queue.submit("bob", "objectives", {"topic": "B"})
+    claim_all(queue)
+    queue._conn.execute("UPDATE jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, stale))
+
+    assert queue.requeue_expired() == 1
+    assert queue.get(live)["status"] == "running"
+    assert queue.get(stale)["status"] == "queued" and queue.get(stale)["worker"] is None
+
+
+def test_finish_and_heartbeat_need_the_current_lease(tmp_path):
+    queue = make_queue(tmp_path, lease=60)
+    job_id = queue.submit("alice", "objectives", {"topic": "A"})
+    queue.claim("w1")
+    queue._conn.execute("UPDATE jobs SET lease_until = 0 WHERE id = ?", (job_id,))
+    queue.requeue_expired()
+    queue.claim("w2")
+
+    assert not queue.heartbeat(job_id, "w1")
+    assert not queue.finish(job_id, "done", {"stale": True}, worker="w1")
+    assert queue.heartbeat(job_id, "w2")
+    assert queue.finish(job_id, "done", {"ok": True}, worker="w2")
+    assert queue.get(job_id)["result"] == {"ok": True}
+
+
+def test_expired_cancel_requested_job_is_cancelled(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("alice", "objectives", {"topic": "A"})
+    queue.claim("w1")
+    queue.cancel(job_id)
+    queue._conn.execute("UPDATE jobs SET lease_until = 0 WHERE id = ?", (job_id,))
+
+    assert queue.requeue_expired() == 0
+    assert queue.get(job_id)["status"] == "cancelled"
+
+
+def test_worker_pool_renews_lease_of_long_job(tmp_path, monkeypatch):
+    from modules import job_queue
+
+    calls = []
+
+    async def slow_job(params):
+        calls.append(params)
+        await asyncio.sleep(params["seconds"])
+        return {"slept": params["seconds"]}
+
+    monkeypatch.setitem(job_queue.JOB_HANDLERS, "slow", slow_job)
+    queue = make_queue(tmp_path, lease=0.3)
+    job_id = queue.submit("alice", "slow", {"seconds": 1.0})
+    pool = job_queue.WorkerPool(queue, workers=2, poll_interval=0.02)
+
+    async def run():
+        runner = asyncio.ensure_future(pool.run())
+        while queue.get(job_id)["status"] != "done":
+            assert queue.get(job_id)["status"] in ("queued", "running")
+            await asyncio.sleep(0.02)
+        pool.stop()
+        await runner
+
+    asyncio.run(run())
+    job = queue.get(job_id)
+    assert job["result"] == {"slept": 1.0} and job["worker"] == pool.worker_id
+    assert len(calls) == 1  # never requeued while its worker was alive
+
+
+def test_submit_rejects_unknown_and_missing_params(tmp_path):
+    queue = make_queue(tmp_path)
+
+    with pytest.raises(ValueError, match="run_dir"):
+        queue.submit("alice", "course", {"topic": "Web", "run_dir": "/etc"})
+    with pytest.raises(ValueError, match="topic"):
+        queue.submit("alice", "course", {"weeks": 4})
+    with pytest.raises(ValueError, match="JSON object"):
+        queue.submit("alice", "course", ["topic"])
+    assert queue.list() == []
+    assert queue.submit("alice", "course", {"topic": "Web", "weeks": 4})
+
+
+def test_worker_fails_stored_job_with_unknown_params(tmp_path):
+    from modules import job_queue
+
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("alice", "course", {"topic": "Web"})
+    queue._conn.execute("UPDATE jobs SET params = ? WHERE id = ?", ('{"topic": "Web", "run_dir": "/tmp/x"}', job_id))
+    pool = job_queue.WorkerPool(queue, workers=1)
+
+    asyncio.run(pool._run_job(queue.claim(pool.worker_id)))
+
+    job = queue.get(job_id)
+    assert job["status"] == "failed" and "run_dir" in job["error"]
+
+
+@pytest.fixture
+def http_queue(tmp_path):
+    """The job endpoint on an ephemeral port; yields (queue, base_url)."""
+    queue = make_queue(tmp_path)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_http_handler(queue))
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield queue, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get_json(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.parametrize("limit", ["abc", "1.5", "0", "-1"])
+def test_list_rejects_bad_limit(http_queue, limit):
+    _, base = http_queue
+
+    status, body = get_json(f"{base}/jobs?limit={limit}")
+
+    assert status == 400 and body["error"].startswith("limit must be")
+
+
+def test_list_applies_limit(http_queue):
+    queue, base = http_queue
+    for topic in ("A", "B", "C"):
+        queue.submit("acme", "course", {"topic": topic})
+
+    status, body = get_json(f"{base}/jobs?limit=2")
+
+    assert status == 200 and len(body) == 2
@@ -0,0 +1,233 @@
+"""LinkChecker against a real HTTP server on localhost, and its target policy against stub transports."""
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from modules import link_checker
+from modules.link_checker import LinkCache, LinkChecker, extract_links, verify_reading_materials
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """/ok 200, /missing 404, /gone 410, /broken 503, /moved -> /ok, /no-head 405 on HEAD only, /slow 200 after a pause."""
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def _answer(self, body):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            path = self.path.split("?")[0]
+            if path.startswith("/slow"):
+                time.sleep(0.05)
+            if path == "/moved":
+                self.send_response(301)
+                self.send_header("Location", "/ok")
+            elif path == "/no-head" and not body:
+                self.send_response(405)
+            else:
+                codes = {"/missing": 404, "/gone": 410, "/broken": 503}
+                self.send_response(codes.get(path, 200))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def do_HEAD(self):
+        self._answer(body=False)
+
+    def do_GET(self):
+        self._answer(body=True)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StubHandler.in_flight = StubHandler.max_in_flight = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def checker(tmp_path):
+    checker = LinkChecker(cache=LinkCache(str(tmp_path / "links.sqlite3")), per_host=2, timeout=2.0, allow_private=True)
+    yield checker
+    checker.close()
+
+
+def test_statuses_from_a_local_server(server, checker):
+    urls = [f"{server}/{path}" for path in ("ok", "missing", "gone", "broken", "moved", "no-head")]
+
+    results = asyncio.run(checker.check_many(urls))
+
+    assert {url.rsplit("/", 1)[1]: (r.status, r.code) for url, r in results.items()} == {
+        "ok": ("ok", 200), "missing": ("dead", 404), "gone": ("dead", 410), "broken": ("error", 503),
+        "moved": ("ok", 200), "no-head": ("ok", 200),
+    }
+    assert results[f"{server}/moved"].final_url == f"{server}/ok"
+
+
+def test_results_are_cached(server, checker):
+    urls = [f"{server}/ok", f"{server}/missing"]
+    asyncio.run(checker.check_many(urls))
+
+    again = asyncio.run(checker.check_many(urls))
+
+    assert all(result.cached for result in again.values())
+    assert again[f"{server}/missing"].status == "dead"
+
+
+def test_per_host_limit(server, checker):
+    asyncio.run(checker.check_many([f"{server}/slow?{i}" for i in range(8)]))
+
+    assert StubHandler.max_in_flight <= checker.per_host
+
+
+def test_one_client_across_loops_and_threads(server, checker):
+    asyncio.run(checker.check(f"{server}/ok"))
+    client = checker._client
+    errors = []
+
+    def run():
+        try:
+            assert asyncio.run(checker.check(f"{server}/ok")).status == "ok"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert checker._client is client
+
+
+def test_close_releases_the_client_and_loop(server, checker):
+    asyncio.run(checker.check(f"{server}/ok"))
+    client, loop = checker._client, checker._loop
+
+    checker.close()
+
+    assert client.is_closed and checker._client is None and checker._loop is None
+    for _ in range(100):
+        if not loop.is_running():
+            break
+        time.sleep(0.01)
+    assert not loop.is_running()
+    assert asyncio.run(checker.check(f"{server}/ok")).status == "ok"  # a later check starts over
+
+
+def test_install_closes_the_previous_checker(server, checker):
+    link_checker.install(checker)
+    asyncio.run(checker.check(f"{server}/ok"))
+    client = checker._client
+
+    link_checker.install(None)
+
+    assert client.is_closed
+
+
+def test_verify_markdown_flags_and_drops(server, checker):
+    text = f"- [Guide]({server}/ok)\n- [Old notes]({server}/missing)\n- Status page: {server}/broken\n"
+
+    flagged, _ = asyncio.run(checker.verify_markdown(text, "flag"))
+    dropped, _ = asyncio.run(checker.verify_markdown(text, "drop"))
+
+    assert f"[Old notes]({server}/missing) ⚠️ *(link appears to be broken)*" in flagged
+    assert f"{server}/broken ⚠️ *(link could not be verified)*" in flagged
+    assert f"[Guide]({server}/ok)\n" in dropped and "- Old notes\n" in dropped
+    assert extract_links(dropped) == [f"{server}/ok", f"{server}/broken"]
+
+
+def test_link_check_is_off_by_default(monkeypatch):
+    text = "- [Guide](https://example.invalid/guide)"
+    monkeypatch.setattr(link_checker, "get_link_checker", lambda: pytest.fail("checker used while off"))
+
+    assert link_checker.link_check_mode() == "off"
+    assert asyncio.run(verify_reading_materials(text)) == text
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport and records every URL that actually reaches it."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.seen = []
+
+    async def handle_async_request(self, request):
+        self.seen.append(str(request.url))
+        return await self.inner.handle_async_request(request)
+
+
+@pytest.mark.parametrize("url", [
+    "http://169.254.169.254/latest/meta-data/",
+    "http://localhost:8000/jobs",
+    "http://127.0.0.1:8765/jobs",
+    "http://10.0.0.5/admin",
+    "http://[::1]/",
+    "http://[::ffff:192.168.1.1]/",
+    "ftp://example.com/file",
+])
+def test_non_public_targets_are_refused_without_a_request(url):
+    transport = CountingTransport(link_checker.stub_transport())
+    checker = LinkChecker(transport=transport)
+    try:
+        result = asyncio.run(checker.check(url))
+    finally:
+        checker.close()
+
+    assert result.status == "dead" and result.code is None
+    assert result.error.startswith("BlockedURLError")
+    assert transport.seen == []
+
+
+def test_redirect_to_a_private_address_is_refused():
+    async def handler(request):
+        if request.url.host == "public.example":
+            return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/"}, request=request)
+        return httpx.Response(200, request=request)
+
+    transport = CountingTransport(httpx.MockTransport(handler))
+    checker = LinkChecker(transport=transport)
+    try:
+        result = asyncio.run(checker.check("https://public.example/start"))
+    finally:
+        checker.close()
+
+    assert result.status == "dead" and "169.254.169.254" in result.error
+    assert transport.seen == ["https://public.example/start"]
+
+
+def test_local_server_is_refused_by_default(server):
+    checker = LinkChecker()
+    try:
+        result = asyncio.run(checker.check(f"{server}/ok"))
+    finally:
+        checker.close()
+
+    assert result.status == "dead" and result.error.startswith("BlockedURLError")
+
+
+def test_refused_links_are_flagged_not_treated_as_offline():
+    checker = LinkChecker(transport=link_checker.stub_transport())
+    text = "- [Metadata](http://169.254.169.254/latest/)\n"
+    try:
+        flagged, _ = asyncio.run(checker.verify_markdown(text, "drop"))
+    finally:
+        checker.close()
+
+    assert flagged == "- Metadata\n"
@@ -0,0 +1,180 @@
+"""Two-tier response cache: keys, TTL, LRU eviction and the read-through helpers."""
+import asyncio
+
+import pytest
+
+from modules import llm_cache
+from modules.llm_cache import ResponseCache, make_cache_key
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def make_cache(tmp_path, **kwargs):
+    return ResponseCache(cache_dir=str(tmp_path / "cache"), **kwargs)
+
+
+class Counter:
+    def __init__(self, answer="answer"):
+        self.answer = answer
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"{self.answer} {self.calls}"
+
+
+def test_params_are_part_of_the_key():
+    base = make_cache_key("gemini", "m", "prompt", {"temperature": 0.2})
+
+    assert base == make_cache_key("gemini", "m", "prompt", {"temperature": 0.2})
+    assert base != make_cache_key("gemini", "m", "prompt", {"temperature": 0.7})
+    assert base != make_cache_key("gemini", "m", "prompt")
+    assert base != make_cache_key("groq", "m", "prompt", {"temperature": 0.2})
+
+
+def test_fetch_keys_on_params(tmp_path):
+    cache, call = make_cache(tmp_path), Counter()
+
+    first = cache.fetch("gemini", "m", "prompt", call, params={"temperature": 0.2})
+    again = cache.fetch("gemini", "m", "prompt", call, params={"temperature": 0.2})
+    other = cache.fetch("gemini", "m", "prompt", call, params={"temperature": 0.7})
+
+    assert first == again == "answer 1" and other == "answer 2"
+
+
+@pytest.mark.parametrize("memory_entries", [256, 0])
+def test_entries_expire_after_ttl(tmp_path, clock, memory_entries):
+    cache = make_cache(tmp_path, ttl=60, memory_entries=memory_entries)
+    cache.set("key", "value")
+
+    clock.now += 59
+    assert cache.get("key") == "value"
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+
+
+def test_entries_survive_a_new_cache_instance(tmp_path):
+    make_cache(tmp_path).set("key", "value")
+
+    assert make_cache(tmp_path).get("key") == "value"
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, memory_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert list(cache._memory) == ["a", "c"]
+    assert cache.get("b") == "2"  # still on disk
+
+
+def test_disk_tier_evicts_least_recently_used_past_the_budget(tmp_path, clock):
+    cache = make_cache(tmp_path, max_bytes=25, memory_entries=0)
+    for key in ("a", "b"):
+        cache.set(key, "x" * 10)
+        clock.now += 1
+    cache.get("a")
+    clock.now += 1
+
+    cache.set("c", "x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == "x" * 10
+
+
+def test_refresh_skips_the_lookup_but_stores_the_result(tmp_path):
+    cache, call = make_cache(tmp_path), Counter()
+    cache.fetch("gemini", "m", "prompt", call)
+
+    fresh = cache.fetch("gemini", "m", "prompt", call, refresh=True)
+
+    assert fresh == "answer 2" and call.calls == 2
+    assert cache.fetch("gemini", "m", "prompt", call) == "answer 2"
+
+
+def test_use_cache_false_neither_reads_nor_writes(tmp_path):
+    cache, call = make_cache(tmp_path), Counter()
+
+    cache.fetch("gemini", "m", "prompt", call, use_cache=False)
+    cache.fetch("gemini", "m", "prompt", call)
+
+    assert call.calls == 2
+
+
+def test_afetch_refresh(tmp_path):
+    cache, counter = make_cache(tmp_path), Counter()
+
+    async def call():
+        return counter()
+
+    async def run():
+        first = await cache.afetch("gemini", "m", "prompt", call)
+        cached = await cache.afetch("gemini", "m", "prompt", call)
+        fresh = await cache.afetch("gemini", "m", "prompt", call, refresh=True)
+        return first, cached, fresh
+
+    assert asyncio.run(run()) == ("answer 1", "answer 1", "answer 2")
+
+
+def collect(agen):
+    async def run():
+        return [chunk async for chunk in agen]
+    return asyncio.run(run())
+
+
+def chunks(*pieces, fail=False):
+    calls = []
+
+    async def stream():
+        calls.append(1)
+        for piece in pieces:
+            yield piece
+        if fail:
+            raise ConnectionError("dropped mid-stream")
+    return stream, calls
+
+
+def test_astream_replays_a_stored_stream_as_one_chunk(tmp_path):
+    cache = make_cache(tmp_path)
+    stream, calls = chunks("Hello, ", "world")
+
+    live = collect(cache.astream("gemini", "m", "prompt", stream))
+    replay = collect(cache.astream("gemini", "m", "prompt", stream))
+
+    assert live == ["Hello, ", "world"] and replay == ["Hello, world"] and len(calls) == 1
+    assert cache.fetch("gemini", "m", "prompt", Counter()) == "Hello, world"  # shared with fetch
+
+
+def test_astream_refresh_streams_again(tmp_path):
+    cache = make_cache(tmp_path)
+    stream, calls = chunks("a", "b")
+    collect(cache.astream("gemini", "m", "prompt", stream))
+
+    assert collect(cache.astream("gemini", "m", "prompt", stream, refresh=True)) == ["a", "b"]
+    assert len(calls) == 2
+
+
+def test_astream_does_not_store_a_broken_stream(tmp_path):
+    cache = make_cache(tmp_path)
+    stream, _ = chunks("partial", fail=True)
+
+    with pytest.raises(ConnectionError):
+        collect(cache.astream("gemini", "m", "prompt", stream))
+
+    assert cache.get(make_cache_key("gemini", "m", "prompt")) is None
@@ -0,0 +1,141 @@
+"""Routed streaming on the mock backend: cross-loop chunk pump, fallback before the first chunk, cancellation."""
+import asyncio
+import threading
+
+import pytest
+
+from modules import llm_client
+from modules.llm_client import LLMClient
+from modules.llm_errors import TransientLLMError
+from modules.mock_llm import MockProvider
+
+PROMPT = "Write lecture notes for week 1."
+FAST = {"latency": {"distribution": "fixed", "seconds": 0}, "tokens_per_second": 1e9, "chunk_tokens": 10}
+
+
+class BreaksAfterFirstChunk(MockProvider):
+    async def stream(self, model, prompt, **params):
+        async for chunk in super().stream(model, prompt, **params):
+            yield chunk
+            raise ConnectionError("connection reset mid-stream")
+
+
+class RecordsClose(MockProvider):
+    """Slow chunks; records when the stream is torn down and on which thread."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closed = threading.Event()
+        self.closed_on = None
+
+    async def stream(self, model, prompt, **params):
+        try:
+            async for chunk in super().stream(model, prompt, **params):
+                yield chunk
+        finally:
+            self.closed_on = threading.current_thread().name
+            self.closed.set()
+
+
+@pytest.fixture
+def routes(monkeypatch):
+    """Registers providers under their names and returns a client routing "section" through them in order."""
+    monkeypatch.setenv("LLM_RETRY_MAX_ATTEMPTS", "2")
+    monkeypatch.setenv("LLM_RETRY_BASE_DELAY", "0.001")
+    monkeypatch.setenv("LLM_RETRY_MAX_DELAY", "0.001")
+
+    def make(*providers):
+        for provider in providers:
+            monkeypatch.setitem(llm_client.PROVIDERS, provider.name, lambda provider=provider: provider)
+        return LLMClient(routes={"section": [f"{provider.name}:m" for provider in providers]})
+    return make
+
+
+def consume(client, **kwargs):
+    async def run():
+        chunks = []
+        try:
+            async for chunk in client.stream("section", PROMPT, use_cache=False, **kwargs):
+                chunks.append(chunk)
+        except Exception as e:
+            return chunks, e
+        return chunks, None
+    return asyncio.run(run())
+
+
+def test_chunks_arrive_in_order_across_loops(routes):
+    primary = MockProvider("primary", FAST)
+    client = routes(primary)
+
+    chunks, error = consume(client)
+
+    assert error is None and len(chunks) > 1
+    assert "".join(chunks) == asyncio.run(MockProvider("primary", FAST).generate("m", PROMPT))
+
+
+def test_falls_back_when_the_first_route_fails_before_any_chunk(routes):
+    primary = MockProvider("primary", {**FAST, "error_rate": 1.0})
+    backup = MockProvider("backup", FAST)
+    client = routes(primary, backup)
+
+    chunks, error = consume(client)
+
+    assert error is None and len(chunks) > 1
+    assert primary.calls == 2 and backup.calls == 1  # primary retried by its guard, then the next route
+
+
+def test_error_after_a_chunk_is_raised_without_fallback(routes):
+    primary = BreaksAfterFirstChunk("primary", FAST)
+    backup = MockProvider("backup", FAST)
+    client = routes(primary, backup)
+
+    chunks, error = consume(client)
+
+    assert isinstance(error, TransientLLMError) and "mid-stream" in str(error)
+    assert len(chunks) == 1 and primary.calls == 1 and backup.calls == 0
+
+
+def test_all_routes_failing_raises_the_last_error(routes):
+    client = routes(MockProvider("primary", {**FAST, "error_rate": 1.0}), MockProvider("backup", {**FAST, "error_rate": 1.0}))
+
+    chunks, error = consume(client)
+
+    assert chunks == [] and isinstance(error, TransientLLMError) and "backup" in str(error)
+
+
+def test_consumer_cancellation_cancels_the_pump(routes):
+    primary = RecordsClose("primary", {**FAST, "tokens_per_second": 60, "output_tokens": 600})  # ~10 s of chunks
+    client = routes(primary)
+
+    async def run():
+        first = asyncio.get_running_loop().create_future()
+
+        async def read():
+            async for chunk in client.stream("section", PROMPT, use_cache=False):
+                if not first.done():
+                    first.set_result(chunk)
+
+        task = asyncio.ensure_future(read())
+        await asyncio.wait_for(first, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    assert primary.closed.wait(2), "the provider stream kept running after the consumer was cancelled"
+    assert primary.closed_on == "edupilot-llm-loop"
+
+
+def test_closing_the_generator_early_cancels_the_pump(routes):
+    primary = RecordsClose("primary", {**FAST, "tokens_per_second": 60, "output_tokens": 600})
+    client = routes(primary)
+
+    async def run():
+        stream = client.stream("section", PROMPT, use_cache=False)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(run())
+    assert primary.closed.wait(2)
@@ -0,0 +1,103 @@
+import asyncio
+import re
+
+import pytest
+
+from modules import mock_llm
+from modules.llm_client import get_client
+from modules.llm_errors import IncompleteGenerationError
+from modules.pipeline import CheckpointStore, Node, course_params, run_course, run_dag, run_id_for
+
+
+def toy_graph(calls, source_value, source_version=1):
+    async def source(deps):
+        calls.append("source")
+        return source_value
+
+    async def double(deps):
+        calls.append("double")
+        return deps["source"] * 2
+
+    return [
+        Node("source", source, fingerprint=lambda deps: f"source-v{source_version}"),
+        Node("double", double, ["source"]),
+    ]
+
+
+def test_unchanged_fingerprints_reuse_checkpoints(tmp_path):
+    checkpoints, calls = CheckpointStore(str(tmp_path)), []
+    assert asyncio.run(run_dag(toy_graph(calls, 3), checkpoints, verbose=False)) == {"source": 3, "double": 6}
+
+    again = asyncio.run(run_dag(toy_graph(calls, 3), checkpoints, verbose=False))
+
+    assert again == {"source": 3, "double": 6} and calls == ["source", "double"]
+
+
+def test_changed_input_reruns_the_node_and_only_dependents_whose_inputs_changed(tmp_path):
+    checkpoints, calls = CheckpointStore(str(tmp_path)), []
+    asyncio.run(run_dag(toy_graph(calls, 3), checkpoints, verbose=False))
+
+    # New fingerprint, same result: the dependent's inputs are unchanged
+    calls.clear()
+    asyncio.run(run_dag(toy_graph(calls, 3, source_version=2), checkpoints, verbose=False))
+    assert calls == ["source"]
+
+    # New fingerprint and a new result: the dependent reruns too
+    calls.clear()
+    results = asyncio.run(run_dag(toy_graph(calls, 5, source_version=3), checkpoints, verbose=False))
+    assert calls == ["source", "double"] and results["double"] == 10
+
+
+def test_failed_node_fails_its_dependents_but_keeps_other_results(tmp_path):
+    async def ok(deps):
+        return "fine"
+
+    async def broken(deps):
+        raise RuntimeError("boom")
+
+    async def after(deps):
+        return "never"
+
+    nodes = [Node("ok", ok), Node("broken", broken), Node("after", after, ["broken"])]
+    with pytest.raises(IncompleteGenerationError) as error:
+        asyncio.run(run_dag(nodes, CheckpointStore(str(tmp_path)), verbose=False))
+
+    assert error.value.results == {"ok": "fine"}
+    assert sorted(error.value.failures) == ["after", "broken"]
+
+
+@pytest.fixture
+def mocks():
+    get_client()  # created first, so these mocks are the ones it uses
+    return mock_llm.install({"latency": {"distribution": "fixed", "seconds": 0}, "tokens_per_second": 1e9})
+
+
+def mock_calls(mocks):
+    return sum(mock.calls for mock in mocks.values())
+
+
+def test_course_rerun_regenerates_only_changed_weeks(tmp_path, mocks):
+    params = course_params("Web Development", weeks=2)
+    run_dir = str(tmp_path / "run")
+    first = asyncio.run(run_course(params, run_dir, use_cache=False, verbose=False))
+    assert mock_calls(mocks) == 2 + 2 * 4  # objectives, curriculum, four sections per week
+
+    resumed = asyncio.run(run_course(params, run_dir, use_cache=False, verbose=False))
+    assert mock_calls(mocks) == 10 and resumed == first
+
+    params["week_overrides"] = {"2": {"complexity": "Advanced"}}
+    changed = asyncio.run(run_course(params, run_dir, use_cache=False, verbose=False))
+    assert mock_calls(mocks) == 10 + 4  # only week 2's sections
+    assert changed["week_ids"]["1"] == first["week_ids"]["1"]
+
+
+@pytest.mark.parametrize("topic, prefix", [
+    ("Web Development", "web-development-"),
+    ("C/C++", "c-c-"),
+    ("Networking: TCP/IP", "networking-tcp-ip-"),
+])
+def test_run_id_is_a_single_safe_path_component(topic, prefix):
+    run_id = run_id_for(course_params(topic))
+
+    assert run_id.startswith(prefix)
+    assert re.fullmatch(r"[a-z0-9-]+", run_id)
@@ -0,0 +1,94 @@
+"""Per-provider concurrency caps are held by LLMClient for each route it actually calls."""
+import asyncio
+
+import pytest
+
+from modules import hedging, llm_client
+from modules.llm_client import LLMClient
+
+
+class TrackingProvider:
+    """Answers after `seconds`, or raises; records the most calls it saw in flight at once."""
+
+    def __init__(self, seconds=0.02, fail=False):
+        self.seconds = seconds
+        self.fail = fail
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def generate(self, model, prompt, **params):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.seconds)
+            if self.fail:
+                raise ValueError("bad request")
+            return f"answer to {prompt}"
+        finally:
+            self.in_flight -= 1
+
+    async def stream(self, model, prompt, **params):
+        yield await self.generate(model, prompt, **params)
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    created = {"primary": TrackingProvider(), "backup": TrackingProvider()}
+    for name, provider in created.items():
+        monkeypatch.setitem(llm_client.PROVIDERS, name, lambda provider=provider: provider)
+        monkeypatch.setenv(f"{name.upper()}_RPM", "1000000")
+    return created
+
+
+def run_many(client, limits, count=8, task="section"):
+    async def run():
+        limits_here = {name: asyncio.Semaphore(n) for name, n in limits.items()}
+        return await asyncio.gather(*(
+            client.generate(task, f"prompt {i}", use_cache=False, limits=limits_here) for i in range(count)
+        ))
+    return asyncio.run(run())
+
+
+def test_fallback_route_respects_its_own_limit(providers):
+    providers["primary"].fail = True
+    client = LLMClient(routes={"section": ["primary:m", "backup:m"]})
+
+    answers = run_many(client, {"primary": 8, "backup": 2})
+
+    assert len(answers) == 8 and providers["backup"].calls == 8
+    assert providers["backup"].max_in_flight == 2
+
+
+def test_primary_route_respects_its_limit(providers):
+    client = LLMClient(routes={"section": ["primary:m", "backup:m"]})
+
+    run_many(client, {"primary": 3})
+
+    assert providers["primary"].max_in_flight == 3 and providers["backup"].calls == 0
+
+
+def test_hedged_route_respects_its_own_limit(providers):
+    providers["primary"].seconds = 0.3
+    policy = {**hedging.POLICY_DEFAULTS, "enabled": True, "delay_s": 0.01}
+    hedging.install(hedging.Hedger(policies={"section": policy}, budget=hedging.HedgeBudget(ratio=1, burst=100)))
+    client = LLMClient(routes={"section": ["primary:m", "backup:m"]})
+
+    run_many(client, {"primary": 8, "backup": 1})
+
+    assert providers["backup"].calls > 1 and providers["backup"].max_in_flight == 1
+
+
+def test_streaming_respects_the_limit(providers):
+    client = LLMClient(routes={"section": ["primary:m"]})
+
+    async def run():
+        limits = {"primary": asyncio.Semaphore(2)}
+
+        async def consume(i):
+            return "".join([chunk async for chunk in client.stream("section", f"prompt {i}", use_cache=False, limits=limits)])
+        return await asyncio.gather(*(consume(i) for i in range(6)))
+
+    assert len(asyncio.run(run())) == 6
+    assert providers["primary"].max_in_flight == 2
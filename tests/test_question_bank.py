@@ -0,0 +1,101 @@
+import pytest
+
+from modules.artifact_store import get_store
+from modules.question_bank import assemble_exam, find_duplicates, load_bank, main, parse_assessment
+
+WEEK_1 = """
+## Multiple Choice Questions
+
+1. Which HTTP method is idempotent and used to replace a resource?
+   a) POST
+   b) PUT
+   c) PATCH
+   d) CONNECT
+2. **What does a 404 status code mean?**
+   A. Server error
+   B. Not found
+
+## Short Questions
+
+1. Explain the difference between a cookie and a session.
+2. Why should passwords be hashed with a salt?
+Answer: Salts stop precomputed rainbow-table attacks.
+
+## MCQ Answers
+
+1. b) PUT
+2. B
+
+## Short Question Answers
+
+1. Cookies live in the browser; sessions are stored on the server.
+"""
+
+
+def test_parse_assessment_reads_options_and_both_answer_styles():
+    questions = parse_assessment(WEEK_1, week=1)
+
+    mcq = [q for q in questions if q["type"] == "mcq"]
+    short = [q for q in questions if q["type"] == "short"]
+    assert [q["number"] for q in mcq] == [1, 2] and [q["number"] for q in short] == [1, 2]
+    assert mcq[0]["options"] == ["POST", "PUT", "PATCH", "CONNECT"] and mcq[0]["answer"] == "b"
+    assert mcq[1]["stem"] == "What does a 404 status code mean?" and mcq[1]["answer"] == "b"
+    assert short[0]["answer"].startswith("Cookies live in the browser")
+    assert short[1]["answer"] == "Salts stop precomputed rainbow-table attacks."
+    assert all(q["week"] == 1 for q in questions)
+
+
+def test_answer_starting_with_a_capital_letter_is_not_an_option_letter():
+    markdown = "## Short Questions\n1. What is a foreign key?\n## Short Question Answers\n1. A foreign key references another table."
+
+    (question,) = parse_assessment(markdown)
+
+    assert question["answer"] == "A foreign key references another table."
+
+
+def test_find_duplicates_flags_near_repeats_only():
+    texts = [
+        "Explain the difference between a cookie and a session in web applications.",
+        "Explain the difference between a cookie and a session in modern web applications.",
+        "Describe how a relational database enforces referential integrity.",
+    ]
+
+    pairs = find_duplicates(texts)
+
+    assert [(i, j) for i, j, _ in pairs] == [(0, 1)]
+    assert 0.7 <= pairs[0][2] < 1.0
+
+
+def store_weeks(course, weeks):
+    for week, assessment in weeks.items():
+        get_store().put("week_content", {"assessment_questions": assessment}, course=course, week=week)
+
+
+def test_bank_marks_cross_week_repeats_and_exams_skip_them():
+    week_2 = WEEK_1.replace("Which HTTP method is idempotent and used to replace a resource?",
+                            "Which HTTP method is idempotent and is used to replace a resource?")
+    store_weeks("Web Development", {1: WEEK_1, 2: week_2})
+
+    bank, bank_id = load_bank("Web Development")
+
+    repeats = [q for q in bank["questions"] if q["duplicate_of"]]
+    assert bank_id.startswith("question_bank/web-development/")
+    assert repeats and all(q["week"] == 2 for q in repeats)
+    assert load_bank("Web Development")[1] == bank_id  # unchanged weeks reuse the stored bank
+
+    exam = assemble_exam(bank, "final", mcq=10, short=10, seed=7)
+    picked = exam["mcq"] + exam["short"]
+    assert len(picked) == 4 and len({q["id"] for q in picked}) == 4
+    assert all(q["duplicate_of"] is None and q["week"] == 1 for q in picked)
+
+
+def test_exam_cli_rejects_weeks_outside_the_bank(tmp_path, capsys):
+    store_weeks("Web Development", {1: WEEK_1})
+
+    assert main(["exam", "Web Development", "--weeks", "99", "--output", str(tmp_path / "exam.md")]) == 2
+    assert "available: 1" in capsys.readouterr().out
+
+
+def test_cli_reports_a_course_without_weeks(capsys):
+    assert main(["exam", "Nothing Here"]) == 2
+    assert "No weekly content" in capsys.readouterr().out
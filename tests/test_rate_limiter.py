@@ -0,0 +1,202 @@
+"""Token buckets, error classification and the circuit breaker around provider calls."""
+import asyncio
+
+import pytest
+
+from modules.llm_errors import CircuitOpenError, LLMRequestError, RateLimitError, TransientLLMError
+from modules.rate_limiter import (
+    CircuitBreaker,
+    ProviderGuard,
+    RetryPolicy,
+    TokenBucket,
+    classify_error,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+class ResourceExhausted(Exception):
+    pass
+
+
+def open_guard(reset_timeout=0.0, rpm=1_000_000):
+    """A guard whose breaker is already open and (with reset_timeout=0) ready for a half-open probe."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    return ProviderGuard("test", rpm=rpm, tpm=1_000_000, retry=RetryPolicy(max_attempts=1), breaker=breaker)
+
+
+# --- Token bucket ---
+def test_bucket_admits_up_to_capacity_then_asks_to_wait():
+    bucket = TokenBucket(60)
+
+    assert all(bucket.reserve(1) == 0.0 for _ in range(60))
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_bucket_queues_callers_in_arrival_order():
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+
+    first, second = bucket.reserve(1), bucket.reserve(1)
+
+    assert second > first > 0
+
+
+def test_bucket_caps_oversized_requests_at_capacity():
+    bucket = TokenBucket(60)
+
+    assert bucket.reserve(10_000) == 0.0
+    assert bucket.tokens == pytest.approx(0.0, abs=0.5)
+
+
+# --- Error classification ---
+@pytest.mark.parametrize("exc, expected", [
+    (StatusError("slow down", 429), RateLimitError),
+    (ResourceExhausted("quota"), RateLimitError),
+    (StatusError("boom", 503), TransientLLMError),
+    (APITimeoutError("timed out"), TransientLLMError),
+    (ConnectionError("reset"), TransientLLMError),
+    (StatusError("bad", 400), LLMRequestError),
+    (ValueError("bad prompt"), LLMRequestError),
+])
+def test_classify_error(exc, expected):
+    error = classify_error("groq", exc)
+
+    assert type(error) is expected
+    assert error.provider == "groq"
+
+
+def test_classify_error_reads_retry_after_from_the_message():
+    error = classify_error("gemini", ResourceExhausted("429 quota exceeded, retry in 7.5s"))
+
+    assert error.retry_after == 7.5
+
+
+def test_classify_error_passes_typed_errors_through():
+    original = RateLimitError("limited", "groq", retry_after=1)
+
+    assert classify_error("groq", original) is original
+
+
+# --- Circuit breaker ---
+def test_breaker_opens_after_threshold_and_refuses_calls():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError, match="probe in flight"):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=0)
+    for _ in range(5):
+        breaker.record_failure()
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open" and not breaker._probe_in_flight
+
+
+def test_request_errors_do_not_open_the_circuit():
+    guard = ProviderGuard("test", rpm=1000, tpm=1_000_000, retry=RetryPolicy(max_attempts=3),
+                          breaker=CircuitBreaker("test", failure_threshold=1))
+
+    async def bad():
+        raise ValueError("bad prompt")
+
+    with pytest.raises(LLMRequestError):
+        asyncio.run(guard.call(bad))
+    assert guard.breaker.state == "closed"
+
+
+def test_transient_errors_are_retried():
+    guard = ProviderGuard("test", rpm=1000, tpm=1_000_000,
+                          retry=RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001))
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert asyncio.run(guard.call(flaky)) == "ok"
+    assert len(attempts) == 3 and guard.breaker.state == "closed"
+
+
+def test_probe_cancelled_while_waiting_for_the_limiter_is_released():
+    guard = open_guard(rpm=60)
+    guard.limiter.requests.reserve(60)  # the next reservation waits about a second
+
+    async def answer():
+        return "ok"
+
+    async def run():
+        task = asyncio.ensure_future(guard.call(answer))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    assert guard.breaker.state == "half_open" and not guard.breaker._probe_in_flight
+    guard.breaker.before_call()
+
+
+def test_stream_probe_cancelled_while_waiting_for_the_limiter_is_released():
+    guard = open_guard(rpm=60)
+    guard.limiter.requests.reserve(60)
+
+    async def chunks():
+        yield "ok"
+
+    async def run():
+        async def consume():
+            return [chunk async for chunk in guard.stream(chunks)]
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    assert not guard.breaker._probe_in_flight
+
+
+def test_successful_probe_closes_the_circuit():
+    guard = open_guard()
+
+    async def answer():
+        return "ok"
+
+    assert asyncio.run(guard.call(answer)) == "ok"
+    assert guard.breaker.state == "closed"
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from modules import mock_llm
+from modules.llm_client import get_client
+from modules.module1_learning_objective_setter import generate_learning_objectives_async
+
+
+@pytest.fixture
+def semantic(monkeypatch):
+    monkeypatch.setenv("EDUPILOT_SEMANTIC_CACHE", "1")
+    from modules import semantic_cache
+    monkeypatch.setattr(semantic_cache, "_default_cache", None)
+    get_client()  # creates the client first, so these mocks are the ones it uses
+    return mock_llm.install({"latency": {"distribution": "fixed", "seconds": 0}, "tokens_per_second": 1e9})
+
+
+def generate(topic, level):
+    objectives, _ = asyncio.run(generate_learning_objectives_async(topic, level, 3))
+    assert objectives
+    return objectives
+
+
+def test_level_is_part_of_the_exact_scope(semantic):
+    generate("Python Programming", "Undergraduate_Basic")
+    generate("Python Programming", "Professional")
+
+    assert sum(mock.calls for mock in semantic.values()) == 2
+
+
+def test_similar_topic_at_the_same_level_is_a_hit(semantic):
+    generate("Python Programming", "Graduate")
+    generate("Intro to Python Programming", "Graduate")
+
+    assert sum(mock.calls for mock in semantic.values()) == 1
@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+
+from modules.curriculum_parser import parse_curriculum
+from modules.llm_errors import InvalidStructuredOutputError
+from modules.structured_output import extract_json, generate_validated, parse_curriculum_json, parse_objectives
+
+VERBS = ("Analyze", "Design", "Evaluate")
+
+
+def curriculum(weeks_per_module=(2, 2, 2, 2), **week_overrides):
+    modules, number = [], 0
+    for index, count in enumerate(weeks_per_module, 1):
+        weeks = []
+        for _ in range(count):
+            number += 1
+            weeks.append({"number": number, "title": f"Topic {number}", "topics": f"t{number}",
+                          "activities": f"a{number}", "assessment": "Quiz", **week_overrides})
+        modules.append({"number": index, "title": f"Module {index}", "weeks": weeks})
+    return {"modules": modules}
+
+
+def test_extract_json_repairs_fences_chatter_and_trailing_commas():
+    text = 'Sure! Here it is:\n```json\n{"objectives": ["a", "b",],}\n```'
+
+    data, repairs = extract_json(text)
+
+    assert data == {"objectives": ["a", "b"]}
+    assert repairs == ["removed code fences", "dropped text around the JSON", "removed trailing commas"]
+
+
+def test_extract_json_without_json_raises():
+    with pytest.raises(InvalidStructuredOutputError):
+        extract_json("I cannot help with that.")
+
+
+def test_objectives_are_cleaned_deduplicated_and_trimmed():
+    items = ["1. **Analyze** trade-offs between SQL and NoSQL stores", "Objectives:",
+             "Students will be able to design normalized relational schemas",
+             "Design normalized relational schemas", "Evaluate query plans for slow queries",
+             {"text": "Analyze indexing strategies for large tables"},
+             "Evaluate consistency models in distributed databases", "Design backup and recovery procedures"]
+
+    objectives, notes = parse_objectives(json.dumps({"objectives": items}), VERBS, expected=5)
+
+    assert objectives[0] == "Analyze trade-offs between SQL and NoSQL stores"
+    assert objectives[1] == "Design normalized relational schemas"
+    assert len(objectives) == 5
+    assert any("duplicate" in note for note in notes) and any("non-objective" in note for note in notes)
+    assert any("kept the first 5" in note for note in notes)
+
+
+def test_plain_text_objectives_are_parsed_line_by_line():
+    text = "1. Analyze sorting algorithms by cost\n2. Design divide and conquer solutions\n3. Evaluate greedy heuristics on examples"
+
+    objectives, notes = parse_objectives(text, VERBS, expected=3)
+
+    assert objectives[2] == "Evaluate greedy heuristics on examples"
+    assert notes[0] == "repaired: parsed a plain-text answer line by line"
+
+
+def test_too_few_objectives_cannot_be_repaired():
+    with pytest.raises(InvalidStructuredOutputError):
+        parse_objectives('{"objectives": ["Analyze things carefully"]}', VERBS)
+
+
+def test_curriculum_is_renumbered_and_rendered_for_the_parser():
+    data = curriculum()
+    data["modules"].reverse()  # modules out of order
+    data["modules"][0]["weeks"][0]["number"] = "Week 7"
+
+    text, notes = parse_curriculum_json(json.dumps(data), semester_weeks=8)
+
+    structure = parse_curriculum(text)
+    assert [module["number"] for module in structure["modules"]] == [1, 2, 3, 4]
+    assert [week["number"] for module in structure["modules"] for week in module["weeks"]] == list(range(1, 9))
+    assert structure["modules"][0]["weeks"][0]["topics"] == "t1"
+    assert not [note for note in notes if note.startswith("warning")]
+
+
+def test_curriculum_extra_weeks_are_dropped_and_missing_weeks_raise():
+    text, notes = parse_curriculum_json(json.dumps(curriculum((2, 2, 2, 3))), semester_weeks=8)
+    assert "repaired: dropped 1 week(s) past week 8" in notes
+    assert "Week 9" not in text
+
+    with pytest.raises(InvalidStructuredOutputError, match="covers 8 week"):
+        parse_curriculum_json(json.dumps(curriculum()), semester_weeks=10)
+
+
+def test_curriculum_module_without_weeks_is_dropped():
+    data = curriculum()
+    data["modules"].insert(1, {"number": 2, "title": "Empty", "weeks": []})
+
+    text, notes = parse_curriculum_json(json.dumps(data), semester_weeks=8)
+
+    assert "repaired: dropped 1 module(s) with no weeks" in notes
+    structure = parse_curriculum(text)
+    assert [module["number"] for module in structure["modules"]] == [1, 2, 3, 4]
+    assert "Empty" not in text
+
+
+class ScriptedClient:
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    async def generate(self, task, prompt, **kwargs):
+        self.calls.append(kwargs)
+        return self.answers.pop(0)
+
+
+def test_generate_validated_retries_once_without_the_cache():
+    client = ScriptedClient(["no json here", json.dumps(curriculum())])
+
+    text, rendered, notes = asyncio.run(generate_validated(
+        client, "curriculum", "prompt", {}, lambda text: parse_curriculum_json(text, 8)
+    ))
+
+    assert "**Module 4: Module 4**" in rendered
+    assert [call["refresh"] for call in client.calls] == [False, True]
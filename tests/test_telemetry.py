@@ -0,0 +1,173 @@
+"""Spans, label propagation into the client loop, Prometheus text and run summaries."""
+import asyncio
+import threading
+
+import pytest
+
+from modules import llm_client, telemetry
+from modules.llm_client import LLMClient
+from modules.telemetry import Metrics
+
+
+class ProbeProvider:
+    """Fails the first `failures` calls with a transient error; records what each call saw on its loop."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.seen = []
+
+    async def generate(self, model, prompt, **params):
+        span = telemetry.current_span()
+        self.seen.append({"thread": threading.current_thread().name, "span": span,
+                          "labels": dict(telemetry._labels.get())})
+        telemetry.record_usage(11, 7)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        return f"answer to {prompt}"
+
+    async def stream(self, model, prompt, **params):
+        yield await self.generate(model, prompt, **params)
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    provider = ProbeProvider()
+    monkeypatch.setitem(llm_client.PROVIDERS, "probe", lambda: provider)
+    monkeypatch.setenv("LLM_RETRY_BASE_DELAY", "0.001")
+    monkeypatch.setenv("LLM_RETRY_MAX_DELAY", "0.001")
+    return provider
+
+
+def span_fields(**overrides):
+    return {"provider": "gemini", "model": "m", "task": "section", "stage": None, "cache_hit": False, "status": "ok",
+            "latency_s": 1.0, "ttft_s": 0.5, "tokens_in": 10, "tokens_out": 20, "retries": 0,
+            "rate_limit_wait_s": 0.0, **overrides}
+
+
+def test_labels_nest_merge_and_reset():
+    with telemetry.labels(stage="content", week=3):
+        with telemetry.labels(section="lecture_notes", week=4, task=None):
+            inner = telemetry.start_span("gemini", "m").fields
+        outer = telemetry.start_span("gemini", "m").fields
+    after = telemetry.start_span("gemini", "m").fields
+
+    assert (inner["stage"], inner["week"], inner["section"]) == ("content", 4, "lecture_notes")
+    assert (outer["stage"], outer["week"], outer["section"]) == ("content", 3, None)
+    assert after["stage"] is None and after["week"] is None
+
+
+def test_track_nests_spans_and_restores_the_outer_one():
+    with telemetry.collect() as spans:
+        outer = telemetry.start_span("gemini", "outer")
+        with telemetry.track(outer):
+            inner = telemetry.start_span("groq", "inner")
+            with telemetry.track(inner):
+                assert telemetry.current_span() is inner
+                telemetry.record_retry()
+            assert telemetry.current_span() is outer
+        assert telemetry.current_span() is None
+
+    assert [span["model"] for span in spans] == ["inner", "outer"]
+    assert spans[0]["retries"] == 1 and spans[1]["retries"] == 0
+
+
+def test_track_records_the_error_status():
+    with telemetry.collect() as spans:
+        with pytest.raises(ValueError):
+            with telemetry.track(telemetry.start_span("gemini", "m")):
+                raise ValueError("bad prompt")
+
+    assert spans[0]["status"] == "ValueError" and spans[0]["error"] == "bad prompt"
+
+
+def test_labels_and_current_span_reach_the_client_loop(probe):
+    probe.failures = 1
+    client = LLMClient(routes={"section": ["probe:m"]})
+
+    async def run():
+        with telemetry.labels(stage="content", week=2, section="exercises_projects"):
+            return await client.generate("section", "prompt", use_cache=False)
+
+    with telemetry.collect(run_id="run-1") as spans:
+        assert asyncio.run(run()) == "answer to prompt"
+
+    assert {seen["thread"] for seen in probe.seen} == {"edupilot-llm-loop"}
+    assert probe.seen[0]["labels"] == {"run_id": "run-1", "stage": "content", "week": 2,
+                                       "section": "exercises_projects", "task": "section"}
+    assert probe.seen[0]["span"] is not None and probe.seen[0]["span"] is probe.seen[1]["span"]
+    [span] = spans
+    assert (span["run_id"], span["stage"], span["week"], span["section"], span["task"]) == \
+        ("run-1", "content", 2, "exercises_projects", "section")
+    assert span["retries"] == 1 and span["cache_hit"] is False
+    assert (span["tokens_in"], span["tokens_out"], span["tokens_estimated"]) == (11, 7, False)
+
+
+def test_collect_keeps_only_its_own_run(probe):
+    client = LLMClient(routes={"section": ["probe:m"]})
+
+    with telemetry.collect(run_id="mine") as spans:
+        with telemetry.labels(run_id="other"):
+            asyncio.run(client.generate("section", "theirs", use_cache=False))
+        asyncio.run(client.generate("section", "ours", use_cache=False))
+
+    assert [span["run_id"] for span in spans] == ["mine"]
+
+
+def test_cache_hits_report_zero_tokens(probe):
+    client = LLMClient(routes={"section": ["probe:m"]})
+
+    with telemetry.collect() as spans:
+        asyncio.run(client.generate("section", "cached prompt"))
+        asyncio.run(client.generate("section", "cached prompt"))
+
+    assert [span["cache_hit"] for span in spans] == [False, True]
+    assert (spans[1]["tokens_in"], spans[1]["tokens_out"]) == (0, 0)
+
+
+def test_prometheus_text():
+    metrics = Metrics()
+    metrics(span_fields())
+    metrics(span_fields(latency_s=2.0, retries=2))
+    metrics(span_fields(cache_hit=True, tokens_in=0, tokens_out=0, latency_s=0.0))
+
+    text = metrics.render()
+
+    labels = 'provider="gemini",model="m",task="section"'
+    assert "# TYPE edupilot_llm_calls_total counter" in text
+    assert f'edupilot_llm_calls_total{{{labels},cache_hit="false",status="ok"}} 2' in text
+    assert f'edupilot_llm_calls_total{{{labels},cache_hit="true",status="ok"}} 1' in text
+    assert f'edupilot_llm_latency_seconds_sum{{{labels},cache_hit="false",status="ok"}} 3.0' in text
+    assert f'edupilot_llm_tokens_out_total{{{labels},cache_hit="false",status="ok"}} 40' in text
+    assert f'edupilot_llm_retries_total{{{labels},cache_hit="false",status="ok"}} 2' in text
+    assert text.endswith("\n")
+
+
+def test_export_prometheus_writes_the_counters(tmp_path):
+    path = tmp_path / "edupilot.prom"
+
+    telemetry.export_prometheus(str(path))
+
+    assert path.read_text() == telemetry.prometheus_text()
+
+
+def test_summarize_groups_by_task_and_model():
+    spans = [
+        span_fields(latency_s=1.0),
+        span_fields(latency_s=3.0, retries=1, rate_limit_wait_s=0.25),
+        span_fields(cache_hit=True, latency_s=100.0, ttft_s=100.0, tokens_in=0, tokens_out=0),
+        span_fields(task="objectives", provider="groq", status="RateLimitError"),
+    ]
+
+    summary = telemetry.summarize(spans)
+
+    assert (summary["calls"], summary["cache_hits"], summary["tokens_in"], summary["tokens_out"]) == (4, 1, 30, 60)
+    objectives, section = summary["rows"]
+    assert (objectives["task"], objectives["model"], objectives["errors"]) == ("objectives", "groq:m", 1)
+    assert (section["calls"], section["cache_hits"], section["retries"]) == (3, 1, 1)
+    assert (section["p50_latency_s"], section["p95_latency_s"]) == (1.0, 3.0)  # cache hits are not latency samples
+    assert section["rate_limit_wait_s"] == 0.25
+
+    text = telemetry.format_summary(summary)
+    assert text.splitlines()[0] == "LLM calls: 4 (1 cache hits), tokens in/out: 30/60"
+    assert any(line.startswith("section") and "gemini:m" in line for line in text.splitlines())
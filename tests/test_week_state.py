@@ -0,0 +1,23 @@
+from modules.module3_content_generator import SECTIONS, is_week_complete
+
+
+def week(**overrides):
+    return {**{section: f"# {section}\nReal content." for section in SECTIONS}, **overrides}
+
+
+def test_real_content_starting_with_error_is_complete():
+    assert is_week_complete(week(lecture_notes="Error handling in Python: try, except and finally."))
+    assert is_week_complete(week(exercises_projects="Errors and exceptions lab"))
+
+
+def test_legacy_error_strings_are_incomplete():
+    assert not is_week_complete(week(reading_materials="Error with Gemini: 429 quota exceeded"))
+    assert not is_week_complete(week(lecture_notes="Error with Groq: connection reset"))
+    assert not is_week_complete(week(assessment_questions="Error: Gemini model is not initialized. Check API key."))
+
+
+def test_missing_or_blank_sections_are_incomplete():
+    assert not is_week_complete(week(lecture_notes="   "))
+    content = week()
+    del content["reading_materials"]
+    assert not is_week_complete(content)